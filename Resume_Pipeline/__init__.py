@@ -6,10 +6,31 @@ This makes `finalCode` importable as a package so internal relative imports work
 __all__ = [
     "config",
     "openai_client",
+    "deadline",
+    "endpoint_pool",
+    "circuit_breaker",
+    "extraction_pool",
     "loader_resume",
     "resume_segment",
+    "resume_local_segment",
     "resume_format",
     "jd_segment",
+    "jd_local_segment",
     "jd_format",
     "scoring",
+    "scoring_matrix",
+    "batch_jobs",
+    "local_scoring",
+    "compaction",
+    "fused_evaluation",
+    "stub_server",
+    "loadtest",
+    "docx_benchmark",
+    "ocr_benchmark",
+    "result_sink",
+    "requirement_scoring",
+    "single_flight",
+    "admission",
+    "ocr_cache",
+    "cost_ledger",
 ]
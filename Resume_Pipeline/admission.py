@@ -0,0 +1,135 @@
+#admission.py
+# Admission control for the API: each endpoint has a gate with a concurrency limit and a bounded
+# FIFO queue. Requests beyond the limit wait in the queue for at most the queue timeout; when the
+# queue is full they are turned away at once with 429, and when the wait runs out with 503, both
+# with a Retry-After estimated from recent service times. Admitted requests therefore never
+# compete with more than ``concurrency`` others, which keeps their latency steady under a burst.
+
+import math
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+EWMA_ALPHA = 0.2
+RETRY_AFTER_MAX = 60
+
+
+class Overloaded(Exception):
+    """The gate turned the request away: ``status`` is 429 (queue full) or 503 (queue wait exceeded)."""
+
+    def __init__(self, gate: str, status: int, retry_after: int, reason: str):
+        super().__init__(f"{gate}: {reason}")
+        self.gate = gate
+        self.status = status
+        self.retry_after = retry_after
+
+
+class Slot:
+    """One admitted request. ``release`` is idempotent and may be called from any thread."""
+
+    def __init__(self, gate: "AdmissionGate"):
+        self._gate = gate
+        self._loop = asyncio.get_running_loop()
+        self._started = time.monotonic()
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        held = time.monotonic() - self._started
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._gate._release(held)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._gate._release, held)
+
+
+class AdmissionGate:
+    """Concurrency limit plus bounded FIFO queue (concurrency 0 = unlimited, queue 0 = reject when busy)."""
+
+    def __init__(self, name: str, concurrency: int, queue: int, queue_timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.running = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._service_ewma: Optional[float] = None
+        self.stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0}
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely free for a new arrival: queued work ahead of it over the concurrency."""
+        service = self._service_ewma or 1.0
+        waves = (len(self._waiters) + 1) / max(1, self.concurrency)
+        return max(1, min(RETRY_AFTER_MAX, math.ceil(service * waves)))
+
+    async def acquire(self) -> Slot:
+        if self.concurrency <= 0 or (self.running < self.concurrency and not self._waiters):
+            self.running += 1
+            self.stats["admitted"] += 1
+            return Slot(self)
+        if len(self._waiters) >= self.queue:
+            self.stats["rejected"] += 1
+            raise Overloaded(self.name, 429, self.retry_after(), "too many requests in progress")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats["queued"] += 1
+        try:
+            # a released slot is handed to the waiter without passing through ``running``
+            await asyncio.wait_for(waiter, self.queue_timeout if self.queue_timeout > 0 else None)
+        except asyncio.TimeoutError:
+            self._drop(waiter)
+            self.stats["timed_out"] += 1
+            raise Overloaded(self.name, 503, self.retry_after(), "queued too long")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release(None)  # the slot was handed over as the caller went away
+            else:
+                self._drop(waiter)
+            raise
+        self.stats["admitted"] += 1
+        return Slot(self)
+
+    def _drop(self, waiter: asyncio.Future):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self, held: Optional[float]):
+        if held is not None:
+            self._service_ewma = held if self._service_ewma is None else \
+                (1 - EWMA_ALPHA) * self._service_ewma + EWMA_ALPHA * held
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+    async def run(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        slot = await self.acquire()
+        try:
+            return await fn()
+        finally:
+            slot.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency, "queue": self.queue, "running": self.running,
+            "queued_now": len(self._waiters),
+            "service_ewma": round(self._service_ewma, 3) if self._service_ewma is not None else None,
+            **self.stats,
+        }
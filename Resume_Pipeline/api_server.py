@@ -4,29 +4,84 @@ Provides endpoints for JD segmentation and resume evaluation
 """
 
 import os
+import json
+import time
+import asyncio
+import hashlib
 import tempfile
-import requests
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, Any, List
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-import uvicorn
 import argparse
 
 # Import existing processing modules
 from . import config
 from .jd_segment import segment_job_description
 from .jd_format import format_job_description_text
-from .loader_resume import load_resume
+from .loader_resume import ResumeTooLarge, load_resume, ocr_stats, record_ocr
 from .resume_segment import segment_resume
 from .resume_format import format_resume_text
-from .scoring import evaluate_resume
-
-app = FastAPI(title="AI Recruit API", description="API for processing job descriptions and resumes", version="1.0.0")
+from .scoring import evaluate_resume, evaluate_resume_stream
+from .fused_evaluation import evaluate_resume_fused
+from .requirement_scoring import evaluate_by_requirement
+from .compaction import compact_json
+from .deadline import DeadlineExceeded, deadline, expires_in, remaining
+from .circuit_breaker import CircuitOpenError
+from . import cost_ledger
+from .cost_ledger import BudgetExceeded
+from . import extraction_pool
+from .extraction_pool import ExtractionTimeout, extract_resume_text
+from .single_flight import IdempotencyConflict, IdempotencyStore, SingleFlight
+from .admission import AdmissionGate, Overloaded
+
+def warm_up():
+    """Pre-initialize the PDF engine, the HTTP libraries and the model clients (no model call is made)"""
+    started = time.perf_counter()
+    from . import loader_resume, openai_client
+    import requests  # noqa: F401
+    try:
+        loader_resume.warm_up()
+    except Exception as e:
+        print(f"[WARNING] PDF engine warm-up failed: {e}")
+    try:
+        openai_client.warm_up()
+    except Exception as e:
+        print(f"[WARNING] Model client warm-up failed: {e}")
+    print(f"[DEBUG] Warm-up finished in {time.perf_counter() - started:.2f}s")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background: the server answers /health at once and reports /ready when done
+    app.state.ready = asyncio.Event()
+
+    async def _warm():
+        try:
+            # pre-start the extraction workers (each loads the PDF engine); until they are up,
+            # extraction runs in the thread pool
+            await run_in_threadpool(extraction_pool.start_pool)
+        except Exception as e:
+            print(f"[WARNING] Extraction pool failed to start, extracting in threads: {e}")
+        if config.WARM_UP_ON_STARTUP:
+            await run_in_threadpool(warm_up)
+        app.state.ready.set()
+
+    app.state.warm_up_task = asyncio.create_task(_warm())
+    yield
+    app.state.warm_up_task.cancel()
+    extraction_pool.shutdown_pool()
+
+app = FastAPI(title="AI Recruit API", description="API for processing job descriptions and resumes", version="1.0.0", lifespan=lifespan)
 
 # Pydantic models for request/response
 class JDSegmentationRequest(BaseModel):
     jd_text: str
+    jd_id: Optional[str] = None  # Requisition id for the cost ledger; None = hash of the JD text
 
 class JDSegmentationResponse(BaseModel):
     segmented_jd: Dict[str, List[str]]
@@ -34,15 +89,24 @@ class JDSegmentationResponse(BaseModel):
 class ResumeEvaluationRequest(BaseModel):
     resume_url: str  # Cloudinary URL
     jd_json: Dict[str, Any]  # Segmented JD JSON
+    fused: Optional[bool] = None  # Single-call structuring + scoring; None = config.FUSED_EVALUATION
+    per_requirement: Optional[bool] = None  # Cached per-requirement ratings; None = config.REQUIREMENT_SCORING
+    jd_id: Optional[str] = None  # Requisition id for the cost ledger; None = hash of the JD JSON
 
 class ResumeEvaluationResponse(BaseModel):
     evaluation: Dict[str, Any]
 
 def download_file_from_url(url: str, temp_dir: str) -> str:
     """Download file from URL and return local path"""
+    import requests
+
     try:
-        response = requests.get(url, timeout=30)
+        left = remaining()
+        response = requests.get(url, timeout=30 if left is None else max(1.0, min(30.0, left)), stream=True)
         response.raise_for_status()
+        max_bytes = config.RESUME_MAX_BYTES
+        if max_bytes and int(response.headers.get('content-length') or 0) > max_bytes:
+            raise HTTPException(status_code=413, detail=f"Resume file exceeds {max_bytes} bytes")
 
         # Determine file extension from URL or content-type
         content_type = response.headers.get('content-type', '')
@@ -60,131 +124,447 @@ def download_file_from_url(url: str, temp_dir: str) -> str:
                 ext = '.pdf'  # Default to PDF
 
         temp_file = os.path.join(temp_dir, f"temp_resume{ext}")
+        # Stream to disk so an oversized or unbounded body is cut off at the byte limit
+        size = 0
         with open(temp_file, 'wb') as f:
-            f.write(response.content)
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise HTTPException(status_code=413, detail=f"Resume file exceeds {max_bytes} bytes")
+                f.write(chunk)
 
         return temp_file
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to download file: {str(e)}")
 
+def extract_personal_info(formatted_resume: Dict[str, Any], resume_text: str) -> Dict[str, str]:
+    """Pull name/email from the formatted resume, falling back to the raw resume text"""
+    personal_info = {}
+    import re
+
+    # Get personal info - can be dict or string
+    personal_info_data = formatted_resume.get('Personal Information', {})
+
+    # If it's a structured dict, extract directly
+    if isinstance(personal_info_data, dict):
+        if 'Name' in personal_info_data and personal_info_data['Name']:
+            personal_info['full_name'] = personal_info_data['Name']
+            print(f"[DEBUG] Extracted name from dict: {personal_info['full_name']}")
+
+        if 'Email' in personal_info_data and personal_info_data['Email']:
+            personal_info['email'] = personal_info_data['Email']
+            print(f"[DEBUG] Extracted email from dict: {personal_info['email']}")
+
+    # If we still don't have name or email, try parsing from resume text
+    if not personal_info.get('email'):
+        email_match = re.search(r'[\w.-]+@[\w.-]+\.\w+', resume_text[:500])
+        if email_match:
+            personal_info['email'] = email_match.group(0)
+            print(f"[DEBUG] Extracted email from text: {personal_info['email']}")
+
+    if not personal_info.get('full_name'):
+        # Extract name from first line of resume
+        lines = [l.strip() for l in resume_text.split('\n') if l.strip()]
+        if lines:
+            potential_name = lines[0]
+            # Remove email and phone if on same line
+            potential_name = re.sub(r'[\w.-]+@[\w.-]+\.\w+', '', potential_name).strip()
+            potential_name = re.sub(r'[\d\s\-\+\(\)]{10,}', '', potential_name).strip()
+            if potential_name and len(potential_name) > 2 and len(potential_name) < 50:
+                personal_info['full_name'] = potential_name
+                print(f"[DEBUG] Extracted name from text: {personal_info['full_name']}")
+
+    return personal_info
+
+def _unavailable(e: CircuitOpenError) -> HTTPException:
+    """503 with Retry-After while the model circuit breaker is open"""
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))})
+
+# Admission control: evaluations (plain and streamed) and JD segmentation each run at most
+# `concurrency` at a time with a bounded queue behind them; beyond it requests fail fast
+gates = {
+    "evaluate": AdmissionGate("evaluate", config.ADMISSION_EVALUATE_CONCURRENCY, config.ADMISSION_EVALUATE_QUEUE,
+                              config.ADMISSION_QUEUE_TIMEOUT),
+    "segment": AdmissionGate("segment", config.ADMISSION_SEGMENT_CONCURRENCY, config.ADMISSION_SEGMENT_QUEUE,
+                             config.ADMISSION_QUEUE_TIMEOUT),
+}
+
+def _over_budget(e: BudgetExceeded) -> HTTPException:
+    """402 when the model call would exceed the JD's budget (retrying does not help)"""
+    print(f"[WARNING] {e}")
+    return HTTPException(status_code=402, detail=str(e))
+
+def _overloaded(e: Overloaded) -> HTTPException:
+    """429 (queue full) or 503 (queued too long) with Retry-After and the current queue depth"""
+    print(f"[DEBUG] Admission: {e} ({e.status})")
+    return HTTPException(status_code=e.status, detail=str(e), headers={
+        "Retry-After": str(e.retry_after), "X-Queue-Depth": str(gates[e.gate].snapshot()["queued_now"])})
+
+async def extract_text(path: str) -> str:
+    """Extract resume text in the extraction process pool (thread pool if it is not running)"""
+    pool = extraction_pool.get_pool()
+    if pool is None:
+        return await run_in_threadpool(load_resume, path)
+    text, ocr = await pool.run(extract_resume_text, path)
+    record_ocr(ocr)
+    return text
+
+def extract_text_sync(path: str) -> str:
+    """Blocking variant of extract_text for code already running in a worker thread"""
+    pool = extraction_pool.get_pool()
+    if pool is None:
+        return load_resume(path)
+    text, ocr = pool.run_sync(extract_resume_text, path)
+    record_ocr(ocr)
+    return text
+
+def segment_and_format(resume_text: str) -> Dict[str, Any]:
+    """Two-step path: segment the resume text, then format it into JSON"""
+    segmented_resume = segment_resume(resume_text)
+    print(f"[DEBUG] Segmented resume")
+    formatted_resume = format_resume_text(segmented_resume)
+    print(f"[DEBUG] Formatted resume into JSON")
+    return formatted_resume
+
+def structure_resume(resume_text: str, jd_text: str, fused: bool):
+    """(formatted resume, evaluation or None): fused mode structures and scores in one model call,
+    otherwise (or when it fails) the resume is segmented and formatted and still needs scoring"""
+    try:
+        fused_result = evaluate_resume_fused(resume_text, jd_text) if fused else None
+    except BudgetExceeded as e:
+        if config.LEDGER_BUDGET_ACTION != "local":
+            raise
+        print(f"[WARNING] {e}; structuring with the local segmenter")
+        fused_result = None
+    if fused_result:
+        print(f"[DEBUG] Fused evaluation succeeded")
+        return fused_result
+    return segment_and_format(resume_text), None
+
+def score_locally(e: BudgetExceeded, request: ResumeEvaluationRequest, formatted_resume: Dict[str, Any]):
+    """LEDGER_BUDGET_ACTION=local: score an over-budget resume with the local scorer (else re-raise)"""
+    if config.LEDGER_BUDGET_ACTION != "local":
+        raise e
+    print(f"[WARNING] {e}; scoring with the local scorer")
+    from .local_scoring import LocalScorer
+    return LocalScorer(request.jd_json).evaluate(formatted_resume)
+
 @app.post("/segment-jd", response_model=JDSegmentationResponse)
 async def segment_jd_endpoint(request: JDSegmentationRequest):
     """Segment raw JD text into structured JSON"""
     try:
-        # Segment the JD
-        segmented = segment_job_description(request.jd_text)
+        slot = await gates["segment"].acquire()
+    except Overloaded as e:
+        raise _overloaded(e)
+    try:
+        jd_id = request.jd_id or hashlib.sha256(request.jd_text.encode("utf-8")).hexdigest()[:12]
+        with deadline(config.REQUEST_DEADLINE), cost_ledger.attribute(jd=jd_id):
+            # Segment the JD (off the event loop: may call the model)
+            segmented = await run_in_threadpool(segment_job_description, request.jd_text)
 
         # Format into JSON structure
         formatted = format_job_description_text(segmented)
 
         return JDSegmentationResponse(segmented_jd=formatted)
 
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=f"JD segmentation timed out: {str(e)}")
+    except CircuitOpenError as e:
+        raise _unavailable(e)
+    except BudgetExceeded as e:
+        raise _over_budget(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"JD segmentation failed: {str(e)}")
+    finally:
+        slot.release()
+
+def _json_hash(value: Any) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _ledger_fields(request: ResumeEvaluationRequest) -> Dict[str, str]:
+    """Cost ledger attribution of an evaluation: resume file name from the URL, JD id or JD hash"""
+    resume = os.path.basename(urlparse(request.resume_url).path) or request.resume_url
+    return {"resume": resume, "jd": request.jd_id or _json_hash(request.jd_json)[:12]}
+
+def _evaluation_modes(request: ResumeEvaluationRequest):
+    """(fused, per_requirement) with the config defaults applied"""
+    fused = config.FUSED_EVALUATION if request.fused is None else request.fused
+    per_requirement = config.REQUIREMENT_SCORING if request.per_requirement is None else request.per_requirement
+    return fused, per_requirement
+
+# Identical concurrent evaluations share one computation: keyed by (resume URL, JD hash, modes)
+# before the download and by (file hash, JD hash, modes) after it, so duplicates cost nothing extra
+flights = SingleFlight()
+idempotency = IdempotencyStore(config.IDEMPOTENCY_TTL, config.IDEMPOTENCY_MAX_KEYS)
 
 @app.post("/evaluate-resume", response_model=ResumeEvaluationResponse)
-async def evaluate_resume_endpoint(request: ResumeEvaluationRequest, background_tasks: BackgroundTasks):
-    """Download resume from Cloudinary, process it, and evaluate against JD"""
-    temp_file = None
+async def evaluate_resume_endpoint(request: ResumeEvaluationRequest, background_tasks: BackgroundTasks,
+                                   idempotency_key: Optional[str] = Header(None)):
+    """Download resume from Cloudinary, process it, and evaluate against JD.
+
+    A retry sent with the same Idempotency-Key header reattaches to the first request's
+    computation, or gets its result while it is kept (IDEMPOTENCY_TTL).
+    """
+    request_key = (request.resume_url, _json_hash(request.jd_json), *_evaluation_modes(request))
+    # only the computation takes an admission slot; requests joining it do not
+    admitted = lambda: gates["evaluate"].run(lambda: _evaluate_resume(request))
+    if config.COALESCE_REQUESTS:
+        run = lambda: flights.run(request_key, admitted)
+    else:
+        run = admitted
     try:
-        # Create temp directory for file download
-        with tempfile.TemporaryDirectory() as temp_dir:
+        if not idempotency_key:
+            return await run()
+        return await idempotency.run(idempotency_key, request_key, run)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Overloaded as e:
+        raise _overloaded(e)
+
+async def _evaluate_resume(request: ResumeEvaluationRequest) -> ResumeEvaluationResponse:
+    try:
+        # Create temp directory for file download; every model call below shares the request deadline
+        with deadline(config.REQUEST_DEADLINE), cost_ledger.attribute(**_ledger_fields(request)), \
+                tempfile.TemporaryDirectory() as temp_dir:
+            # Blocking work never runs on the event loop: network and model calls go to the thread
+            # pool (which inherits the deadline), text extraction to the extraction process pool
             # Download resume file
-            temp_file = download_file_from_url(request.resume_url, temp_dir)
+            temp_file = await run_in_threadpool(download_file_from_url, request.resume_url, temp_dir)
             print(f"[DEBUG] Downloaded resume to: {temp_file}")
 
-            # Load and extract text from resume
-            resume_text = load_resume(temp_file)
-            print(f"[DEBUG] Extracted resume text length: {len(resume_text)} chars")
-            print(f"[DEBUG] Resume text preview: {resume_text[:500]}...")
+            if not config.COALESCE_REQUESTS:
+                return await _evaluate_file(temp_file, request)
+            # the same file behind another URL joins an evaluation already running for it
+            content_key = (await run_in_threadpool(_file_digest, temp_file), _json_hash(request.jd_json),
+                           *_evaluation_modes(request))
+            return await flights.run(content_key, lambda: _evaluate_file(temp_file, request))
 
-            if not resume_text or len(resume_text.strip()) < 50:
-                raise HTTPException(status_code=400, detail="Could not extract text from resume - file may be corrupted or empty")
+    except HTTPException:
+        raise
+    except (DeadlineExceeded, ExtractionTimeout) as e:
+        print(f"[ERROR] Resume evaluation timed out: {str(e)}")
+        raise HTTPException(status_code=504, detail=f"Resume evaluation timed out: {str(e)}")
+    except ResumeTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except CircuitOpenError as e:
+        raise _unavailable(e)
+    except BudgetExceeded as e:
+        raise _over_budget(e)
+    except Exception as e:
+        print(f"[ERROR] Resume evaluation failed: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Resume evaluation failed: {str(e)}")
 
-            # Segment the resume
-            segmented_resume = segment_resume(resume_text)
-            print(f"[DEBUG] Segmented resume")
-
-            # Format into JSON structure
-            formatted_resume = format_resume_text(segmented_resume)
-            print(f"[DEBUG] Formatted resume into JSON")
-
-            # Extract personal information (name, email, phone)
-            personal_info = {}
-            import re
-
-            # Get personal info - can be dict or string
-            personal_info_data = formatted_resume.get('Personal Information', {})
-
-            # If it's a structured dict, extract directly
-            if isinstance(personal_info_data, dict):
-                if 'Name' in personal_info_data and personal_info_data['Name']:
-                    personal_info['full_name'] = personal_info_data['Name']
-                    print(f"[DEBUG] Extracted name from dict: {personal_info['full_name']}")
-
-                if 'Email' in personal_info_data and personal_info_data['Email']:
-                    personal_info['email'] = personal_info_data['Email']
-                    print(f"[DEBUG] Extracted email from dict: {personal_info['email']}")
-
-            # If we still don't have name or email, try parsing from resume text
-            if not personal_info.get('email'):
-                email_match = re.search(r'[\w.-]+@[\w.-]+\.\w+', resume_text[:500])
-                if email_match:
-                    personal_info['email'] = email_match.group(0)
-                    print(f"[DEBUG] Extracted email from text: {personal_info['email']}")
-
-            if not personal_info.get('full_name'):
-                # Extract name from first line of resume
-                lines = [l.strip() for l in resume_text.split('\n') if l.strip()]
-                if lines:
-                    potential_name = lines[0]
-                    # Remove email and phone if on same line
-                    potential_name = re.sub(r'[\w.-]+@[\w.-]+\.\w+', '', potential_name).strip()
-                    potential_name = re.sub(r'[\d\s\-\+\(\)]{10,}', '', potential_name).strip()
-                    if potential_name and len(potential_name) > 2 and len(potential_name) < 50:
-                        personal_info['full_name'] = potential_name
-                        print(f"[DEBUG] Extracted name from text: {personal_info['full_name']}")
-
-            # Convert JD JSON to text for evaluation
-            jd_text = str(request.jd_json)
-            print(f"[DEBUG] JD text length: {len(jd_text)} chars")
-
-            # Evaluate resume against JD
-            evaluation = evaluate_resume(formatted_resume, jd_text)
-            print(f"[DEBUG] Raw evaluation from AI: {evaluation}")
-
-            # Add personal info to evaluation response (even if evaluation is empty)
-            if not evaluation:
-                evaluation = {}
-                print("[WARNING] Evaluation returned empty - AI parsing may have failed")
+async def _evaluate_file(temp_file: str, request: ResumeEvaluationRequest) -> ResumeEvaluationResponse:
+    """Extract, structure and score a downloaded resume (runs inside the request deadline)"""
+    # Load and extract text from resume
+    resume_text = await extract_text(temp_file)
+    print(f"[DEBUG] Extracted resume text length: {len(resume_text)} chars")
+    print(f"[DEBUG] Resume text preview: {resume_text[:500]}...")
 
-            evaluation['personal_info'] = personal_info
-            print(f"[DEBUG] Final evaluation with personal info: {evaluation}")
+    if not resume_text or len(resume_text.strip()) < 50:
+        raise HTTPException(status_code=400, detail="Could not extract text from resume - file may be corrupted or empty")
 
-            # Don't fail if evaluation is empty - at least return personal info
-            # if not evaluation or len(evaluation) <= 1:  # Only has personal_info
-            #     raise HTTPException(status_code=500, detail="Evaluation returned empty result - check OpenAI API configuration")
+    # Convert JD JSON to text for evaluation
+    jd_text = compact_json(request.jd_json)
+    print(f"[DEBUG] JD text length: {len(jd_text)} chars")
 
-            return ResumeEvaluationResponse(evaluation=evaluation)
+    # Fused mode: structure + score in one model call; otherwise segment and format into JSON
+    fused, per_requirement = _evaluation_modes(request)
+    formatted_resume, evaluation = await run_in_threadpool(structure_resume, resume_text, jd_text, fused)
 
-    except HTTPException:
-        raise
+    # Extract personal information (name, email, phone)
+    personal_info = extract_personal_info(formatted_resume, resume_text)
+
+    # Evaluate resume against JD (already done in fused mode)
+    try:
+        if evaluation is None and per_requirement:
+            evaluation = await run_in_threadpool(evaluate_by_requirement, formatted_resume, request.jd_json)
+        elif evaluation is None:
+            evaluation = await run_in_threadpool(evaluate_resume, formatted_resume, jd_text)
+    except BudgetExceeded as e:
+        evaluation = score_locally(e, request, formatted_resume)
+    print(f"[DEBUG] Raw evaluation from AI: {evaluation}")
+
+    # Add personal info to evaluation response (even if evaluation is empty)
+    if not evaluation:
+        evaluation = {}
+        print("[WARNING] Evaluation returned empty - AI parsing may have failed")
+
+    evaluation['personal_info'] = personal_info
+    print(f"[DEBUG] Final evaluation with personal info: {evaluation}")
+
+    # Don't fail if evaluation is empty - at least return personal info
+    # if not evaluation or len(evaluation) <= 1:  # Only has personal_info
+    #     raise HTTPException(status_code=500, detail="Evaluation returned empty result - check OpenAI API configuration")
+
+    return ResumeEvaluationResponse(evaluation=evaluation)
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _evaluation_events(request: ResumeEvaluationRequest):
+    """Run the evaluation chain, yielding SSE progress, each criterion, then the final result.
+
+    The fused / per-requirement modes and the over-budget local fallback are the same as
+    /evaluate-resume; only the two-step model scoring streams its criteria as they complete,
+    the others are sent once scored.
+
+    This is a plain generator: StreamingResponse iterates it in the threadpool, so the
+    blocking download/extraction/model calls stay off the event loop. Each resumption may
+    run in a fresh context, so the request deadline is re-applied around every step.
+    """
+    expires = expires_in(config.REQUEST_DEADLINE)
+    ledger_fields = _ledger_fields(request)
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with deadline(at=expires):
+                temp_file = download_file_from_url(request.resume_url, temp_dir)
+            yield _sse("stage", {"stage": "downloaded"})
+
+            with deadline(at=expires):
+                resume_text = extract_text_sync(temp_file)
+            if not resume_text or len(resume_text.strip()) < 50:
+                raise HTTPException(status_code=400, detail="Could not extract text from resume - file may be corrupted or empty")
+            yield _sse("stage", {"stage": "extracted", "chars": len(resume_text)})
+
+            jd_text = compact_json(request.jd_json)
+            fused, per_requirement = _evaluation_modes(request)
+            with deadline(at=expires), cost_ledger.attribute(**ledger_fields):
+                formatted_resume, evaluation = structure_resume(resume_text, jd_text, fused)
+            personal_info = extract_personal_info(formatted_resume, resume_text)
+            yield _sse("stage", {"stage": "segmented", "personal_info": personal_info})
+
+            streamed = {}
+            try:
+                if evaluation is None and per_requirement:
+                    with deadline(at=expires), cost_ledger.attribute(**ledger_fields):
+                        evaluation = evaluate_by_requirement(formatted_resume, request.jd_json)
+                elif evaluation is None:
+                    criteria = evaluate_resume_stream(formatted_resume, jd_text)
+                    while True:
+                        with deadline(at=expires), cost_ledger.attribute(**ledger_fields):
+                            criterion = next(criteria, None)
+                        if criterion is None:
+                            break
+                        streamed[criterion["title"]] = {"score": criterion["score"], "description": criterion["description"]}
+                        yield _sse("criterion", criterion)
+                    evaluation = streamed
+            except BudgetExceeded as e:
+                evaluation = score_locally(e, request, formatted_resume)
+            evaluation = dict(evaluation or {})
+            for title, item in evaluation.items():
+                if title not in streamed:
+                    yield _sse("criterion", {"title": title, **item})
+
+            if not evaluation:
+                print("[WARNING] Streamed evaluation returned empty - AI parsing may have failed")
+            evaluation['personal_info'] = personal_info
+            yield _sse("result", {"evaluation": evaluation})
+
+    except HTTPException as e:
+        yield _sse("error", {"status": e.status_code, "detail": e.detail})
+    except (DeadlineExceeded, ExtractionTimeout) as e:
+        yield _sse("error", {"status": 504, "detail": f"Resume evaluation timed out: {str(e)}"})
+    except ResumeTooLarge as e:
+        yield _sse("error", {"status": 413, "detail": str(e)})
+    except CircuitOpenError as e:
+        yield _sse("error", {"status": 503, "detail": str(e), "retry_after": round(e.retry_after)})
+    except BudgetExceeded as e:
+        yield _sse("error", {"status": 402, "detail": str(e)})
     except Exception as e:
-        print(f"[ERROR] Resume evaluation failed: {str(e)}")
+        print(f"[ERROR] Streaming resume evaluation failed: {str(e)}")
         import traceback
         traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Resume evaluation failed: {str(e)}")
+        yield _sse("error", {"status": 500, "detail": f"Resume evaluation failed: {str(e)}"})
+
+@app.post("/evaluate-resume/stream")
+async def evaluate_resume_stream_endpoint(request: ResumeEvaluationRequest):
+    """Server-Sent-Events variant of /evaluate-resume.
+
+    Events: `stage` (downloaded, extracted, segmented), one `criterion` per score as soon as
+    the model finishes it, then `result` with the same payload as /evaluate-resume, or `error`.
+    Admission is decided before the stream starts, so an overloaded server answers 429/503.
+    """
+    try:
+        slot = await gates["evaluate"].acquire()
+    except Overloaded as e:
+        raise _overloaded(e)
+
+    def events():
+        try:
+            yield from _evaluation_events(request)
+        finally:
+            slot.release()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(slot.release),  # in case the stream never starts
+    )
+
+@app.get("/pool")
+async def pool_status():
+    """Routing and health counters for each model endpoint / deployment in the pool"""
+    from .openai_client import get_pool, get_breaker
+    return {"members": get_pool().stats(), "circuit": get_breaker().stats()}
+
+@app.get("/admission")
+async def admission_status():
+    """Per-gate concurrency, queue depth and admission counters"""
+    return {name: gate.snapshot() for name, gate in gates.items()}
+
+@app.get("/costs")
+async def cost_report(by: str = "jd", days: Optional[int] = None, jd: Optional[str] = None, run: Optional[str] = None):
+    """Model calls, tokens and cost from the ledger grouped by jd, day, stage, model, resume or run"""
+    ledger = cost_ledger.get_ledger()
+    if ledger is None:
+        raise HTTPException(status_code=404, detail="The cost ledger is disabled (LEDGER=false)")
+    if by not in cost_ledger.GROUPS:
+        raise HTTPException(status_code=400, detail=f"by must be one of: {', '.join(cost_ledger.GROUPS)}")
+    since = time.strftime("%Y-%m-%d", time.localtime(time.time() - (days - 1) * 86400)) if days else None
+    rows = await run_in_threadpool(ledger.report, by, since, jd=jd, run=run)
+    return {"by": by, "since": since, "rows": rows,
+            "total": {"calls": sum(r["calls"] for r in rows), "cost": round(sum(r["cost"] for r in rows), 6)},
+            "budgets": {"run": config.LEDGER_RUN_BUDGET, "jd": config.LEDGER_JD_BUDGET,
+                        "action": config.LEDGER_BUDGET_ACTION}}
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 503 until the startup warm-up has finished"""
+    ready = getattr(app.state, "ready", None)
+    if ready is None or not ready.is_set():
+        return JSONResponse(status_code=503, content={"status": "warming up"})
+    pool = extraction_pool.get_pool()
+    return {"status": "ready", "extraction_pool": pool.stats() if pool else None, "ocr": ocr_stats(),
+            "coalescing": {**flights.stats, "in_flight": flights.in_flight(), "idempotency": idempotency.stats}}
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="AI Recruit API Server")
     parser.add_argument("--host", default="0.0.0.0", help="Host to bind to")
     parser.add_argument("--port", type=int, default=8000, help="Port to bind to")
     args = parser.parse_args()
 
+    import uvicorn
+    from .logging_util import setup_logging
+    setup_logging()
+
     print(f"Starting server on {args.host}:{args.port}")
     uvicorn.run(app, host=args.host, port=args.port)
\ No newline at end of file
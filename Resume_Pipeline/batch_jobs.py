@@ -0,0 +1,322 @@
+#batch_jobs.py
+# Offline batch mode for large, latency-insensitive runs (e.g. nightly re-scoring of the whole
+# candidate pool). ``export`` writes every pending model request - JD and resume segmentation
+# that the local segmenters are not confident about, and (JD, resume) scoring pairs without a
+# stored evaluation - as JSONL batch-input files in the OpenAI Batch API format. ``ingest`` reads
+# the batch output files, runs the same post-processing as the synchronous path (merge_segmented /
+# format_resume_text / format_job_description_text / parse_evaluation) and stores the results in
+# the result sink. Requests that failed are not stored, so the next export picks them up again.
+# Segmentation and scoring depend on each other: export -> run -> ingest once for segmentation,
+# then again for the scoring pairs of the newly formatted resumes.
+# The usage reported in the output bodies is recorded in the cost ledger at the batch price.
+# ``stub_server --batch INPUT OUTPUT`` answers a batch-input file offline for tests and dry runs.
+
+import os
+import json
+import time
+import logging
+import argparse
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import config
+from . import cost_ledger
+from . import jd_format
+from . import jd_segment
+from . import resume_format
+from . import resume_segment
+from .jd_local_segment import segment_job_description_local
+from .resume_local_segment import segment_resume_local
+from .result_sink import get_sink
+from .scoring import parse_evaluation
+from . import scoring_matrix
+
+logger = logging.getLogger(__name__)
+
+JD_SEGMENT = "jd_segment"
+RESUME_SEGMENT = "resume_segment"
+SCORE = "score"
+
+
+# ----------------------------- REQUEST IDS -----------------------------
+# custom_id: "jd_segment|<jd>|<chunk>|<chunks>", "resume_segment|<resume>|<chunk>|<chunks>" or
+# "score|<jd>|<resume>"; names are file stems, which never contain "|"
+def request_id(kind: str, *parts) -> str:
+    return "|".join([kind, *map(str, parts)])
+
+
+def parse_request_id(custom_id: str) -> Tuple[str, List[str]]:
+    kind, *parts = custom_id.split("|")
+    return kind, parts
+
+
+def batch_line(custom_id: str, messages: list) -> dict:
+    """One request of a batch-input file."""
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": config.BATCH_URL,
+        "body": {"model": config.BATCH_DEPLOYMENT or config.DEPLOYMENT_NAME, "messages": messages},
+    }
+
+
+# ----------------------------- EXPORT -----------------------------
+def pending_jd_requests(sink=None, counts: Dict[str, int] = None) -> Iterator[dict]:
+    """Segmentation requests for JD texts without stored JSON; confident local segmentations are stored instead."""
+    sink = sink or get_sink()
+    counts = counts if counts is not None else {}
+    if not os.path.isdir(config.JD_INPUT_FOLDER):
+        return
+    for fname in sorted(os.listdir(config.JD_INPUT_FOLDER)):
+        name = os.path.splitext(fname)[0]
+        if not fname.endswith(".txt") or sink.exists("jd_json", name):
+            continue
+        with open(os.path.join(config.JD_INPUT_FOLDER, fname), "r", encoding="utf-8") as f:
+            text = f.read()
+        local_text, confidence = segment_job_description_local(text)
+        if jd_segment.LOCAL_SEGMENTATION and confidence >= jd_segment.LOCAL_CONFIDENCE:
+            _store_jd(name, local_text, sink)
+            counts["local"] = counts.get("local", 0) + 1
+            continue
+        yield batch_line(request_id(JD_SEGMENT, name, 1, 1), jd_segment.segmentation_messages(text))
+
+
+def pending_resume_requests(sink=None, counts: Dict[str, int] = None) -> Iterator[dict]:
+    """Segmentation requests (one per chunk) for parsed resumes without stored JSON; confident local
+    segmentations are stored instead."""
+    sink = sink or get_sink()
+    counts = counts if counts is not None else {}
+    for name in sink.names("resume_parsed"):
+        if sink.exists("resume_json", name):
+            continue
+        text = sink.get("resume_parsed", name) or ""
+        if not text.strip():
+            continue  # nothing was extracted (e.g. a scan without OCR): no request to make
+        local_text, confidence = segment_resume_local(text)
+        if resume_segment.LOCAL_SEGMENTATION and confidence >= resume_segment.LOCAL_CONFIDENCE:
+            _store_resume(name, local_text, sink)
+            counts["local"] = counts.get("local", 0) + 1
+            continue
+        chunks = resume_segment.segmentation_messages(text)
+        for i, messages in enumerate(chunks, 1):
+            yield batch_line(request_id(RESUME_SEGMENT, name, i, len(chunks)), messages)
+
+
+def pending_score_requests(jd_glob: str = "*.json", sink=None) -> Iterator[dict]:
+    """Evaluation requests for (JD, resume) pairs without a stored evaluation, JD-major with the JD first
+    in the prompt (the same prompts as the scoring matrix, so the provider's prompt cache applies)."""
+    sink = sink or get_sink()
+    jds = scoring_matrix.select_jds(jd_glob, sink)
+    prompts = scoring_matrix.PromptCache(sink)
+    for jd, resume in scoring_matrix.plan_pairs(jds, scoring_matrix.select_resumes(sink), sink):
+        yield batch_line(request_id(SCORE, jd, resume), prompts.messages(jd, resume))
+
+
+def write_batches(lines: Iterable[dict], folder: str, prefix: str = None) -> List[str]:
+    """Write request lines into ``folder`` as <prefix>_NNN.jsonl files (prefix: batch_input_<time>) of
+    at most BATCH_MAX_REQUESTS requests and BATCH_MAX_MB each (the provider's per-file limits)."""
+    os.makedirs(folder, exist_ok=True)
+    prefix = prefix or time.strftime("batch_input_%Y%m%d-%H%M%S")
+    max_requests, max_bytes = config.BATCH_MAX_REQUESTS, config.BATCH_MAX_MB * 1024 * 1024
+    paths, f, count, size = [], None, 0, 0
+    try:
+        for line in lines:
+            data = (json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+            if f is None or count >= max_requests or (count and size + len(data) > max_bytes):
+                if f is not None:
+                    f.close()
+                paths.append(os.path.join(folder, f"{prefix}_{len(paths) + 1:03d}.jsonl"))
+                f, count, size = open(paths[-1], "wb"), 0, 0
+            f.write(data)
+            count += 1
+            size += len(data)
+    finally:
+        if f is not None:
+            f.close()
+    return paths
+
+
+def export(folder: str = None, stages: Iterable[str] = ("segment", "score"), jd_glob: str = "*.json",
+           sink=None) -> Dict[str, object]:
+    """Write all pending requests of ``stages`` to batch-input files. Returns the files and counts."""
+    sink = sink or get_sink()
+    folder = folder or config.BATCH_FOLDER
+    counts = {"local": 0, JD_SEGMENT: 0, RESUME_SEGMENT: 0, SCORE: 0}
+
+    def requests():
+        sources = []
+        if "segment" in stages:
+            sources += [pending_jd_requests(sink, counts), pending_resume_requests(sink, counts)]
+        if "score" in stages:
+            sources.append(pending_score_requests(jd_glob, sink))
+        for source in sources:
+            for line in source:
+                counts[parse_request_id(line["custom_id"])[0]] += 1
+                yield line
+
+    files = write_batches(requests(), folder)
+    sink.flush()
+    logger.info("Batch export: %s files, %s", len(files), counts)
+    return {"files": files, "counts": counts}
+
+
+# ----------------------------- INGEST -----------------------------
+def _store_jd(name: str, segmented: str, sink):
+    sink.put("jd_segmented", name, segmented)
+    sink.put("jd_json", name, jd_format.format_job_description_text(segmented))
+
+
+def _store_resume(name: str, segmented: str, sink):
+    sink.put("resume_segmented", name, segmented)
+    sink.put("resume_json", name, resume_format.format_resume_text(segmented))
+
+
+def read_results(paths: Iterable[str]) -> Iterator[Tuple[str, Optional[str], Optional[str], dict]]:
+    """(custom_id, reply text, error, response body) for every line of the batch output / error files."""
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response, error = record.get("response") or {}, record.get("error")
+                status = response.get("status_code")
+                if error or status != 200:
+                    message = (error or {}).get("message") if isinstance(error, dict) else error
+                    yield record["custom_id"], None, message or f"status {status}", {}
+                    continue
+                body = response.get("body") or {}
+                try:
+                    yield record["custom_id"], body["choices"][0]["message"]["content"], None, body
+                except (KeyError, IndexError, TypeError):
+                    yield record["custom_id"], None, "malformed response body", body
+
+
+def _record_usage(kind: str, parts: List[str], body: dict):
+    """Ledger entry for one answered batch request, attributed from its custom_id."""
+    if not body.get("usage"):
+        return
+    if kind == SCORE:
+        fields = {"stage": "evaluate", "jd": parts[0], "resume": parts[1]}
+    else:
+        fields = {"stage": kind, ("jd" if kind == JD_SEGMENT else "resume"): parts[0] if parts else None}
+    deployment = config.BATCH_DEPLOYMENT or config.DEPLOYMENT_NAME
+    cost_ledger.record(body.get("model") or deployment, body["usage"], batch=True, deployment=deployment, **fields)
+
+
+def ingest(paths: Iterable[str], sink=None) -> Dict[str, int]:
+    """Store the results of batch output files. Returns stored / failed counts per request kind."""
+    sink = sink or get_sink()
+    counts = {"stored": 0, "failed": 0, "incomplete": 0, "unknown": 0}
+    chunks: Dict[Tuple[str, str], Dict[int, str]] = {}
+    totals: Dict[Tuple[str, str], int] = {}
+    scored_jds = set()
+    for custom_id, content, error, body in read_results(paths):
+        kind, parts = parse_request_id(custom_id)
+        _record_usage(kind, parts, body)
+        if error is not None or not content:
+            counts["failed"] += 1
+            logger.warning("Batch request %s failed: %s", custom_id, error or "empty reply")
+            continue
+        if kind == SCORE:
+            jd, resume = parts
+            evaluation = parse_evaluation(content)
+            if not evaluation:
+                counts["failed"] += 1
+                logger.warning("Batch request %s: evaluation could not be parsed", custom_id)
+                continue
+            scoring_matrix.save_pair(jd, resume, evaluation, sink)
+            scored_jds.add(jd)
+            counts["stored"] += 1
+        elif kind in (JD_SEGMENT, RESUME_SEGMENT):
+            name, index, total = parts[0], int(parts[1]), int(parts[2])
+            chunks.setdefault((kind, name), {})[index] = content
+            totals[(kind, name)] = total
+        else:
+            counts["unknown"] += 1
+            logger.warning("Unknown batch request id: %s", custom_id)
+
+    for (kind, name), replies in chunks.items():
+        if len(replies) != totals[(kind, name)]:
+            counts["incomplete"] += 1  # some chunk failed: the resume is exported again next time
+            logger.warning("%s %s: %s of %s chunks returned", kind, name, len(replies), totals[(kind, name)])
+            continue
+        if kind == JD_SEGMENT:
+            _store_jd(name, replies[1], sink)
+        else:
+            _store_resume(name, resume_segment.merge_segmented([replies[i] for i in sorted(replies)]), sink)
+        counts["stored"] += 1
+
+    if scored_jds:
+        scoring_matrix.write_summary(scoring_matrix.select_jds(sink=sink), scoring_matrix.select_resumes(sink), sink)
+    sink.flush(fsync=True)
+    logger.info("Batch ingest: %s", counts)
+    return counts
+
+
+# ----------------------------- PROVIDER -----------------------------
+def submit(path: str) -> str:
+    """Upload a batch-input file and start a batch job on the configured endpoint. Returns the batch id."""
+    from .openai_client import get_client
+    client = get_client()
+    with open(path, "rb") as f:
+        uploaded = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(input_file_id=uploaded.id, endpoint=config.BATCH_URL, completion_window="24h")
+    logger.info("Submitted %s as batch %s", path, batch.id)
+    return batch.id
+
+
+def fetch(batch_id: str, folder: str = None) -> Tuple[str, List[str]]:
+    """Status of a batch job; once it has finished, its output / error files are saved into ``folder``."""
+    from .openai_client import get_client
+    client = get_client()
+    batch = client.batches.retrieve(batch_id)
+    folder = folder or config.BATCH_FOLDER
+    saved = []
+    for kind, file_id in (("output", batch.output_file_id), ("errors", batch.error_file_id)):
+        if file_id:
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"{batch_id}_{kind}.jsonl")
+            with open(path, "wb") as f:
+                f.write(client.files.content(file_id).read())
+            saved.append(path)
+    return batch.status, saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export pending model requests as batch files / ingest batch results")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="Write pending requests as batch-input JSONL files")
+    p.add_argument("--folder", default=config.BATCH_FOLDER, help="Output folder")
+    p.add_argument("--stages", nargs="+", default=["segment", "score"], choices=["segment", "score"])
+    p.add_argument("--jd-glob", default="*.json", help="JD JSON file name pattern for scoring pairs")
+    p = sub.add_parser("ingest", help="Store the results of batch output files")
+    p.add_argument("files", nargs="+")
+    p = sub.add_parser("submit", help="Upload batch-input files and start batch jobs")
+    p.add_argument("files", nargs="+")
+    p = sub.add_parser("fetch", help="Show a batch job's status and download its results when done")
+    p.add_argument("batch_id")
+    p.add_argument("--folder", default=config.BATCH_FOLDER)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        result = export(args.folder, args.stages, args.jd_glob)
+        print(f"{sum(v for k, v in result['counts'].items() if k != 'local')} requests in {len(result['files'])} files "
+              f"{result['counts']}")
+        for path in result["files"]:
+            print(path)
+    elif args.command == "ingest":
+        print(ingest(args.files))
+    elif args.command == "submit":
+        for path in args.files:
+            print(f"{path}: {submit(path)}")
+    else:
+        status, saved = fetch(args.batch_id, args.folder)
+        print(f"{args.batch_id}: {status}")
+        for path in saved:
+            print(path)
+
+
+if __name__ == "__main__":
+    from .logging_util import setup_logging
+    setup_logging()
+    main()
@@ -0,0 +1,94 @@
+#circuit_breaker.py
+# Process-wide circuit breaker for model calls. After enough consecutive outage-type failures
+# (timeouts, connection errors, 5xx) every thread fails fast with CircuitOpenError until the
+# reset timeout passes; then a limited number of half-open probe calls decide whether to close.
+
+import time
+import threading
+import logging
+from typing import Any, Dict
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the model while the circuit is open."""
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(f"model endpoint unavailable (circuit open, retry in {retry_after:.0f}s)")
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = None, reset_timeout: float = None, half_open_probes: int = None):
+        self.failure_threshold = failure_threshold or config.BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = config.BREAKER_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.half_open_probes = half_open_probes or config.BREAKER_HALF_OPEN_PROBES
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.times_opened = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Admit a call or raise CircuitOpenError; in half-open state only a few probes get through."""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            now = time.monotonic()
+            if self.state == OPEN:
+                wait = self.opened_at + self.reset_timeout - now
+                if wait > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(wait)
+                self.state = HALF_OPEN
+                self.probes_in_flight = 0
+                logger.info("Circuit half-open: probing the model endpoint")
+            if self.probes_in_flight >= self.half_open_probes:
+                self.rejected += 1
+                raise CircuitOpenError(1.0)
+            self.probes_in_flight += 1
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("Circuit closed: model endpoint recovered")
+            self.state = CLOSED
+            self.consecutive_failures = 0
+            self.probes_in_flight = 0
+
+    def record_failure(self):
+        """Count an outage-type failure; opens the circuit at the threshold or on a failed probe."""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.times_opened += 1
+                    logger.error("Circuit open after %s consecutive failures; failing fast for %.0fs",
+                                 self.consecutive_failures, self.reset_timeout)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.probes_in_flight = 0
+
+    def record_neutral(self):
+        """Release a half-open probe whose outcome says nothing about endpoint health (e.g. a 400)."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.probes_in_flight = max(0, self.probes_in_flight - 1)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+            }
@@ -0,0 +1,264 @@
+#compaction.py
+# Prompt compaction before model calls: local token counting, whitespace / duplicate /
+# boilerplate removal, compact JSON, and chunking to keep every prompt within a token budget.
+
+import os
+import re
+import json
+import math
+import argparse
+from typing import Any, Dict, List
+
+from . import config
+
+# Optional exact tokenizer, loaded on first use (tiktoken may fetch its encoding file);
+# the heuristic in count_tokens is used when it is unavailable
+_ENCODING = None
+_ENCODING_LOADED = False
+
+TOKEN_BUDGET = config.PROMPT_TOKEN_BUDGET
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]|\s{2,}|\n")  # words, punctuation, newlines / indentation runs
+_PRIVATE_USE_RE = re.compile("[\ue000-\uf8ff]")  # icon-font glyphs (phone / mail / pin icons)
+_LONE_MARKER_RE = re.compile(r"^[-•▪*●◦|·]+$")
+_BOILERPLATE_RE = re.compile(
+    r"(?i)^(page\s*\d+(\s*(of|/)\s*\d+)?|\d+\s*/\s*\d+|-\s*\d+\s*-|curriculum vitae|resume|cv|"
+    r"references (are )?available (up)?on request\.?)$"
+)
+
+# Order in which resume sections are trimmed when a JSON prompt is over budget
+TRIM_ORDER = ["Other Information", "Certifications", "Projects", "Education", "Skills", "Experience"]
+
+
+class PromptTooLarge(ValueError):
+    """The fixed part of a prompt (system prompt, template) already uses up the token budget."""
+
+
+# ----------------------------- TOKEN COUNTING -----------------------------
+def _get_encoding():
+    global _ENCODING, _ENCODING_LOADED
+    if not _ENCODING_LOADED:
+        _ENCODING_LOADED = True
+        try:
+            import tiktoken
+            _ENCODING = tiktoken.get_encoding("o200k_base")
+        except Exception:
+            _ENCODING = None
+    return _ENCODING
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens locally (tiktoken when available, otherwise ~4 characters per word piece,
+    one per punctuation mark and one per newline / indentation run)."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return sum(1 if t.isspace() else max(1, math.ceil(len(t) / 4)) for t in _TOKEN_RE.findall(text))
+
+
+def truncate_to_budget(text: str, budget: int) -> str:
+    """Longest prefix of ``text`` that fits in ``budget`` tokens."""
+    if count_tokens(text) <= budget:
+        return text
+    lo, hi = 0, len(text)  # count_tokens(text[:lo]) <= budget < count_tokens(text[:hi])
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if count_tokens(text[:mid]) <= budget:
+            lo = mid
+        else:
+            hi = mid
+    return text[:lo]
+
+
+def split_to_budget(text: str, budget: int) -> List[str]:
+    """Hard-split text (e.g. one over-long line) into pieces of at most ``budget`` tokens,
+    preferring to cut at a space."""
+    pieces = []
+    while text:
+        piece = truncate_to_budget(text, budget) or text[:1]
+        if len(piece) < len(text):
+            space = piece.rfind(" ")
+            if space > len(piece) // 2:
+                piece = piece[:space]
+        pieces.append(piece.strip())
+        text = text[len(piece):]
+    return [p for p in pieces if p]
+
+
+# ----------------------------- TEXT COMPACTION -----------------------------
+PAGE_BREAK = "\f"  # the loader separates PDF pages with form feeds (as pdftotext does)
+PAGE_EDGE_LINES = 3  # lines at the top / bottom of a page that may be a running header or footer
+
+
+def _compact_line(raw: str) -> str:
+    line = _PRIVATE_USE_RE.sub("", raw)
+    line = re.sub(r"[ \t\u00a0]+", " ", line).strip()
+    if _LONE_MARKER_RE.match(line) or _BOILERPLATE_RE.match(line):
+        return None  # dropped, unlike "" (a paragraph break)
+    return line
+
+
+def _page_furniture(pages: List[List[str]]) -> set:
+    """Lines found at the top or bottom of more than one page (running headers and footers)."""
+    counts: Dict[str, int] = {}
+    for lines in pages:
+        content = [line.lower() for line in lines if line]
+        for key in set(content[:PAGE_EDGE_LINES] + content[-PAGE_EDGE_LINES:]):
+            counts[key] = counts.get(key, 0) + 1
+    return {key for key, n in counts.items() if n > 1}
+
+
+def compact_text(text: str) -> str:
+    """Collapse whitespace and drop boilerplate, icon glyphs, lone bullets and duplicate lines.
+
+    Only a line repeating the previous one, or a header / footer repeated at the edges of
+    several pages, counts as a duplicate: the same job title or bullet under two entries is
+    resume content and is kept.
+    """
+    pages = []
+    for page in (text or "").replace("\r\n", "\n").split(PAGE_BREAK):
+        lines = [_compact_line(raw) for raw in page.split("\n")]
+        pages.append([line for line in lines if line is not None])
+    furniture = _page_furniture(pages)
+
+    out: List[str] = []
+    seen = set()
+    for lines in pages:
+        content = [i for i, line in enumerate(lines) if line]
+        edges = set(content[:PAGE_EDGE_LINES] + content[-PAGE_EDGE_LINES:])
+        for i, line in enumerate(lines):
+            if not line:
+                if out and out[-1] != "":
+                    out.append("")
+                continue
+            key = line.lower()
+            if out and out[-1].lower() == key:
+                continue
+            if i in edges and key in furniture and key in seen:
+                continue
+            seen.add(key)
+            out.append(line)
+        if out and out[-1] != "":
+            out.append("")  # a page break is a paragraph break
+    return "\n".join(out).strip()
+
+
+def compact_json(data: Any) -> str:
+    """Serialize without indentation or spaces after separators."""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+
+def _prune_empty(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {k: _prune_empty(v) for k, v in data.items() if v not in ("", None, [], {})}
+    if isinstance(data, list):
+        return [_prune_empty(v) for v in data if v not in ("", None, [], {})]
+    return data
+
+
+def fit_json_to_budget(data: Dict[str, Any], budget: int = None) -> Dict[str, Any]:
+    """Return a copy of a formatted resume whose compact JSON fits in ``budget`` tokens.
+
+    Empty fields are dropped first; then items are removed from the end of the
+    lowest-priority sections (TRIM_ORDER) until the prompt fits.
+    """
+    budget = budget or TOKEN_BUDGET
+    data = _prune_empty(data)
+    if count_tokens(compact_json(data)) <= budget:
+        return data
+    data = {k: (list(v) if isinstance(v, list) else v) for k, v in data.items()}
+    for section in TRIM_ORDER:
+        items = data.get(section)
+        while isinstance(items, list) and items:
+            items.pop()
+            if count_tokens(compact_json(data)) <= budget:
+                return data
+    return data
+
+
+def to_prompt_json(value: Any, budget: int = None) -> str:
+    """Compact a resume / JD given as a dict, a JSON string, or plain text for a prompt.
+
+    With a ``budget`` the result never exceeds it: JSON sections are trimmed first, then
+    whatever still does not fit is cut off at the end.
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            text = compact_text(value)
+            return truncate_to_budget(text, budget) if budget else text
+    if isinstance(value, dict) and budget:
+        value = fit_json_to_budget(value, budget)
+    text = compact_json(value)
+    return truncate_to_budget(text, budget) if budget else text
+
+
+# ----------------------------- CHUNKING -----------------------------
+def chunk_text(text: str, budget: int = None) -> List[str]:
+    """Split text into chunks of at most ``budget`` tokens on paragraph, then line, boundaries.
+
+    A single line longer than the budget is hard-split (see ``split_to_budget``).
+    """
+    budget = budget or TOKEN_BUDGET
+    if count_tokens(text) <= budget:
+        return [text]
+
+    units: List[str] = []
+    for para in re.split(r"\n\s*\n", text):
+        if count_tokens(para) <= budget:
+            units.append(para)
+            continue
+        for line in para.split("\n"):
+            if count_tokens(line) > budget:
+                units.extend(split_to_budget(line, budget))
+            elif line.strip():
+                units.append(line)
+
+    sep = count_tokens("\n\n")
+    chunks, current, size = [], [], 0
+    for unit in units:
+        n = count_tokens(unit)
+        if current and size + sep + n > budget:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        size += n + (sep if current else 0)
+        current.append(unit)
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+# ----------------------------- REPORT -----------------------------
+def report():
+    """Print input-token savings on the sample set (segmentation and evaluation prompts)."""
+    print(f"Tokenizer: {'tiktoken o200k_base' if _get_encoding() is not None else 'heuristic'}; budget={TOKEN_BUDGET}")
+    totals = [0, 0, 0, 0]
+    for fname in sorted(f for f in os.listdir(config.RESUME_PARSED_FOLDER) if f.endswith(".txt")):
+        with open(os.path.join(config.RESUME_PARSED_FOLDER, fname), "r", encoding="utf-8") as f:
+            raw = f.read()
+        seg_before, seg_after = count_tokens(raw), count_tokens(compact_text(raw))
+
+        json_path = os.path.join(config.RESUME_SEGMENTED_JSON_FOLDER, fname.replace(".txt", ".json"))
+        eval_before = eval_after = 0
+        if os.path.exists(json_path):
+            with open(json_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            eval_before = count_tokens(json.dumps(data, indent=4))
+            eval_after = count_tokens(to_prompt_json(data, TOKEN_BUDGET))
+
+        for i, v in enumerate((seg_before, seg_after, eval_before, eval_after)):
+            totals[i] += v
+        print(f"{fname:<16} segment {seg_before:>6} -> {seg_after:>6}   evaluate {eval_before:>6} -> {eval_after:>6}")
+
+    def pct(before, after):
+        return (1 - after / before) * 100 if before else 0.0
+    print(f"{'TOTAL':<16} segment {totals[0]:>6} -> {totals[1]:>6} (-{pct(totals[0], totals[1]):.0f}%)"
+          f"   evaluate {totals[2]:>6} -> {totals[3]:>6} (-{pct(totals[2], totals[3]):.0f}%)")
+
+
+if __name__ == "__main__":
+    argparse.ArgumentParser(description="Report prompt-token savings from compaction on the sample set").parse_args()
+    report()
@@ -31,6 +31,145 @@ RESUME_PARSED_OUTPUT = os.environ.get("RESUME_PARSED_OUTPUT", RESUME_PARSED_FOLD
 
 # Scoring output
 SCORING_OUTPUT_FOLDER = os.environ.get("SCORING_OUTPUT_FOLDER", os.path.join(BASE, "evaluated_resumes"))
+# Dry-run (local scorer) evaluations, kept apart from model evaluations
+LOCAL_SCORING_OUTPUT_FOLDER = os.environ.get(
+    "LOCAL_SCORING_OUTPUT_FOLDER", os.path.join(BASE, "evaluated_resumes_local")
+)
+
+# Result storage for pipeline stages: "files" (one file per item in the folders above) or
+# "jsonl" (one append-only RESULT_JSONL_PATH; records are written in batches of
+# RESULT_FLUSH_RECORDS and fsynced at most every RESULT_FSYNC_INTERVAL seconds)
+RESULT_SINK = os.environ.get("RESULT_SINK", "files").lower()
+RESULT_JSONL_PATH = os.environ.get("RESULT_JSONL_PATH", os.path.join(BASE, "results.jsonl"))
+RESULT_FLUSH_RECORDS = int(os.environ.get("RESULT_FLUSH_RECORDS", "200"))
+RESULT_FSYNC_INTERVAL = float(os.environ.get("RESULT_FSYNC_INTERVAL", "5"))
+
+# Resume segmentation: try the local heading-based segmenter first and only call the
+# model when its confidence is below the threshold
+RESUME_LOCAL_SEGMENTATION = os.environ.get("RESUME_LOCAL_SEGMENTATION", "True").lower() in ("1", "true", "yes")
+RESUME_LOCAL_CONFIDENCE = float(os.environ.get("RESUME_LOCAL_CONFIDENCE", "0.75"))
+
+# JD segmentation: same local-first strategy for job descriptions
+JD_LOCAL_SEGMENTATION = os.environ.get("JD_LOCAL_SEGMENTATION", "True").lower() in ("1", "true", "yes")
+JD_LOCAL_CONFIDENCE = float(os.environ.get("JD_LOCAL_CONFIDENCE", "0.6"))
+
+# Prompt compaction: upper bound on input tokens per model call (longer resumes are chunked / trimmed)
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", "6000"))
+
+# Evaluation: fused mode structures the resume and scores it in one model call
+# (falls back to segment -> format -> evaluate when the JSON reply fails validation)
+FUSED_EVALUATION = os.environ.get("FUSED_EVALUATION", "False").lower() in ("1", "true", "yes")
+# Per-requirement mode rates each JD requirement separately (REQUIREMENT_BATCH_SIZE requirements per
+# call), caches the ratings in REQUIREMENT_CACHE_PATH and aggregates the three criteria locally
+REQUIREMENT_SCORING = os.environ.get("REQUIREMENT_SCORING", "False").lower() in ("1", "true", "yes")
+REQUIREMENT_CACHE_PATH = os.environ.get("REQUIREMENT_CACHE_PATH", os.path.join(BASE, "requirement_cache.sqlite3"))
+REQUIREMENT_BATCH_SIZE = int(os.environ.get("REQUIREMENT_BATCH_SIZE", "20"))
+
+# Endpoint pool: JSON list (or path to a JSON file) of {"endpoint", "deployment", "api_key" /
+# "api_key_env", "weight"} entries to spread model calls over several deployments. Empty = the
+# single OPENAI_ENDPOINT / DEPLOYMENT_NAME above. Throttled or failing members cool down.
+OPENAI_POOL = os.environ.get("OPENAI_POOL", "")
+POOL_COOLDOWN = float(os.environ.get("POOL_COOLDOWN", "30"))
+POOL_FAILURE_THRESHOLD = int(os.environ.get("POOL_FAILURE_THRESHOLD", "3"))
+
+# Model call time limits: per attempt, total time spent retrying one call, and the
+# end-to-end deadline of one API request (every model call inside it is bounded by the time left)
+MODEL_CALL_TIMEOUT = float(os.environ.get("MODEL_CALL_TIMEOUT", "60"))
+MODEL_RETRY_BUDGET = float(os.environ.get("MODEL_RETRY_BUDGET", "90"))
+REQUEST_DEADLINE = float(os.environ.get("REQUEST_DEADLINE", "120"))
+
+# Request coalescing: identical concurrent /evaluate-resume requests (same resume URL or file content,
+# JD and mode) share one computation. Results of requests sent with an Idempotency-Key header are
+# kept IDEMPOTENCY_TTL seconds (at most IDEMPOTENCY_MAX_KEYS keys) so retries reattach to them
+COALESCE_REQUESTS = os.environ.get("COALESCE_REQUESTS", "True").lower() in ("1", "true", "yes")
+IDEMPOTENCY_TTL = float(os.environ.get("IDEMPOTENCY_TTL", "600"))
+IDEMPOTENCY_MAX_KEYS = int(os.environ.get("IDEMPOTENCY_MAX_KEYS", "10000"))
+
+# Admission control: at most *_CONCURRENCY evaluations (plain + streamed) / JD segmentations run at once
+# (0 = unlimited) and at most *_QUEUE more wait, each up to ADMISSION_QUEUE_TIMEOUT seconds. Beyond the
+# queue the API answers 429, after the wait 503, both with Retry-After
+ADMISSION_EVALUATE_CONCURRENCY = int(os.environ.get("ADMISSION_EVALUATE_CONCURRENCY", "8"))
+ADMISSION_EVALUATE_QUEUE = int(os.environ.get("ADMISSION_EVALUATE_QUEUE", "32"))
+ADMISSION_SEGMENT_CONCURRENCY = int(os.environ.get("ADMISSION_SEGMENT_CONCURRENCY", "16"))
+ADMISSION_SEGMENT_QUEUE = int(os.environ.get("ADMISSION_SEGMENT_QUEUE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "10"))
+
+# Retry backoff ceiling (seconds; jittered exponential backoff, or Retry-After when longer)
+MODEL_BACKOFF_MAX = float(os.environ.get("MODEL_BACKOFF_MAX", "30"))
+
+# Circuit breaker: after this many consecutive timeouts / connection errors / 5xx, model calls
+# fail fast for BREAKER_RESET_TIMEOUT seconds, then BREAKER_HALF_OPEN_PROBES calls probe recovery
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.environ.get("BREAKER_RESET_TIMEOUT", "30"))
+BREAKER_HALF_OPEN_PROBES = int(os.environ.get("BREAKER_HALF_OPEN_PROBES", "1"))
+
+# Hedged model calls: when a call is slower than this percentile of recent latencies, send a
+# duplicate (to HEDGE_DEPLOYMENT, or the same deployment when empty) and keep the first reply.
+# 0 disables hedging.
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "0"))
+HEDGE_DEPLOYMENT = os.environ.get("HEDGE_DEPLOYMENT", "")
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", "20"))
+
+# API startup: load the PDF engine and model clients in the background; /ready reports when done
+WARM_UP_ON_STARTUP = os.environ.get("WARM_UP_ON_STARTUP", "True").lower() in ("1", "true", "yes")
+
+# Resume loading limits per document (0 = no limit): pages read, file size, and extraction time.
+# Pages beyond the limits are dropped; larger files are rejected.
+RESUME_MAX_PAGES = int(os.environ.get("RESUME_MAX_PAGES", "20"))
+RESUME_MAX_BYTES = int(os.environ.get("RESUME_MAX_BYTES", str(20 * 1024 * 1024)))
+RESUME_MAX_SECONDS = float(os.environ.get("RESUME_MAX_SECONDS", "45"))
+
+# OCR rendering / recognition preset: "fast", "balanced" or "accurate" (loader_resume.OCR_PRESETS; compare them
+# with ocr_benchmark.py). Each of OCR_DPI, OCR_GRAYSCALE, OCR_BINARIZE, OCR_PSM (tesseract page segmentation mode),
+# OCR_OEM (engine mode) and OCR_THREADS (threads per tesseract process) overrides one preset field when set
+OCR_PRESET = os.environ.get("OCR_PRESET", "balanced").lower()
+OCR_DPI = int(os.environ.get("OCR_DPI", "0"))
+OCR_GRAYSCALE = os.environ.get("OCR_GRAYSCALE", "").lower()
+OCR_BINARIZE = os.environ.get("OCR_BINARIZE", "").lower()
+OCR_PSM = int(os.environ.get("OCR_PSM", "0"))
+OCR_OEM = int(os.environ.get("OCR_OEM", "-1"))
+OCR_THREADS = int(os.environ.get("OCR_THREADS", "0"))
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD", "tesseract")
+
+# API text extraction process pool (0 workers = extract in the server's thread pool). Each task is
+# limited to EXTRACTION_TIMEOUT seconds from when a worker starts it; workers are replaced after EXTRACTION_MAX_TASKS_PER_CHILD
+# tasks and capped at EXTRACTION_MEMORY_LIMIT_MB of address space (0 = no cap)
+EXTRACTION_WORKERS = int(os.environ.get("EXTRACTION_WORKERS", "2"))
+EXTRACTION_TIMEOUT = float(os.environ.get("EXTRACTION_TIMEOUT", "60"))
+EXTRACTION_MAX_TASKS_PER_CHILD = int(os.environ.get("EXTRACTION_MAX_TASKS_PER_CHILD", "50"))
+EXTRACTION_MEMORY_LIMIT_MB = int(os.environ.get("EXTRACTION_MEMORY_LIMIT_MB", "2048"))
+
+# OCR (ocrmypdf / tesseract) of scanned resumes: OCR_JOBS pages in parallel per document (default: the CPUs
+# shared among the extraction workers), at most OCR_TIMEOUT seconds per document (the whole process group is
+# killed), and the text cached by PDF content hash in OCR_CACHE_PATH, at most OCR_CACHE_MAX_MB of text
+OCR_JOBS = int(os.environ.get("OCR_JOBS", "0")) or max(1, (os.cpu_count() or 1) // max(1, EXTRACTION_WORKERS))
+OCR_TIMEOUT = float(os.environ.get("OCR_TIMEOUT", "90"))
+OCR_CACHE = os.environ.get("OCR_CACHE", "True").lower() in ("1", "true", "yes")
+OCR_CACHE_PATH = os.environ.get("OCR_CACHE_PATH", os.path.join(BASE, "ocr_cache.sqlite3"))
+OCR_CACHE_MAX_MB = int(os.environ.get("OCR_CACHE_MAX_MB", "256"))
+
+# Offline batch mode (batch_jobs.py / pipeline --batch-export): batch-input files are written to BATCH_FOLDER,
+# split at BATCH_MAX_REQUESTS requests / BATCH_MAX_MB per file, for BATCH_DEPLOYMENT (a batch deployment on
+# Azure; DEPLOYMENT_NAME when empty) at BATCH_URL ("/chat/completions" for Azure deployment-style endpoints)
+BATCH_FOLDER = os.environ.get("BATCH_FOLDER", os.path.join(BASE, "batches"))
+BATCH_DEPLOYMENT = os.environ.get("BATCH_DEPLOYMENT", "")
+BATCH_URL = os.environ.get("BATCH_URL", "/v1/chat/completions")
+BATCH_MAX_REQUESTS = int(os.environ.get("BATCH_MAX_REQUESTS", "50000"))
+BATCH_MAX_MB = int(os.environ.get("BATCH_MAX_MB", "190"))
+
+# Token / cost ledger (cost_ledger.py): the usage of every model request is recorded in LEDGER_PATH, priced with
+# LEDGER_PRICES (JSON: model name prefix or deployment name -> [input, cached input, output] USD per million
+# tokens; no default, since prices depend on the deployed model - unpriced calls are recorded at $0 and a budget
+# stops with PricesMissing; batch requests cost LEDGER_BATCH_DISCOUNT of that). Budgets in USD (0 = none): LEDGER_RUN_BUDGET per pipeline / matrix run,
+# LEDGER_JD_BUDGET per JD over all runs. LEDGER_BUDGET_ACTION "stop" ends the run when a budget would be
+# exceeded, "local" finishes it with the local segmenters and scorer
+LEDGER = os.environ.get("LEDGER", "True").lower() in ("1", "true", "yes")
+LEDGER_PATH = os.environ.get("LEDGER_PATH", os.path.join(BASE, "ledger.sqlite3"))
+LEDGER_PRICES = os.environ.get("LEDGER_PRICES", "")
+LEDGER_BATCH_DISCOUNT = float(os.environ.get("LEDGER_BATCH_DISCOUNT", "0.5"))
+LEDGER_RUN_BUDGET = float(os.environ.get("LEDGER_RUN_BUDGET", "0"))
+LEDGER_JD_BUDGET = float(os.environ.get("LEDGER_JD_BUDGET", "0"))
+LEDGER_BUDGET_ACTION = os.environ.get("LEDGER_BUDGET_ACTION", "stop").lower()
 
 # General
 SKIP_EXISTING = os.environ.get("SKIP_EXISTING", "True").lower() in ("1", "true", "yes")
@@ -0,0 +1,337 @@
+#cost_ledger.py
+# Token / cost ledger: the usage of every model request (prompt, completion and cached tokens), its
+# latency and model are recorded in LEDGER_PATH, attributed to the stage, resume and JD being processed
+# and to the pipeline run. Reports group the spend by JD, day, stage, model, resume or run, and optional
+# budgets (per run, per JD) refuse model calls that would exceed them with BudgetExceeded.
+#
+# Run with: python -m Resume_Pipeline.cost_ledger [--by jd|day|stage|model|resume|run] [--days 7] [--jd NAME]
+
+import json
+import time
+import sqlite3
+import argparse
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("stage", "resume", "jd")
+GROUPS = ("jd", "day", "stage", "model", "resume", "run")
+
+# Stage / resume / JD of the work in progress; nested attribute() blocks add to the outer one
+_attribution: contextvars.ContextVar = contextvars.ContextVar("ledger_attribution", default={})
+
+# Id of the current pipeline / scoring run ("" outside a run: no run budget applies)
+_run = ""
+
+
+class BudgetExceeded(RuntimeError):
+    """Raised before a model call that would take a run or JD past its budget."""
+
+    def __init__(self, scope: str, key: str, limit: float, spent: float, estimate: float):
+        self.scope, self.key, self.limit, self.spent, self.estimate = scope, key, limit, spent, estimate
+        name = f"run {key}" if scope == "run" else f"JD {key!r}"
+        super().__init__(f"{name} budget of ${limit:.4f} would be exceeded "
+                         f"(${spent:.4f} spent, next call ~${estimate:.4f})")
+
+
+class PricesMissing(RuntimeError):
+    """Raised when a budget is set but LEDGER_PRICES cannot price the model a call is served by."""
+
+
+# ----------------------------- ATTRIBUTION -----------------------------
+@contextmanager
+def attribute(**fields):
+    """Attribute the model calls made inside the block to ``stage``, ``resume`` and / or ``jd``.
+
+    Like deadline(), the previous value is restored by assignment so the block may be re-entered
+    from generators resuming in another context.
+    """
+    unknown = set(fields) - set(FIELDS)
+    if unknown:
+        raise TypeError(f"unknown attribution fields: {', '.join(sorted(unknown))}")
+    previous = _attribution.get()
+    _attribution.set({**previous, **{k: v for k, v in fields.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _attribution.set(previous)
+
+
+def current() -> Dict[str, str]:
+    """The attribution of calls made now (stage / resume / jd, plus run when a run was started)."""
+    fields = dict(_attribution.get())
+    if _run:
+        fields["run"] = _run
+    return fields
+
+
+def start_run(run_id: str = None) -> str:
+    """Start a run: the following calls are attributed to it and LEDGER_RUN_BUDGET applies."""
+    global _run
+    _run = run_id or datetime.now().strftime("%Y%m%d-%H%M%S")
+    logger.info("Ledger run %s", _run)
+    return _run
+
+
+# ----------------------------- PRICES -----------------------------
+def _load_prices() -> Dict[str, Tuple[float, float, float]]:
+    try:
+        raw = json.loads(config.LEDGER_PRICES or "{}")
+        return {name.lower(): tuple(float(p) for p in prices) for name, prices in raw.items()}
+    except (ValueError, TypeError) as e:
+        logger.warning("LEDGER_PRICES is not a JSON object of [input, cached, output] prices: %s", e)
+        return {}
+
+
+_prices = None
+_unpriced = set()
+
+
+def price(model: str, deployment: str = None) -> Optional[Tuple[float, float, float]]:
+    """(input, cached input, output) USD per million tokens of the longest LEDGER_PRICES prefix of
+    ``model``, else of the ``deployment`` that served it."""
+    global _prices
+    if _prices is None:
+        _prices = _load_prices()
+    for name in (model, deployment):
+        name = (name or "").lower()
+        matches = [prefix for prefix in _prices if name and name.startswith(prefix)]
+        if matches:
+            return _prices[max(matches, key=len)]
+    return None
+
+
+def cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0, batch: bool = False,
+         deployment: str = None) -> float:
+    """USD cost of one request (0 for models without a price)."""
+    prices = price(model, deployment)
+    if prices is None:
+        return 0.0
+    uncached = max(0, prompt_tokens - cached_tokens)
+    total = (uncached * prices[0] + cached_tokens * prices[1] + completion_tokens * prices[2]) / 1_000_000
+    return total * (config.LEDGER_BATCH_DISCOUNT if batch else 1.0)
+
+
+def usage_counts(usage: Any) -> Tuple[int, int, int]:
+    """(prompt, completion, cached) tokens of a response ``usage`` object or dict."""
+    get = lambda obj, key: obj.get(key) if isinstance(obj, dict) else getattr(obj, key, None)
+    details = get(usage, "prompt_tokens_details")
+    cached = get(details, "cached_tokens") if details is not None else None
+    return int(get(usage, "prompt_tokens") or 0), int(get(usage, "completion_tokens") or 0), int(cached or 0)
+
+
+# ----------------------------- STORE -----------------------------
+class Ledger:
+    """SQLite table of model requests; safe to share between threads."""
+
+    def __init__(self, path: str = None):
+        self.path = path or config.LEDGER_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS model_calls ("
+                " ts REAL NOT NULL, day TEXT NOT NULL, run TEXT, stage TEXT, resume TEXT, jd TEXT,"
+                " model TEXT NOT NULL, prompt_tokens INTEGER NOT NULL, completion_tokens INTEGER NOT NULL,"
+                " cached_tokens INTEGER NOT NULL, latency REAL, cost REAL NOT NULL, batch INTEGER NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS model_calls_jd ON model_calls (jd)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS model_calls_day ON model_calls (day)")
+
+    def add(self, entry: Dict[str, Any]):
+        now = entry.get("ts") or time.time()
+        row = (now, datetime.fromtimestamp(now).strftime("%Y-%m-%d"), entry.get("run"), entry.get("stage"),
+               entry.get("resume"), entry.get("jd"), entry["model"], entry["prompt_tokens"],
+               entry["completion_tokens"], entry["cached_tokens"], entry.get("latency"), entry["cost"],
+               int(bool(entry.get("batch"))))
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO model_calls VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+
+    def spent(self, **where) -> float:
+        """Total cost of the calls matching ``where`` (e.g. jd="backend")."""
+        clause, params = _where(where)
+        with self._lock:
+            return self._conn.execute(f"SELECT COALESCE(SUM(cost), 0) FROM model_calls{clause}", params).fetchone()[0]
+
+    def report(self, by: str = "jd", since: str = None, **where) -> List[Dict[str, Any]]:
+        """Calls, tokens, cost and mean latency per ``by`` value (most expensive first), from day ``since`` on."""
+        if by not in GROUPS:
+            raise ValueError(f"cannot group by {by!r}; expected one of {', '.join(GROUPS)}")
+        clause, params = _where(where, since)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {by}, COUNT(*), SUM(prompt_tokens), SUM(completion_tokens), SUM(cached_tokens),"
+                f" SUM(cost), AVG(latency) FROM model_calls{clause} GROUP BY {by} ORDER BY SUM(cost) DESC, {by}",
+                params,
+            ).fetchall()
+        return [
+            {by: key, "calls": calls, "prompt_tokens": prompt, "completion_tokens": completion,
+             "cached_tokens": cached, "cost": round(total, 6), "mean_latency": round(latency, 3) if latency else None}
+            for key, calls, prompt, completion, cached, total, latency in rows
+        ]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _where(where: Dict[str, Any], since: str = None) -> Tuple[str, list]:
+    conditions = [(f"{k} = ?", v) for k, v in where.items() if v is not None]
+    if since:
+        conditions.append(("day >= ?", since))
+    if not conditions:
+        return "", []
+    return " WHERE " + " AND ".join(c for c, _ in conditions), [v for _, v in conditions]
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> Optional[Ledger]:
+    """The process-wide ledger, or None when LEDGER is off."""
+    global _ledger
+    if not config.LEDGER:
+        return None
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = Ledger()
+        return _ledger
+
+
+# ----------------------------- RECORDING / BUDGETS -----------------------------
+# Spend per budget scope ("run" / "jd", key), seeded from the ledger on first use; mean completion
+# tokens per model, used to estimate the cost of the next call
+_spent: Dict[Tuple[str, str], float] = {}
+_completions: Dict[str, Tuple[int, int]] = {}
+# Model each deployment answered with (responses name it), so a call can be priced before it is made
+_served: Dict[str, str] = {}
+_state_lock = threading.Lock()
+
+
+def _spent_so_far(scope: str, key: str) -> float:
+    # callers hold _state_lock
+    if (scope, key) not in _spent:
+        ledger = get_ledger()
+        _spent[(scope, key)] = ledger.spent(**{scope: key}) if ledger else 0.0
+    return _spent[(scope, key)]
+
+
+def record(model: str, usage: Any, latency: Optional[float] = None, batch: bool = False, deployment: str = None,
+           **fields) -> Optional[dict]:
+    """Record one model request (attributed to current() plus ``fields``), priced by its ``model``
+    or the ``deployment`` it was sent to. Returns the entry, or None when the response carried no usage."""
+    if usage is None:
+        return None
+    if price(model, deployment) is None and model not in _unpriced:
+        _unpriced.add(model)
+        logger.warning("No LEDGER_PRICES entry for model %s (deployment %s): its calls are recorded at $0",
+                       model, deployment)
+    prompt, completion, cached = usage_counts(usage)
+    entry = {**current(), **{k: v for k, v in fields.items() if v is not None}, "model": model,
+             "prompt_tokens": prompt, "completion_tokens": completion, "cached_tokens": cached,
+             "latency": latency, "batch": batch,
+             "cost": cost(model, prompt, completion, cached, batch, deployment=deployment)}
+    with _state_lock:
+        if deployment:
+            _served[deployment] = model
+        for scope in ("run", "jd"):
+            if entry.get(scope):
+                _spent[(scope, entry[scope])] = _spent_so_far(scope, entry[scope]) + entry["cost"]
+        calls, tokens = _completions.get(model, (0, 0))
+        _completions[model] = (calls + 1, tokens + completion)
+    ledger = get_ledger()
+    if ledger is not None:
+        try:
+            ledger.add(entry)
+        except sqlite3.Error as e:
+            logger.warning("Could not record model usage in the ledger: %s", e)
+    return entry
+
+
+def estimate(model: str, messages: List[Dict[str, Any]], deployment: str = None) -> float:
+    """Expected cost of a call: its prompt tokens plus the mean completion seen for the model so far,
+    priced like record() prices it (by the model the deployment answered with, else the deployment)."""
+    from .compaction import count_tokens
+    model = _served.get(deployment) or model
+    prompt = sum(count_tokens(m.get("content") or "") + 4 for m in messages)
+    calls, tokens = _completions.get(model, (0, 0))
+    return cost(model, prompt, tokens // calls if calls else 0, deployment=deployment)
+
+
+def check_budget(model: str, messages: List[Dict[str, Any]], deployments: List[str] = None):
+    """Raise BudgetExceeded when the next call would take the current run or JD over its budget.
+
+    ``deployments`` are those the call may be routed to (the endpoint pool members' own names for
+    ``model``); the most expensive one is assumed. Concurrent calls are checked against the spend
+    recorded so far, so a run can overshoot by the calls already in flight.
+
+    Raises PricesMissing when none of them can be priced although one has already answered: its
+    calls are recorded at $0 and would never reach the budget. Before the first answer the model
+    behind a deployment is unknown, so that call is let through.
+    """
+    fields = current()
+    scopes = [(scope, fields.get(scope), limit) for scope, limit in
+              (("run", config.LEDGER_RUN_BUDGET), ("jd", config.LEDGER_JD_BUDGET))]
+    scopes = [s for s in scopes if s[1] and s[2] > 0]
+    if not scopes:
+        return
+    deployments = deployments or [model]
+    priced = [d for d in deployments if price(_served.get(d) or model, d) is not None]
+    if not priced and any(d in _served for d in deployments):
+        raise PricesMissing(f"a {scopes[0][0]} budget is set but LEDGER_PRICES has no price for "
+                            f"{', '.join(sorted({_served.get(d) or d for d in deployments}))}")
+    expected = max((estimate(model, messages, deployment=d) for d in priced), default=0.0)
+    with _state_lock:
+        for scope, key, limit in scopes:
+            spent = _spent_so_far(scope, key)
+            if spent + expected > limit:
+                raise BudgetExceeded(scope, key, limit, spent, expected)
+
+
+def run_summary() -> Dict[str, Any]:
+    """Calls, tokens and cost of the current run (empty without a run or a ledger)."""
+    ledger = get_ledger()
+    if not _run or ledger is None:
+        return {}
+    rows = ledger.report("run", run=_run)
+    return rows[0] if rows else {"run": _run, "calls": 0, "cost": 0.0}
+
+
+# ----------------------------- CLI -----------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Model token / cost report from the ledger")
+    parser.add_argument("--by", choices=GROUPS, default="jd", help="Group the spend by this field")
+    parser.add_argument("--days", type=int, help="Only the last N days (including today)")
+    parser.add_argument("--jd", help="Only calls for this JD")
+    parser.add_argument("--run", help="Only calls of this run")
+    parser.add_argument("--json", action="store_true", help="Print the rows as JSON")
+    args = parser.parse_args()
+
+    ledger = get_ledger()
+    if ledger is None:
+        raise SystemExit("The ledger is off (LEDGER=false)")
+    since = (datetime.now() - timedelta(days=args.days - 1)).strftime("%Y-%m-%d") if args.days else None
+    rows = ledger.report(args.by, since=since, jd=args.jd, run=args.run)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{args.by:<28}{'calls':>7}{'prompt':>11}{'cached':>10}{'completion':>12}{'cost $':>11}{'latency s':>11}")
+    for row in rows:
+        latency = f"{row['mean_latency']:.2f}" if row["mean_latency"] is not None else "-"
+        print(f"{str(row[args.by] or '-'):<28}{row['calls']:>7}{row['prompt_tokens']:>11}{row['cached_tokens']:>10}"
+              f"{row['completion_tokens']:>12}{row['cost']:>11.4f}{latency:>11}")
+    total = sum(row["cost"] for row in rows)
+    print(f"Total: {sum(row['calls'] for row in rows)} calls, ${total:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#deadline.py
+# Per-request deadlines: the API sets one deadline per request and every model call made
+# while handling it (segmentation, evaluation, retries, hedges) is bounded by the time left.
+
+import time
+import contextvars
+from contextlib import contextmanager
+from typing import Optional
+
+# Absolute expiry (time.monotonic()) of the current request, or None when unbounded
+_deadline: contextvars.ContextVar = contextvars.ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when the current request's deadline has passed."""
+
+
+def expires_in(seconds: Optional[float]) -> Optional[float]:
+    """Absolute monotonic expiry for a deadline ``seconds`` from now (None / <= 0 means no deadline)."""
+    return time.monotonic() + seconds if seconds and seconds > 0 else None
+
+
+@contextmanager
+def deadline(seconds: Optional[float] = None, at: Optional[float] = None):
+    """Bound everything inside the block to ``seconds`` from now (or to the absolute ``at``).
+
+    Nested deadlines can only shorten the enclosing one. The previous value is restored by
+    assignment rather than token reset, so the block may be re-entered from generators that
+    resume in a different context (e.g. StreamingResponse iterating in the threadpool).
+    """
+    previous = _deadline.get()
+    expiry = at if at is not None else expires_in(seconds)
+    if previous is not None and (expiry is None or previous < expiry):
+        expiry = previous
+    _deadline.set(expiry)
+    try:
+        yield expiry
+    finally:
+        _deadline.set(previous)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (may be negative), or None when unbounded."""
+    expiry = _deadline.get()
+    return None if expiry is None else expiry - time.monotonic()
+
+
+def check(what: str = "request"):
+    """Raise DeadlineExceeded if the current deadline has passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"{what} exceeded its deadline")
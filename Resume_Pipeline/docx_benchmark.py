@@ -0,0 +1,160 @@
+"""
+DOCX extraction benchmark: the streaming zip/XML extractor in loader_resume against the
+previous python-docx path (Document(...).paragraphs), on generated samples and/or given files.
+
+Reports the best-of-N extraction time, the peak RSS growth of one extraction (measured in a
+fresh interpreter per file and extractor) and how much text each path recovers.
+
+Run with: python -m Resume_Pipeline.docx_benchmark [--files a.docx b.docx] [--repeat 5]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from typing import Callable, Dict, List
+
+from .loader_resume import _clean_text, extract_docx_text
+
+# ----------------------------- EXTRACTORS -----------------------------
+def python_docx_text(path: str) -> str:
+    """The pre-streaming DOCX path: body paragraphs only (no tables, headers or text boxes)."""
+    from docx import Document
+    doc = Document(path)
+    return _clean_text("\n".join(paragraph.text for paragraph in doc.paragraphs))
+
+
+def streaming_text(path: str) -> str:
+    return _clean_text(extract_docx_text(path))
+
+
+EXTRACTORS: Dict[str, Callable[[str], str]] = {"python-docx": python_docx_text, "streaming": streaming_text}
+
+
+# ----------------------------- SAMPLES -----------------------------
+def make_samples(folder: str) -> List[str]:
+    """Write synthetic resumes: a plain one, a two-column table layout with a header, and a long CV."""
+    from docx import Document
+
+    def add_job(doc, i):
+        doc.add_heading(f"Senior Engineer {i} - Example Corp", level=2)
+        doc.add_paragraph("Jan 2019 - Present | Remote")
+        for j in range(4):
+            doc.add_paragraph(f"Built data pipeline {i}.{j} in Python and AWS, cutting costs by {j + 10}%",
+                              style="List Bullet")
+
+    plain = Document()
+    plain.add_heading("Jane Doe", level=1)
+    plain.add_paragraph("jane@example.com | +1 555 0100 | Berlin, Germany")
+    for i in range(6):
+        add_job(plain, i)
+
+    layout = Document()
+    layout.sections[0].header.paragraphs[0].text = "Jane Doe | jane@example.com | +1 555 0100"
+    table = layout.add_table(rows=1, cols=2)
+    left, right = table.rows[0].cells
+    left.text = "SKILLS"
+    for skill in ("Python", "Kubernetes", "Terraform", "PostgreSQL", "Leadership"):
+        left.add_paragraph(skill)
+    right.text = "EXPERIENCE"
+    for i in range(6):
+        right.add_paragraph(f"Senior Engineer {i} - Example Corp (2019 - Present)")
+        right.add_paragraph(f"Led migration {i} of batch jobs to streaming, 40% faster reports")
+
+    long_cv = Document()
+    long_cv.add_heading("Curriculum Vitae", level=1)
+    for i in range(2000):
+        add_job(long_cv, i)
+
+    paths = []
+    for name, doc in (("plain", plain), ("table_layout", layout), ("long_cv", long_cv)):
+        path = os.path.join(folder, f"{name}.docx")
+        doc.save(path)
+        paths.append(path)
+    return paths
+
+
+# ----------------------------- MEASUREMENT -----------------------------
+def best_time(fn: Callable[[str], str], path: str, repeat: int) -> float:
+    fn(path)  # warm imports and caches
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_rss_kb(extractor: str, path: str) -> int:
+    """Peak RSS growth (KiB) of one extraction, in a fresh interpreter with the imports done first."""
+    out = subprocess.run(
+        [sys.executable, "-m", "Resume_Pipeline.docx_benchmark", "--child", extractor, path],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, check=True,
+    )
+    return int(out.stdout.strip().splitlines()[-1])
+
+
+def _high_water_kb() -> int:
+    """Peak RSS of this process in KiB. VmHWM, unlike ru_maxrss, does not inherit the parent's peak."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _child(extractor: str, path: str):
+    fn = EXTRACTORS[extractor]
+    if extractor == "python-docx":
+        import docx  # noqa: F401
+    before = _high_water_kb()
+    fn(path)
+    print(_high_water_kb() - before)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DOCX text extraction")
+    parser.add_argument("--files", nargs="*", default=[], help="DOCX files to add to the generated samples")
+    parser.add_argument("--no-samples", action="store_true", help="Only benchmark --files")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per file (best is reported)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    parser.add_argument("--child", nargs=2, metavar=("EXTRACTOR", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        return
+
+    with tempfile.TemporaryDirectory() as td:
+        files = ([] if args.no_samples else make_samples(td)) + args.files
+        results = []
+        for path in files:
+            row = {"file": os.path.basename(path), "kb": round(os.path.getsize(path) / 1024, 1)}
+            for name, fn in EXTRACTORS.items():
+                row[name] = {
+                    "ms": round(best_time(fn, path, args.repeat) * 1000, 2),
+                    "peak_rss_kb": peak_rss_kb(name, path),
+                    "chars": len(fn(path)),
+                }
+            results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'file':<18}{'size':>9}  {'extractor':<12}{'ms':>9}{'peak RSS':>12}{'chars':>9}")
+    for row in results:
+        for name in EXTRACTORS:
+            r = row[name]
+            print(f"{row['file']:<18}{row['kb']:>7}KB  {name:<12}{r['ms']:>9}{r['peak_rss_kb']:>9} KB{r['chars']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#endpoint_pool.py
+# Pool of OpenAI-compatible endpoints / deployments. Model calls are routed with weighted
+# least-outstanding-requests; throttled (429) or repeatedly failing members are taken out of
+# rotation for a cooldown and come back automatically.
+
+import os
+import json
+import time
+import threading
+import logging
+from typing import Any, Dict, List, Optional
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+class PoolMember:
+    """One endpoint + deployment (+ key) and its live routing / health counters."""
+
+    def __init__(self, name: str, endpoint: str, deployment: str, api_key: Optional[str] = None, weight: float = 1.0):
+        self.name = name
+        self.endpoint = endpoint
+        self.deployment = deployment
+        self.api_key = api_key
+        self.weight = max(float(weight), 0.01)
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.throttled = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.ewma_latency: Optional[float] = None
+
+    def available(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def load(self) -> float:
+        """Routing cost: outstanding requests (including the one being placed) per unit of weight."""
+        return (self.outstanding + 1) / self.weight
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "endpoint": self.endpoint,
+            "deployment": self.deployment,
+            "weight": self.weight,
+            "healthy": self.available(now),
+            "cooldown_remaining": round(max(0.0, self.cooldown_until - now), 2),
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "ewma_latency": None if self.ewma_latency is None else round(self.ewma_latency, 3),
+        }
+
+
+class EndpointPool:
+    def __init__(self, members: List[PoolMember], cooldown: float = None, failure_threshold: int = None):
+        if not members:
+            raise ValueError("endpoint pool needs at least one member")
+        self.members = members
+        self.cooldown = config.POOL_COOLDOWN if cooldown is None else cooldown
+        self.failure_threshold = failure_threshold or config.POOL_FAILURE_THRESHOLD
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude: Optional[PoolMember] = None) -> PoolMember:
+        """Reserve the least-loaded healthy member (weighted), skipping ``exclude`` if possible.
+
+        When every member is cooling down, the one that recovers first is used rather
+        than failing the call outright.
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [m for m in self.members if m is not exclude] or self.members
+            healthy = [m for m in candidates if m.available(now)]
+            if healthy:
+                member = min(healthy, key=lambda m: (m.load(), m.ewma_latency or 0.0))
+            else:
+                member = min(candidates, key=lambda m: m.cooldown_until)
+            member.outstanding += 1
+            member.requests += 1
+            return member
+
+    def has_available(self) -> bool:
+        """True when at least one member is in rotation."""
+        with self._lock:
+            now = time.monotonic()
+            return any(m.available(now) for m in self.members)
+
+    def release(self, member: PoolMember, latency: Optional[float] = None, error: Optional[BaseException] = None):
+        """Return a reserved member and record the outcome of its call."""
+        with self._lock:
+            member.outstanding = max(0, member.outstanding - 1)
+            if error is None:
+                member.consecutive_failures = 0
+                if latency is not None:
+                    member.ewma_latency = latency if member.ewma_latency is None else 0.8 * member.ewma_latency + 0.2 * latency
+                return
+
+            status = getattr(error, "status_code", None)
+            now = time.monotonic()
+            if status == 429:
+                member.throttled += 1
+                wait = retry_after_seconds(error) or self.cooldown
+                member.cooldown_until = max(member.cooldown_until, now + wait)
+                logger.warning("Pool member %s throttled; out of rotation for %.1fs", member.name, wait)
+            elif status is None or status >= 500:
+                # timeouts, connection errors and server errors count against the member;
+                # other 4xx are caused by the request itself
+                member.failures += 1
+                member.consecutive_failures += 1
+                if member.consecutive_failures >= self.failure_threshold:
+                    member.cooldown_until = now + self.cooldown
+                    member.consecutive_failures = 0
+                    logger.warning("Pool member %s failed %s times in a row; out of rotation for %.1fs",
+                                   member.name, self.failure_threshold, self.cooldown)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            now = time.monotonic()
+            return [m.snapshot(now) for m in self.members]
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Retry-After (or Azure's retry-after-ms) of a failed API call, in seconds."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers.get(name)) * scale
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+# ----------------------------- POOL CONFIGURATION -----------------------------
+def load_members(spec: str = None, default_key: Optional[str] = None) -> List[PoolMember]:
+    """Build pool members from OPENAI_POOL (a JSON list, or a path to a JSON file).
+
+    Each entry: {"endpoint": ..., "deployment": ..., "api_key" or "api_key_env": ..., "weight": 1, "name": ...};
+    missing fields default to OPENAI_ENDPOINT / DEPLOYMENT_NAME / the default key. Without
+    OPENAI_POOL the pool has the single configured endpoint.
+    """
+    spec = config.OPENAI_POOL if spec is None else spec
+    if not spec:
+        return [PoolMember("default", config.OPENAI_ENDPOINT, config.DEPLOYMENT_NAME, default_key)]
+    if os.path.exists(spec):
+        with open(spec, "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    else:
+        entries = json.loads(spec)
+
+    members = []
+    for i, entry in enumerate(entries):
+        key = entry.get("api_key") or (os.environ.get(entry["api_key_env"]) if entry.get("api_key_env") else None)
+        deployment = entry.get("deployment", config.DEPLOYMENT_NAME)
+        members.append(PoolMember(
+            name=entry.get("name") or f"{i}:{deployment}",
+            endpoint=entry.get("endpoint", config.OPENAI_ENDPOINT),
+            deployment=deployment,
+            api_key=key or default_key,
+            weight=entry.get("weight", 1.0),
+        ))
+    return members
@@ -0,0 +1,322 @@
+#extraction_pool.py
+# Process pool for CPU-bound resume text extraction (layout analysis, OCR) so the API event
+# loop and its thread pool stay responsive. Workers are pre-started with the PDF engine
+# loaded, recycled after a number of tasks and memory-capped. A task's timeout runs from when
+# a worker starts it (an alarm in the worker aborts it); the pool is only rebuilt when a worker
+# ignores that alarm or dies.
+
+import os
+import time
+import signal
+import asyncio
+import logging
+import itertools
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple
+
+from . import config
+from .deadline import remaining
+
+logger = logging.getLogger(__name__)
+
+
+# Seconds a started task may run past its timeout (its worker's alarm did not stop it, e.g. stuck
+# in native code) before the pool kills the worker
+KILL_GRACE = 2.0
+_POLL = 0.25
+
+
+class ExtractionTimeout(TimeoutError):
+    """Raised when extracting one resume takes longer than EXTRACTION_TIMEOUT."""
+
+
+# ----------------------------- WORKER SIDE -----------------------------
+_started_queue = None  # (task id, pid) of every task this worker starts, read by the pool
+_task_seconds = 0.0
+
+
+def _init_worker(memory_limit_mb: int, started_queue=None):
+    """Runs once per worker process: cap its address space, take its OCR subprocesses down with it
+    on SIGTERM, abort the running task on its timeout alarm, and load the PDF engine."""
+    global _started_queue
+    _started_queue = started_queue
+    signal.signal(signal.SIGTERM, _terminate_worker)
+    if hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _task_expired)
+    if memory_limit_mb:
+        try:
+            import resource
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass  # not supported on this platform
+    from .loader_resume import warm_up
+    warm_up()
+
+
+def _terminate_worker(signum, frame):
+    # OCR runs in its own process group (so a timeout can kill tesseract too): killing the worker
+    # alone would orphan it
+    from .loader_resume import kill_ocr_groups
+    kill_ocr_groups()
+    os._exit(1)
+
+
+def _task_expired(signum, frame):
+    # the alarm interrupts the task between bytecodes; its OCR subprocesses are killed with it
+    from .loader_resume import kill_ocr_groups
+    kill_ocr_groups()
+    raise ExtractionTimeout(f"resume extraction exceeded {_task_seconds:g}s")
+
+
+def _run_task(task_id: int, timeout: float, expires: Optional[float], fn, *args):
+    """Task wrapper run in a worker: report the start to the pool, then run ``fn(*args)`` under an
+    alarm of ``timeout`` seconds (capped by the request deadline ``expires``, a monotonic time)."""
+    global _task_seconds
+    if _started_queue is not None:
+        _started_queue.put((task_id, os.getpid()))
+    _task_seconds = timeout if expires is None else max(0.1, min(timeout, expires - time.monotonic()))
+    alarm = hasattr(signal, "setitimer")
+    if alarm:
+        signal.setitimer(signal.ITIMER_REAL, _task_seconds)
+    try:
+        return fn(*args)
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def extract_resume_text(path: str) -> Tuple[str, Dict[str, float]]:
+    """Task run in a worker: extract text from one resume file. Also returns the OCR counters the
+    task added in the worker, for the server to aggregate (see loader_resume.record_ocr)."""
+    from .loader_resume import load_resume, ocr_stats
+    before = ocr_stats()
+    text = load_resume(path)
+    after = ocr_stats()
+    return text, {key: after[key] - before[key] for key in after}
+
+
+# ----------------------------- POOL -----------------------------
+def _stop_workers(procs, grace: float = 2.0):
+    """SIGTERM the workers (each kills its OCR process groups, see _terminate_worker), then SIGKILL
+    whichever is still alive after ``grace`` seconds."""
+    for proc in procs:
+        try:
+            proc.terminate()
+        except Exception:
+            pass
+    until = time.monotonic() + grace
+    for proc in procs:
+        try:
+            proc.join(max(0.0, until - time.monotonic()))
+            if proc.is_alive():
+                proc.kill()
+        except Exception:
+            pass
+
+
+class _Task:
+    """A submitted task: its request deadline, and when (and in which worker) it started."""
+    __slots__ = ("id", "expires", "started", "pid")
+
+    def __init__(self, task_id: int, expires: Optional[float]):
+        self.id = task_id
+        self.expires = expires
+        self.started = None
+        self.pid = None
+
+
+class ExtractionPool:
+    def __init__(self, workers: int = None, timeout: float = None, max_tasks_per_child: int = None,
+                 memory_limit_mb: int = None):
+        self.workers = workers or config.EXTRACTION_WORKERS
+        self.timeout = timeout or config.EXTRACTION_TIMEOUT
+        self.max_tasks_per_child = max_tasks_per_child or config.EXTRACTION_MAX_TASKS_PER_CHILD
+        self.memory_limit_mb = config.EXTRACTION_MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+        self.tasks = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self._lock = threading.Lock()
+        self._executor = None
+        self._generation = 0
+        # forkserver/spawn: never fork the threaded server process itself
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(method)
+        self._tasks: Dict[int, _Task] = {}
+        self._ids = itertools.count(1)
+        self._started_queue = None
+
+    def start(self):
+        """Create the executor and pre-start every worker (each loads the PDF engine)."""
+        self._started_queue = self._context.Queue()
+        threading.Thread(target=self._listen, args=(self._started_queue,), name="extraction-starts",
+                         daemon=True).start()
+        with self._lock:
+            self._executor = self._new_executor()
+        for f in [self._executor.submit(_ping) for _ in range(self.workers)]:
+            f.result()
+        logger.info("Extraction pool started with %s workers", self.workers)
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        self._generation += 1
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self.memory_limit_mb, self._started_queue),
+            max_tasks_per_child=self.max_tasks_per_child,
+        )
+
+    def _listen(self, started_queue):
+        """Record when each task starts in a worker (its timeout runs from then)."""
+        while True:
+            try:
+                item = started_queue.get()
+            except (EOFError, OSError):
+                return
+            except Exception as e:  # a message cut short by a killed worker
+                logger.warning("Unreadable extraction start message: %s", e)
+                continue
+            if item is None:
+                return
+            task_id, pid = item
+            with self._lock:
+                task = self._tasks.get(task_id)
+                if task is not None:
+                    task.started, task.pid = time.monotonic(), pid
+
+    def _restart(self, generation: int, reason: str):
+        """Stop every worker of ``generation`` and start a fresh executor (no-op if already replaced)."""
+        with self._lock:
+            if generation != self._generation or self._executor is None:
+                return
+            old = self._executor
+            procs = list((getattr(old, "_processes", None) or {}).values())
+            old.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._new_executor()
+            self.restarts += 1
+        # ProcessPoolExecutor cannot cancel a running task: stop its processes instead (outside the
+        # lock, so new tasks already go to the fresh executor)
+        _stop_workers(procs)
+        logger.warning("Extraction pool restarted: %s", reason)
+
+    def _submit(self, fn, *args):
+        left = remaining()
+        task = _Task(next(self._ids), None if left is None else time.monotonic() + left)
+        with self._lock:
+            if self._executor is None:
+                raise RuntimeError("extraction pool is not running")
+            self.tasks += 1
+            self._tasks[task.id] = task
+            future = self._executor.submit(_run_task, task.id, self.timeout, task.expires, fn, *args)
+            return future, self._generation, task
+
+    def _time_left(self, task: _Task) -> Optional[float]:
+        """Seconds to keep waiting for ``task``: while it is queued only the request deadline
+        applies (None: no limit); once started, its timeout plus KILL_GRACE."""
+        now = time.monotonic()
+        if task.started is None:
+            return None if task.expires is None else task.expires - now
+        limit = self.timeout if task.expires is None else max(0.1, min(self.timeout, task.expires - task.started))
+        return task.started + limit + KILL_GRACE - now
+
+    def _give_up(self, future, generation: int, task: _Task):
+        """Stop waiting for ``task`` and raise ExtractionTimeout."""
+        if task.started is None:
+            future.cancel()  # the deadline passed while it was queued: no worker is involved
+            raise ExtractionTimeout("resume extraction did not start before the request deadline")
+        # The worker ignored its alarm. A ProcessPoolExecutor breaks as soon as one of its workers
+        # is killed, so the whole pool is rebuilt (the other tasks are retried once on it)
+        self._restart(generation, f"worker {task.pid} stuck past {self.timeout:g}s")
+        raise ExtractionTimeout(f"resume extraction exceeded {self.timeout:g}s")
+
+    def run_sync(self, fn, *args):
+        """Run ``fn(*args)`` in a worker and wait for it (for use from threads)."""
+        for attempt in (1, 2):
+            future, generation, task = self._submit(fn, *args)
+            try:
+                while True:
+                    left = self._time_left(task)
+                    if left is not None and left <= 0:
+                        self._give_up(future, generation, task)
+                    # wait() rather than result(timeout): ExtractionTimeout is itself a TimeoutError
+                    done, _ = wait([future], timeout=_POLL if left is None else min(left, _POLL))
+                    if done:
+                        return future.result()
+            except ExtractionTimeout:
+                self.timeouts += 1
+                raise
+            except BrokenProcessPool:
+                self._restart(generation, "worker died")
+                if attempt == 2:
+                    raise
+            finally:
+                self._tasks.pop(task.id, None)
+
+    async def run(self, fn, *args):
+        """Run ``fn(*args)`` in a worker without blocking the event loop."""
+        for attempt in (1, 2):
+            future, generation, task = self._submit(fn, *args)
+            waiter = asyncio.wrap_future(future)
+            try:
+                while True:
+                    left = self._time_left(task)
+                    if left is not None and left <= 0:
+                        self._give_up(future, generation, task)
+                    done, _ = await asyncio.wait({waiter}, timeout=_POLL if left is None else min(left, _POLL))
+                    if done:
+                        return waiter.result()
+            except ExtractionTimeout:
+                self.timeouts += 1
+                raise
+            except BrokenProcessPool:
+                # a crashed worker (or one killed with a stuck neighbour); retry once on the new pool
+                self._restart(generation, "worker died")
+                if attempt == 2:
+                    raise
+            finally:
+                self._tasks.pop(task.id, None)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._started_queue is not None:
+                self._started_queue.put(None)  # ends the listener thread
+                self._started_queue = None
+
+    def stats(self):
+        return {"workers": self.workers, "tasks": self.tasks, "timeouts": self.timeouts, "restarts": self.restarts}
+
+
+# ----------------------------- PROCESS-WIDE POOL -----------------------------
+_pool: Optional[ExtractionPool] = None
+
+
+def start_pool() -> Optional[ExtractionPool]:
+    """Start the process-wide pool (EXTRACTION_WORKERS=0 keeps extraction in the server's threads)."""
+    global _pool
+    if _pool is None and config.EXTRACTION_WORKERS > 0:
+        pool = ExtractionPool()
+        pool.start()
+        _pool = pool
+    return _pool
+
+
+def get_pool() -> Optional[ExtractionPool]:
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
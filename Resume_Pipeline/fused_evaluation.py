@@ -0,0 +1,145 @@
+#fused_evaluation.py
+# Fused resume structuring + scoring: one model call returns both the structured resume
+# sections and the per-criterion evaluation as JSON. Callers fall back to the two-step
+# path (segment -> format -> evaluate) when the reply does not validate.
+
+import json
+import re
+import logging
+from typing import Any, Optional, Tuple
+
+from . import config
+from .scoring import EVALUATION_CRITERIA
+from .compaction import compact_text, count_tokens, to_prompt_json
+from .deadline import DeadlineExceeded
+from .circuit_breaker import CircuitOpenError
+from .cost_ledger import BudgetExceeded, PricesMissing, attribute
+
+DEPLOYMENT_NAME = config.DEPLOYMENT_NAME
+TOKEN_BUDGET = config.PROMPT_TOKEN_BUDGET
+logger = logging.getLogger(__name__)
+
+# Keys produced by resume_format.format_resume_text (list-valued sections)
+RESUME_LIST_SECTIONS = [
+    "Education",
+    "Experience",
+    "Skills",
+    "Projects",
+    "Certifications",
+    "Other Information",
+]
+
+# ----------------------------- FUSED PROMPT -----------------------------
+FUSED_SYSTEM_PROMPT = (
+    "You are a recruiter. You will receive a candidate's raw resume text and a job description (JD). "
+    "First clean and structure the resume, then evaluate the candidate's fit for the role.\n\n"
+    "Respond with a single JSON object and nothing else, using exactly this schema:\n"
+    "{\n"
+    '  "resume": {\n'
+    '    "Personal Information": {"Name": string, "Email": string, "Phone": string, "Location": string},\n'
+    '    "Education": [string], "Experience": [string], "Skills": [string],\n'
+    '    "Projects": [string], "Certifications": [string], "Other Information": [string]\n'
+    "  },\n"
+    '  "evaluation": [\n'
+    '    {"criterion": 1, "score": integer 0-10, "justification": string},\n'
+    '    {"criterion": 2, "score": integer 0-10, "justification": string},\n'
+    '    {"criterion": 3, "score": integer 0-10, "justification": string}\n'
+    "  ]\n"
+    "}\n\n"
+    "Resume lists hold one entry per line item; remove noise, duplicates, headers and footers. "
+    "Omit Personal Information fields that are not present. Evaluation criteria:\n"
+    "1. Fulfillment with Non-Negotiable Criteria in the JD\n"
+    "2. Fulfillment with Negotiable Criteria in the JD\n"
+    "3. Continuity and Recency of Experience with both Non-Negotiable and Negotiable Criteria in JD\n"
+    "Each justification is two lines."
+)
+
+
+# ----------------------------- FUNCTION: validate fused reply -----------------------------
+def _strip_code_fence(text: str) -> str:
+    m = re.match(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", text or "", re.S)
+    return m.group(1) if m else (text or "")
+
+
+def validate_fused_result(data: Any) -> Tuple[dict, dict]:
+    """Validate a decoded fused reply against the schema.
+
+    Returns ``(formatted_resume, evaluation)`` in the same shapes as
+    ``format_resume_text`` and ``parse_evaluation``. Raises ValueError on any mismatch.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("reply is not a JSON object")
+    resume = data.get("resume")
+    criteria = data.get("evaluation")
+    if not isinstance(resume, dict):
+        raise ValueError("'resume' must be an object")
+    if not isinstance(criteria, list):
+        raise ValueError("'evaluation' must be a list")
+
+    personal = resume.get("Personal Information", {})
+    if not isinstance(personal, dict) or not all(isinstance(v, str) for v in personal.values()):
+        raise ValueError("'Personal Information' must map field names to strings")
+
+    formatted = {"Personal Information": {k: v.strip() for k, v in personal.items() if v and v.strip()}}
+    for key in RESUME_LIST_SECTIONS:
+        items = resume.get(key, [])
+        if not isinstance(items, list) or not all(isinstance(i, str) for i in items):
+            raise ValueError(f"'{key}' must be a list of strings")
+        formatted[key] = [i.strip() for i in items if i.strip()]
+
+    evaluation = {}
+    for entry in criteria:
+        if not isinstance(entry, dict):
+            raise ValueError("evaluation entries must be objects")
+        num, score, why = entry.get("criterion"), entry.get("score"), entry.get("justification")
+        if not isinstance(num, int) or not 1 <= num <= len(EVALUATION_CRITERIA):
+            raise ValueError(f"unknown criterion: {num!r}")
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 10:
+            raise ValueError(f"score out of range for criterion {num}: {score!r}")
+        if not isinstance(why, str) or not why.strip():
+            raise ValueError(f"missing justification for criterion {num}")
+        evaluation[EVALUATION_CRITERIA[num - 1]] = {
+            "score": f"{int(round(score))}/10",
+            "description": why.strip(),
+        }
+    if len(evaluation) != len(EVALUATION_CRITERIA):
+        raise ValueError("evaluation must cover all criteria")
+
+    return formatted, evaluation
+
+
+# ----------------------------- FUNCTION: fused evaluation -----------------------------
+def evaluate_resume_fused(resume_text: str, jd_text: str) -> Optional[Tuple[dict, dict]]:
+    """Structure and score a resume in one model call.
+
+    Returns ``(formatted_resume, evaluation)``, or None when the call fails or the reply
+    does not validate so the caller can fall back to the two-step path.
+    """
+    from .openai_client import call_chat_completions
+
+    resume_text = compact_text(resume_text)
+    jd_text = to_prompt_json(jd_text)
+    if count_tokens(resume_text) + count_tokens(jd_text) > TOKEN_BUDGET:
+        # the two-step path chunks long resumes; a single fused prompt cannot
+        logger.info("Resume over the prompt token budget; using the two-step path")
+        return None
+
+    messages = [
+        {"role": "system", "content": FUSED_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Resume: {resume_text}\nJob Description: {jd_text}"},
+    ]
+    try:
+        with attribute(stage="fused"):
+            response = call_chat_completions(
+                messages, model=DEPLOYMENT_NAME, response_format={"type": "json_object"}
+            )
+        content = response.choices[0].message.content
+        return validate_fused_result(json.loads(_strip_code_fence(content)))
+    except (DeadlineExceeded, CircuitOpenError, BudgetExceeded, PricesMissing):
+        raise  # the two-step fallback would fail the same way
+    except (ValueError, TypeError) as e:
+        # json.JSONDecodeError is a ValueError
+        logger.warning("Fused evaluation reply failed validation, falling back to two-step: %s", e)
+    except Exception as e:
+        logger.warning("Fused evaluation call failed, falling back to two-step: %s", e)
+    return None
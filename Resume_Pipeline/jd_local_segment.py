@@ -0,0 +1,168 @@
+#jd_local_segment.py
+# Deterministic job description segmentation: find requirement sections by common JD
+# headings and classify each bullet as negotiable / non-negotiable with a confidence score.
+
+import re
+from typing import List, Tuple
+
+# ----------------------------- HEADING VOCABULARY -----------------------------
+# An exact must-have / nice-to-have heading decides its bullets on its own. Under a generic heading
+# ("Requirements") bullets are non-negotiable unless their wording says otherwise.
+GENERIC_CERTAINTY = 0.9  # generic heading, no explicit wording either way
+# generic heading, only a weak "nice" cue ("familiarity", "exposure"): below the default JD_LOCAL_CONFIDENCE,
+# so a requirement list of such bullets is left to the model
+WEAK_CUE_CERTAINTY = 0.4
+
+MUST_HEADINGS = {
+    "must have", "must-have", "must haves", "must-haves", "required", "requirements (must have)",
+    "minimum qualifications", "basic qualifications", "required qualifications", "required skills",
+    "mandatory", "mandatory skills", "essential", "essential skills", "essential requirements",
+}
+GENERIC_HEADINGS = {
+    "requirements", "qualifications", "skills", "what you'll need", "what you need", "what we're looking for",
+    "what we are looking for", "who you are", "your profile", "skills and qualifications",
+    "skills & qualifications", "requirements and qualifications", "job requirements", "experience",
+    "key skills", "technical skills",
+}
+NICE_HEADINGS = {
+    "nice to have", "nice-to-have", "nice to haves", "nice-to-haves", "preferred", "preferred qualifications",
+    "preferred skills", "bonus", "bonus points", "bonus skills", "plus", "pluses", "good to have",
+    "good-to-have", "desirable", "desired skills", "desired qualifications", "additional qualifications",
+    "it would be great if you have",
+}
+# Sections whose bullets are not requirements
+SKIP_HEADINGS = {
+    "responsibilities", "key responsibilities", "duties", "what you'll do", "what you will do", "the role",
+    "about the role", "about us", "about the company", "benefits", "perks", "perks and benefits",
+    "what we offer", "compensation", "job summary", "summary", "overview", "how to apply", "location",
+    "role overview", "job description",
+}
+
+STRONG_NICE = re.compile(
+    r"(?i)\b(nice[- ]to[- ]have|is a plus|a plus|bonus|preferred|preferably|ideally|desirable|"
+    r"good[- ]to[- ]have|an advantage|advantageous|optional)\b"
+)
+STRONG_MUST = re.compile(r"(?i)\b(must|required|requirement|mandatory|minimum|at least|essential)\b")
+WEAK_NICE = re.compile(r"(?i)\b(familiarity|exposure|interest|awareness|basic understanding)\b")
+WEAK_MUST = re.compile(r"(?i)(\b\d+\s*(?:\+|–|-|to)\s*\d*\s*years?\b|\bdegree\b|\bproficien|\bstrong\b|\bexpert)")
+
+BULLET_RE = re.compile(r"^\s*(?:[-•▪*●◦]|\d+[.)])\s*")
+
+
+def _normalize_heading(line: str) -> str:
+    s = BULLET_RE.sub("", line).strip().rstrip(":").strip().lower()
+    return re.sub(r"\s+", " ", s)
+
+
+def _heading_kind(text: str):
+    """Return 'must', 'generic', 'nice' or 'skip' for a recognized heading, else None."""
+    h = _normalize_heading(text)
+    if h in MUST_HEADINGS:
+        return "must"
+    if h in NICE_HEADINGS:
+        return "nice"
+    if h in GENERIC_HEADINGS:
+        return "generic"
+    if h in SKIP_HEADINGS:
+        return "skip"
+    return None
+
+
+def _classify(item: str, section: str) -> Tuple[bool, float]:
+    """Return ``(is_non_negotiable, confidence)`` for one bullet in a given section.
+
+    Wording that contradicts an explicit heading ("... is a plus" under "Must have") leaves the
+    bullet under its heading with no confidence, so such JDs go to the model.
+    """
+    strong_nice = bool(STRONG_NICE.search(item))
+    strong_must = bool(STRONG_MUST.search(item)) and not strong_nice
+    if section == "must":
+        return True, 0.0 if strong_nice else 1.0
+    if section == "nice":
+        return (True, 0.0) if strong_must else (False, 1.0)
+    if strong_nice or strong_must:
+        return strong_must, 1.0
+    if WEAK_NICE.search(item) and not WEAK_MUST.search(item):
+        return True, WEAK_CUE_CERTAINTY
+    return True, GENERIC_CERTAINTY
+
+
+def _items(lines: List[str]) -> List[str]:
+    """Turn section lines into requirement items, re-joining wrapped lines."""
+    items = []
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            continue
+        bulleted = bool(BULLET_RE.match(line))
+        text = BULLET_RE.sub("", line).strip()
+        if not text:
+            continue
+        # continuation of a wrapped bullet: no marker, starts lowercase, previous item unfinished
+        if items and not bulleted and text[0].islower() and not items[-1].endswith("."):
+            items[-1] = f"{items[-1]} {text}"
+        else:
+            items.append(text)
+    return [i.rstrip(".;").strip() for i in items if len(i.strip()) > 2]
+
+
+# ----------------------------- FUNCTION: segment locally -----------------------------
+def segment_job_description_local(text: str) -> Tuple[str, float]:
+    """Segment a JD without the model.
+
+    Returns ``(segmented_text, confidence)``; the text uses the same
+    "Non-Negotiable Requirements:" / "Negotiable Requirements:" layout as the model.
+    """
+    sections: List[Tuple[str, List[str]]] = []
+    current = None
+    for line in (text or "").replace("\r\n", "\n").split("\n"):
+        stripped = line.strip()
+        kind = _heading_kind(stripped) if stripped and len(stripped) <= 60 else None
+        if kind is None and ":" in stripped:
+            # inline heading: "Nice to have: Docker, Kubernetes"
+            head, rest = stripped.split(":", 1)
+            inline_kind = _heading_kind(head)
+            if inline_kind and rest.strip():
+                current = (inline_kind, [rest.strip()])
+                sections.append(current)
+                continue
+        if kind:
+            current = (kind, [])
+            sections.append(current)
+        elif current is not None:
+            current[1].append(line)
+
+    must, nice, confidences = [], [], []
+    missed = 0
+    for kind, lines in sections:
+        if kind == "skip":
+            # requirement wording inside e.g. "About the role" means a requirement list may hide there
+            missed += sum(1 for item in _items(lines) if STRONG_MUST.search(item) or STRONG_NICE.search(item))
+            continue
+        for item in _items(lines):
+            if _heading_kind(item):
+                continue
+            is_must, conf = _classify(item, kind)
+            (must if is_must else nice).append(item)
+            confidences.append(conf)
+
+    out_lines = ["Non-Negotiable Requirements:"]
+    out_lines.extend(f"{i}. {it}" for i, it in enumerate(_dedupe(must), 1))
+    out_lines.append("")
+    out_lines.append("Negotiable Requirements:")
+    out_lines.extend(f"{i}. {it}" for i, it in enumerate(_dedupe(nice), 1))
+
+    if not confidences:
+        return "\n".join(out_lines), 0.0
+    coverage = len(confidences) / (len(confidences) + missed)
+    confidence = coverage * sum(confidences) / len(confidences)
+    return "\n".join(out_lines), round(confidence, 3)
+
+
+def _dedupe(items: List[str]) -> List[str]:
+    seen, out = set(), []
+    for it in items:
+        if it.lower() not in seen:
+            seen.add(it.lower())
+            out.append(it)
+    return out
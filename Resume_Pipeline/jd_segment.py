@@ -3,7 +3,12 @@
 
 import os
 import json
+import logging
 from . import config
+from .jd_local_segment import segment_job_description_local
+from .compaction import compact_text
+from .circuit_breaker import CircuitOpenError
+from .cost_ledger import BudgetExceeded, attribute
 
 # -----------------------------
 # CONFIG (from finalCode.config)
@@ -12,6 +17,10 @@ INPUT_FOLDER = config.JD_INPUT_FOLDER
 OUTPUT_FOLDER = config.JD_SEGMENTED_FOLDER
 SKIP_EXISTING = config.SKIP_EXISTING
 DEPLOYMENT_NAME = config.DEPLOYMENT_NAME
+LOCAL_SEGMENTATION = config.JD_LOCAL_SEGMENTATION
+LOCAL_CONFIDENCE = config.JD_LOCAL_CONFIDENCE
+
+logger = logging.getLogger(__name__)
 
 # Note: client initialization happens lazily inside call helpers to avoid
 # requiring OPENAI_API_KEY at import time (supports dry-run/testing).
@@ -38,54 +47,42 @@ SEGMENTATION_SYSTEM_PROMPT = (
 # FUNCTION: segment job description
 # -----------------------------
 def segment_job_description(text: str, dry_run: bool = False) -> str:
-    """Segment a job description. If dry_run=True, use heuristics and avoid API calls."""
+    """Segment a job description.
+
+    The local heading/bullet classifier runs first; its result is used when its
+    confidence reaches LOCAL_CONFIDENCE (or always when dry_run=True, which never
+    calls the API). Otherwise the model segments the JD, unless that would exceed a
+    cost budget and LEDGER_BUDGET_ACTION is "local".
+    """
+    local_text, confidence = segment_job_description_local(text)
     if dry_run:
-        # Simple heuristic: extract Must-Have / Nice-to-Have sections if present
-        lowered = text.lower()
-        must = []
-        nice = []
-        import re
-
-        m = re.search(r"must[- ]?have:(.*?)(?:nice[- ]?to[- ]?have:|$)", text, flags=re.IGNORECASE | re.S)
-        if m:
-            must_text = m.group(1).strip()
-            must = [line.strip() for line in must_text.splitlines() if line.strip()]
-        else:
-            # fallback: look for Requirements section
-            m2 = re.search(r"requirements(.*)", text, flags=re.IGNORECASE | re.S)
-            if m2:
-                must = [line.strip() for line in m2.group(1).splitlines() if line.strip()]
-
-        n = re.search(r"nice[- ]?to[- ]?have:(.*)", text, flags=re.IGNORECASE | re.S)
-        if n:
-            nice_text = n.group(1).strip()
-            nice = [line.strip() for line in nice_text.splitlines() if line.strip()]
-
-        out_lines = ["Non-Negotiable Requirements:"]
-        if must:
-            for i, it in enumerate(must, 1):
-                out_lines.append(f"{i}. {it}")
-        else:
-            out_lines.append("(none)")
-
-        out_lines.append("\nNegotiable Requirements:")
-        if nice:
-            for i, it in enumerate(nice, 1):
-                out_lines.append(f"{i}. {it}")
-        else:
-            out_lines.append("(none)")
-
-        return "\n".join(out_lines)
-    messages = [
-        {"role": "system", "content": SEGMENTATION_SYSTEM_PROMPT},
-        {"role": "user", "content": text},
-    ]
+        return local_text
 
+    if LOCAL_SEGMENTATION and confidence >= LOCAL_CONFIDENCE:
+        logger.info("Local JD segmentation used (confidence %.2f)", confidence)
+        return local_text
+
+    logger.info("Local JD segmentation confidence %.2f below %.2f; calling model", confidence, LOCAL_CONFIDENCE)
     from .openai_client import call_chat_completions
 
-    response = call_chat_completions(messages, model=DEPLOYMENT_NAME)
+    try:
+        with attribute(stage="jd_segment"):
+            response = call_chat_completions(segmentation_messages(text), model=DEPLOYMENT_NAME)
+    except BudgetExceeded as e:
+        if config.LEDGER_BUDGET_ACTION != "local":
+            raise
+        logger.warning("%s; using the local JD segmentation (confidence %.2f)", e, confidence)
+        return local_text
     return response.choices[0].message.content
 
+
+def segmentation_messages(text: str) -> list:
+    """The model segmentation prompt for one job description."""
+    return [
+        {"role": "system", "content": SEGMENTATION_SYSTEM_PROMPT},
+        {"role": "user", "content": compact_text(text)},
+    ]
+
 # -----------------------------
 # FUNCTION to process and segment each file
 # -----------------------------
@@ -116,10 +113,16 @@ def main():
         os.makedirs(OUTPUT_FOLDER, exist_ok=True)
 
     files = [f for f in os.listdir(INPUT_FOLDER) if f.endswith(".txt")]
-    for fname in files:
-        process_file(fname)
+    try:
+        for fname in files:
+            process_file(fname)
+    except CircuitOpenError as e:
+        print(f"Stopping: {e}. Job descriptions already segmented are kept; rerun to continue.")
+        return
     print("Done. Segmented job descriptions saved in:", OUTPUT_FOLDER)
 
 
 if __name__ == "__main__":
+    from .logging_util import setup_logging
+    setup_logging()
     main()
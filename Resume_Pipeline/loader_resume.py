@@ -1,36 +1,71 @@
 #loader_resume.py
-# Robust PDF/DOCX loader: region-based extraction for PDFs, text extraction for DOCX,
+# Robust PDF/DOCX loader: region-based extraction for PDFs, streaming XML extraction for DOCX,
 # multi-column detection with vertical alignment, OCR fallbacks.
 
+import io
+import os
 import re
+import time
+import shutil
+import zipfile
 import unicodedata
+import signal
 import subprocess
+import threading
 import tempfile
+import xml.etree.ElementTree as ET
+from collections import deque
+from functools import lru_cache
+from importlib.util import find_spec
 from pathlib import Path
-from typing import List, Tuple
+from typing import Iterator, List, Optional, Tuple, Union
+
+from . import config
+
+# Optional backends are detected without importing them; the modules themselves are loaded
+# on first use (PyMuPDF and pdfplumber add ~0.3s to import time). DOCX needs only the stdlib.
+HAS_PYMUPDF = find_spec("fitz") is not None                   # Prefer PyMuPDF; fallback to pdfplumber
+HAS_NUMPY = find_spec("numpy") is not None                    # Vectorized layout analysis; fallback to tuples
+# Optional OCR fallback: pages are rendered one at a time by PyMuPDF (or pdf2image) for the tesseract CLI
+HAS_PURE_OCR = shutil.which(config.TESSERACT_CMD) is not None and (HAS_PYMUPDF or find_spec("pdf2image") is not None)
+
+# A page with less text than this is OCR'd by iter_resume_pages
+PAGE_MIN_CHARS = 20
+# Pages are joined with a form feed line, which compaction.compact_text reads as a page break
+PAGE_BREAK = "\n\f\n"
+# Pages with at least this many blocks use the NumPy layout analysis (below it the tuple path is quicker)
+VECTOR_LAYOUT_MIN_BLOCKS = 50
+
+_fitz_module = None
+
 
-# DOCX support
-try:
-    from docx import Document
-    HAS_DOCX = True
-except Exception:
-    HAS_DOCX = False
+def _fitz():
+    """Import PyMuPDF on first use."""
+    global _fitz_module
+    if _fitz_module is None:
+        import fitz  # PyMuPDF
+        _fitz_module = fitz
+    return _fitz_module
 
-# Prefer PyMuPDF; fallback to pdfplumber
-try:
-    import fitz  # PyMuPDF
-    HAS_PYMUPDF = True
-except Exception:
-    HAS_PYMUPDF = False
-    import pdfplumber  # type: ignore
 
-# Optional OCR fallback
-try:
-    from pdf2image import convert_from_path
-    import pytesseract
-    HAS_PURE_OCR = True
-except Exception:
-    HAS_PURE_OCR = False
+def _numpy():
+    """Import NumPy on first use."""
+    import numpy
+    return numpy
+
+
+def warm_up():
+    """Load the PDF backend and run the PDF engine once so the first request does not pay for it."""
+    if HAS_PYMUPDF:
+        doc = _fitz().open()
+        page = doc.new_page()
+        page.insert_text((72, 72), "warm-up")
+        page.get_text("dict")
+        doc.close()
+    else:
+        import pdfplumber  # noqa: F401
+    if HAS_NUMPY:
+        _numpy()
 
 
 
@@ -50,6 +85,40 @@ def _clean_text(s: str) -> str:
 
 
 
+# --------------------------------------------------
+# Per-document limits (pages, bytes, seconds)
+# --------------------------------------------------
+class ResumeTooLarge(ValueError):
+    """Raised when a resume file is larger than the byte limit."""
+
+
+def _resolve_limits(max_pages=None, max_bytes=None, max_seconds=None):
+    """Fill unset limits from config; 0 disables a limit. Returns (max_pages, max_bytes, expires)."""
+    max_pages = config.RESUME_MAX_PAGES if max_pages is None else max_pages
+    max_bytes = config.RESUME_MAX_BYTES if max_bytes is None else max_bytes
+    max_seconds = config.RESUME_MAX_SECONDS if max_seconds is None else max_seconds
+    expires = time.monotonic() + max_seconds if max_seconds else None
+    return max_pages, max_bytes, expires
+
+
+def _check_size(path: Path, max_bytes: int):
+    size = path.stat().st_size
+    if max_bytes and size > max_bytes:
+        raise ResumeTooLarge(f"{path.name} is {size} bytes (limit {max_bytes})")
+
+
+def _within_limits(path: Path, index: int, max_pages: int, expires: Optional[float]) -> bool:
+    """False (with a warning) once the page or time limit stops extraction; earlier pages are kept."""
+    if max_pages and index >= max_pages:
+        print(f"[WARNING] {path.name}: stopped after {max_pages} pages (RESUME_MAX_PAGES)")
+        return False
+    if expires is not None and time.monotonic() > expires:
+        print(f"[WARNING] {path.name}: stopped at page {index + 1}, time limit reached (RESUME_MAX_SECONDS)")
+        return False
+    return True
+
+
+
 # --------------------------------------------------
 # Metadata detection (critical for avoiding false columns)
 # --------------------------------------------------
@@ -75,20 +144,35 @@ def _is_metadata_span(text: str) -> bool:
 # --------------------------------------------------
 # Basic PyMuPDF fallback methods
 # --------------------------------------------------
-def _extract_text_reading_order_pymupdf(pdf_path: Path) -> str:
-    doc = fitz.open(str(pdf_path))
-    return "\n".join(p.get_text("text") for p in doc)
+def _iter_pdf_pages(pdf_path: Path, extract, max_pages: int = 0, expires: Optional[float] = None) -> Iterator:
+    """Yield ``extract(page)`` one page at a time (only the current page is loaded), within the limits."""
+    doc = _fitz().open(str(pdf_path))
+    try:
+        for index in range(doc.page_count):
+            if not _within_limits(pdf_path, index, max_pages, expires):
+                break
+            yield extract(doc.load_page(index))
+    finally:
+        doc.close()
+
 
+def _page_text_reading_order(page) -> str:
+    return page.get_text("text")
 
-def _extract_text_blocks_sorted_pymupdf(pdf_path: Path) -> str:
-    doc = fitz.open(str(pdf_path))
-    out = []
-    for page in doc:
-        blocks = page.get_text("blocks")
-        blocks = [b for b in blocks if isinstance(b[4], str) and b[4].strip()]
-        blocks.sort(key=lambda b: (round(b[1], 1), round(b[0], 1)))
-        out.append("\n".join(b[4].strip() for b in blocks))
-    return "\n\n".join(out)
+
+def _page_text_blocks_sorted(page) -> str:
+    blocks = page.get_text("blocks")
+    blocks = [b for b in blocks if isinstance(b[4], str) and b[4].strip()]
+    blocks.sort(key=lambda b: (round(b[1], 1), round(b[0], 1)))
+    return "\n".join(b[4].strip() for b in blocks)
+
+
+def _extract_text_reading_order_pymupdf(pdf_path: Path, max_pages: int = 0, expires: Optional[float] = None) -> str:
+    return PAGE_BREAK.join(_iter_pdf_pages(pdf_path, _page_text_reading_order, max_pages, expires))
+
+
+def _extract_text_blocks_sorted_pymupdf(pdf_path: Path, max_pages: int = 0, expires: Optional[float] = None) -> str:
+    return PAGE_BREAK.join(_iter_pdf_pages(pdf_path, _page_text_blocks_sorted, max_pages, expires))
 
 
 
@@ -209,46 +293,125 @@ def _region_to_text(region_blocks, page_width, gap_frac=0.06):
 
 
 
+# --------------------------------------------------
+# Vectorized layout analysis (NumPy): same rules as above
+# --------------------------------------------------
+def _columns_aligned(box, left, right) -> int:
+    """Number of left blocks that vertically overlap some right block (sorted sweep, not all pairs)."""
+    np = _numpy()
+    right = right[np.argsort(box[right, 1], kind="stable")]
+    top = box[right, 1]
+    reach = np.maximum.accumulate(box[right, 3])       # lowest bottom among right blocks starting above
+    k = np.searchsorted(top, box[left, 3], side="right")  # right blocks starting at or above each left bottom
+    hit = (k > 0) & (reach[np.maximum(k - 1, 0)] >= box[left, 1])
+    return int(np.count_nonzero(hit))
+
+
+def _region_columns_np(box, raw, region, page_width, gap_frac=0.06):
+    """Vectorized _region_try_split_columns over block indices; returns (left, right) or None."""
+    np = _numpy()
+    if len(region) < 6:
+        return None
+
+    by_x = region[np.argsort(box[region, 0], kind="stable")]
+    gaps = np.diff(box[by_x, 0])
+    idx = int(np.argmax(gaps))
+    if gaps[idx] < gap_frac * page_width:
+        return None
+
+    left, right = by_x[:idx + 1], by_x[idx + 1:]
+    if sum(_is_metadata_span(raw[i]) for i in right) >= len(right) * 0.7:
+        return None
+    if len(left) < 2 or len(right) < 2:
+        return None
+    if _columns_aligned(box, left, right) < 2:
+        return None
+    return left, right
+
+
+def _layout_text_np(blocks, page_width, page_height, gap_frac=0.06, y_gap_frac=0.04) -> str:
+    """Region + column layout of one page over a NumPy array of block coordinates."""
+    np = _numpy()
+    tblocks = [b for b in blocks if isinstance(b[4], str) and b[4].strip()]
+    if not tblocks:
+        return ""
+
+    # one y-sort per page; everything below works on indices into it
+    box = np.array([b[:4] for b in tblocks], dtype=float)
+    order = np.argsort(box[:, 1], kind="stable")
+    box = box[order]
+    raw = [tblocks[i][4] for i in order]
+    text = [t.strip() for t in raw]
+    # reading-order keys rounded like the tuple path (Python round on Python floats)
+    ry = np.array([round(v, 2) for v in box[:, 1].tolist()])
+    rx = np.array([round(v, 2) for v in box[:, 0].tolist()])
+
+    def ordered(ix):
+        return "\n".join(text[i] for i in ix[np.lexsort((rx[ix], ry[ix]))])
+
+    cuts = np.flatnonzero(box[1:, 1] - box[:-1, 3] > y_gap_frac * page_height) + 1
+    region_texts = []
+    for region in np.split(np.arange(len(text)), cuts):
+        columns = _region_columns_np(box, raw, region, page_width, gap_frac=gap_frac)
+        if columns is None:
+            rt = ordered(region)
+        else:
+            rt = ordered(columns[0]) + "\n\n" + ordered(columns[1])
+        if rt.strip():
+            region_texts.append(rt)
+
+    return "\n\n".join(region_texts)
+
+
+
 # --------------------------------------------------
 # Region-based extraction for whole PDF
 # --------------------------------------------------
-def _extract_text_regions_pymupdf(pdf_path: Path, gap_frac=0.06, y_gap_frac=0.04):
-    doc = fitz.open(str(pdf_path))
-    page_out = []
+def _page_text_regions(page, gap_frac=0.06, y_gap_frac=0.04) -> str:
+    page_w = page.rect.width
+    page_h = page.rect.height
+    blocks = page.get_text("blocks")
+    if HAS_NUMPY and len(blocks) >= VECTOR_LAYOUT_MIN_BLOCKS:
+        return _layout_text_np(blocks, page_w, page_h, gap_frac=gap_frac, y_gap_frac=y_gap_frac)
 
-    for page in doc:
-        page_w = page.rect.width
-        page_h = page.rect.height
-        blocks = page.get_text("blocks")
+    regions = _group_blocks_into_regions(blocks, page_h, y_gap_frac=y_gap_frac)
+    region_texts = []
 
-        regions = _group_blocks_into_regions(blocks, page_h, y_gap_frac=y_gap_frac)
-        region_texts = []
+    for region in regions:
+        rt = _region_to_text(region, page_w, gap_frac=gap_frac)
+        if rt.strip():
+            region_texts.append(rt)
 
-        for region in regions:
-            rt = _region_to_text(region, page_w, gap_frac=gap_frac)
-            if rt.strip():
-                region_texts.append(rt)
+    return "\n\n".join(region_texts)
 
-        page_out.append("\n\n".join(region_texts))
 
-    return "\n\n".join(page_out)
+def _extract_text_regions_pymupdf(pdf_path: Path, gap_frac=0.06, y_gap_frac=0.04, max_pages: int = 0,
+                                  expires: Optional[float] = None):
+    extract = lambda page: _page_text_regions(page, gap_frac=gap_frac, y_gap_frac=y_gap_frac)
+    return PAGE_BREAK.join(_iter_pdf_pages(pdf_path, extract, max_pages, expires))
 
 
 
 # --------------------------------------------------
 # pdfplumber fallback
 # --------------------------------------------------
-def _extract_with_pdfplumber(pdf_path: Path) -> str:
+def _iter_pdfplumber_pages(pdf_path: Path, max_pages: int = 0, expires: Optional[float] = None) -> Iterator[str]:
+    """Yield the text of each page, releasing each page's cached objects before the next."""
+    import pdfplumber
+    with pdfplumber.open(str(pdf_path)) as pdf:
+        for index, page in enumerate(pdf.pages):
+            if not _within_limits(pdf_path, index, max_pages, expires):
+                break
+            yield page.extract_text() or ""
+            if hasattr(page, "close"):
+                page.close()
+
+
+def _extract_with_pdfplumber(pdf_path: Path, max_pages: int = 0, expires: Optional[float] = None) -> str:
     """Extract text using pdfplumber as fallback when PyMuPDF is not available."""
     try:
-        import pdfplumber
-        text_parts = []
-        with pdfplumber.open(str(pdf_path)) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text_parts.append(page_text)
-        return "\n\n".join(text_parts)
+        text_parts = [t for t in _iter_pdfplumber_pages(pdf_path, max_pages, expires) if t]
+        return PAGE_BREAK.join(text_parts)
     except Exception as e:
         print(f"[ERROR] pdfplumber extraction failed: {e}")
         return ""
@@ -257,6 +420,25 @@ def _extract_with_pdfplumber(pdf_path: Path) -> str:
 # --------------------------------------------------
 # OCR routes
 # --------------------------------------------------
+_OCR_STATS = {"documents": 0, "cache_hits": 0, "runs": 0, "timeouts": 0, "failures": 0, "seconds": 0.0}
+_ocr_stats_lock = threading.Lock()
+
+
+def ocr_stats() -> dict:
+    """OCR counters of this process: documents that needed OCR, cache hits, OCR runs and their total time."""
+    with _ocr_stats_lock:
+        return dict(_OCR_STATS)
+
+
+def record_ocr(delta: dict):
+    """Add OCR counters reported by another process (an extraction worker)."""
+    with _ocr_stats_lock:
+        for key, value in delta.items():
+            if key in _OCR_STATS:
+                _OCR_STATS[key] += value
+
+
+@lru_cache(maxsize=1)
 def _has_ocrmypdf():
     try:
         subprocess.run(["ocrmypdf", "--version"], stdout=subprocess.DEVNULL,
@@ -266,84 +448,429 @@ def _has_ocrmypdf():
         return False
 
 
-def _ocr_with_ocrmypdf(src: Path):
+def _ocr_timeout(expires: Optional[float]) -> Optional[float]:
+    """Seconds an OCR run may take: OCR_TIMEOUT, cut to the document's time limit (None = no limit)."""
+    limits = [config.OCR_TIMEOUT] if config.OCR_TIMEOUT > 0 else []
+    if expires is not None:
+        limits.append(max(0.0, expires - time.monotonic()))
+    return min(limits) if limits else None
+
+
+# Process groups of the OCR runs in flight in this process (see kill_ocr_groups)
+_ocr_groups = set()
+_ocr_groups_lock = threading.RLock()  # re-entrant: the extraction timeout alarm may interrupt a holder
+
+
+def _kill_group(proc: subprocess.Popen):
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    else:
+        proc.kill()
+
+
+def kill_ocr_groups():
+    """Kill every OCR process group started by this process (called when an extraction worker is
+    stopped, so ocrmypdf and its tesseract children do not outlive it)."""
+    with _ocr_groups_lock:
+        procs = list(_ocr_groups)
+    for proc in procs:
+        _kill_group(proc)
+
+
+def _run_killable(cmd: List[str], timeout: Optional[float], env: Optional[dict] = None) -> bytes:
+    """Run ``cmd`` in its own process group and return its stdout; on timeout kill the whole group
+    (ocrmypdf's tesseract children included) and re-raise TimeoutExpired."""
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True, env=env)
+    with _ocr_groups_lock:
+        _ocr_groups.add(proc)
+    try:
+        out, err = proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        _kill_group(proc)
+        proc.communicate()
+        raise
+    finally:
+        with _ocr_groups_lock:
+            _ocr_groups.discard(proc)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd, stderr=err)
+    return out
+
+
+def _ocr_with_ocrmypdf(src: Path, lang="eng", max_pages: int = 0, expires: Optional[float] = None):
+    # plain PDF output: PDF/A conversion (Ghostscript) adds time and the file is only read back for its text
+    settings = ocr_settings()
+    cmd = ["ocrmypdf", "--skip-text", "--output-type", "pdf", "--optimize", "0", "--fast-web-view", "0",
+           "--jobs", str(max(1, config.OCR_JOBS)), "--language", lang, "--quiet",
+           "--tesseract-pagesegmode", str(settings["psm"]), "--tesseract-oem", str(settings["oem"])]
+    if max_pages:
+        cmd += ["--pages", f"1-{max_pages}"]
     with tempfile.TemporaryDirectory() as td:
         out_pdf = Path(td) / "ocr.pdf"
-        subprocess.run(
-            ["ocrmypdf", "--skip-text", "--fast-web-view", "1", str(src), str(out_pdf)],
-            check=True
-        )
+        _run_killable(cmd + [str(src), str(out_pdf)], _ocr_timeout(expires), env=_tesseract_env(settings))
         if HAS_PYMUPDF:
-            return _extract_text_reading_order_pymupdf(out_pdf)
-        return _extract_with_pdfplumber(out_pdf)
+            return _extract_text_reading_order_pymupdf(out_pdf, max_pages, expires)
+        return _extract_with_pdfplumber(out_pdf, max_pages, expires)
 
 
-def _ocr_pure_python(src: Path, lang="eng"):
+def _ocr_document(src: Path, lang="eng", max_pages: int = 0, expires: Optional[float] = None) -> str:
+    """OCR a PDF without a usable text layer: cached text by content hash, else ocrmypdf, then the
+    pure-Python route if the result is still sparse. Complete results are cached; timed-out ones are not."""
+    cache = None
+    try:
+        from .ocr_cache import cache_key, get_cache, pdf_digest
+        cache = get_cache()
+        key = cache_key(pdf_digest(src), lang, max_pages, ocr_settings_tag(ocr_settings())) if cache else None
+        cached = cache.get(key) if cache else None
+    except Exception as e:
+        print(f"[WARNING] OCR cache unavailable: {e}")
+        cache, cached = None, None
+    with _ocr_stats_lock:
+        _OCR_STATS["documents"] += 1
+        _OCR_STATS["cache_hits"] += cached is not None
+    if cached is not None:
+        print(f"[DEBUG] OCR cache hit for {src.name}")
+        return cached
+
+    start, txt, complete = time.monotonic(), "", True
+    for name, route, available in (("ocrmypdf", _ocr_with_ocrmypdf, _has_ocrmypdf),
+                                   ("tesseract", _ocr_pure_python, lambda: HAS_PURE_OCR)):
+        if not _is_sparse(txt) or not available():
+            continue
+        with _ocr_stats_lock:
+            _OCR_STATS["runs"] += 1
+        try:
+            txt = route(src, lang=lang, max_pages=max_pages, expires=expires) or txt
+        except subprocess.TimeoutExpired:
+            complete = False
+            with _ocr_stats_lock:
+                _OCR_STATS["timeouts"] += 1
+            print(f"[WARNING] {name} OCR of {src.name} killed: time limit reached (OCR_TIMEOUT / RESUME_MAX_SECONDS)")
+        except Exception as e:
+            with _ocr_stats_lock:
+                _OCR_STATS["failures"] += 1
+            if isinstance(e, subprocess.CalledProcessError) and e.stderr:
+                e = e.stderr.decode("utf-8", "replace").strip().splitlines()[-1]
+            print(f"[WARNING] {name} OCR of {src.name} failed: {str(e).strip()[:200]}")
+    seconds = time.monotonic() - start
+    with _ocr_stats_lock:
+        _OCR_STATS["seconds"] += seconds
+    print(f"[DEBUG] OCR of {src.name}: {len(txt.strip())} chars in {seconds:.2f}s")
+
+    if cache and complete and (expires is None or time.monotonic() <= expires) and txt.strip():
+        try:
+            cache.put(key, txt, seconds)
+        except Exception as e:
+            print(f"[WARNING] OCR cache write failed: {e}")
+    return txt
+
+
+# Rendering and recognition presets. Tesseract binarizes internally, so grayscale rendering loses nothing and
+# is a third of the bitmap; explicit Otsu binarization plus a single-block layout (psm 6) is quicker on clean
+# scans but can merge columns. One thread per tesseract process: pages already run OCR_JOBS at a time.
+OCR_PRESETS = {
+    "fast": {"dpi": 150, "grayscale": True, "binarize": True, "psm": 6, "oem": 1, "threads": 1},
+    "balanced": {"dpi": 200, "grayscale": True, "binarize": False, "psm": 3, "oem": 1, "threads": 1},
+    "accurate": {"dpi": 300, "grayscale": True, "binarize": False, "psm": 3, "oem": 1, "threads": 1},
+}
+
+
+def _env_flag(value: str, default: bool) -> bool:
+    return default if value == "" else value in ("1", "true", "yes")
+
+
+def ocr_settings(preset: str = None) -> dict:
+    """Settings of ``preset``, or of OCR_PRESET with the OCR_* overrides from config applied."""
+    name = preset or config.OCR_PRESET
+    if name not in OCR_PRESETS:
+        raise ValueError(f"unknown OCR preset {name!r} (choose from {', '.join(OCR_PRESETS)})")
+    settings = dict(OCR_PRESETS[name], preset=name)
+    if preset is None:
+        settings["dpi"] = config.OCR_DPI or settings["dpi"]
+        settings["grayscale"] = _env_flag(config.OCR_GRAYSCALE, settings["grayscale"])
+        settings["binarize"] = _env_flag(config.OCR_BINARIZE, settings["binarize"])
+        settings["psm"] = config.OCR_PSM or settings["psm"]
+        settings["oem"] = settings["oem"] if config.OCR_OEM < 0 else config.OCR_OEM
+        settings["threads"] = config.OCR_THREADS or settings["threads"]
+    return settings
+
+
+def ocr_settings_tag(settings: dict) -> str:
+    """The settings that change the recognized text, as a short string (threads do not)."""
+    return "dpi{dpi}-g{grayscale:d}-b{binarize:d}-psm{psm}-oem{oem}".format(**settings)
+
+
+def _tesseract_config(settings: dict) -> str:
+    return f"--psm {settings['psm']} --oem {settings['oem']}"
+
+
+def _tesseract_env(settings: dict) -> dict:
+    """Environment for tesseract runs (direct or under ocrmypdf): tesseract reads its thread count
+    from OMP_THREAD_LIMIT, set here per subprocess rather than in os.environ shared by every thread."""
+    return {**os.environ, "OMP_THREAD_LIMIT": str(settings["threads"])}
+
+
+def _otsu_threshold(histogram: List[int]) -> int:
+    """Gray level that best separates ink from paper (Otsu's method on a 256-bin histogram)."""
+    total = sum(histogram)
+    weighted_total = sum(i * h for i, h in enumerate(histogram))
+    best, threshold, count, weighted = -1.0, 127, 0, 0
+    for level, h in enumerate(histogram):
+        count += h
+        if count == 0 or count == total:
+            continue
+        weighted += level * h
+        mean_low = weighted / count
+        mean_high = (weighted_total - weighted) / (total - count)
+        between = count * (total - count) * (mean_low - mean_high) ** 2
+        if between > best:
+            best, threshold = between, level
+    return threshold
+
+
+def _prepare_image(img, settings: dict):
+    """Apply the grayscale / binarization settings to a rendered page (the input image is closed)."""
+    out = img
+    if (settings["grayscale"] or settings["binarize"]) and img.mode != "L":
+        out = img.convert("L")
+    if settings["binarize"]:
+        threshold = _otsu_threshold(out.histogram())
+        out = out.point([0 if v <= threshold else 255 for v in range(256)])
+    if out is not img:
+        img.close()
+    return out
+
+
+def _render_page(page, dpi: int, grayscale: bool = False):
+    """Render one PyMuPDF page to a PIL image."""
+    from PIL import Image
+    if grayscale:
+        pix = page.get_pixmap(dpi=dpi, colorspace=_fitz().csGRAY)
+        return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+    pix = page.get_pixmap(dpi=dpi)
+    return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+
+
+def _iter_page_images(src: Path, max_pages: int = 0, expires: Optional[float] = None,
+                      settings: dict = None) -> Iterator:
+    """Yield one rendered, prepared page image at a time, so only a single page bitmap is alive."""
+    settings = settings or ocr_settings()
+    dpi, gray = settings["dpi"], settings["grayscale"] or settings["binarize"]
+    if HAS_PYMUPDF:
+        render = lambda page: _prepare_image(_render_page(page, dpi, gray), settings)
+        yield from _iter_pdf_pages(src, render, max_pages, expires)
+        return
+    from pdf2image import convert_from_path, pdfinfo_from_path
+    for index in range(int(pdfinfo_from_path(str(src))["Pages"])):
+        if not _within_limits(src, index, max_pages, expires):
+            break
+        page = convert_from_path(str(src), dpi=dpi, first_page=index + 1, last_page=index + 1, grayscale=gray)[0]
+        yield _prepare_image(page, settings)
+
+
+def _ocr_image(img, lang="eng", timeout: Optional[float] = None, settings: dict = None) -> str:
+    """Tesseract on one page image; raises TimeoutExpired (tesseract killed) once ``timeout`` passes."""
+    settings = settings or ocr_settings()
+    try:
+        with tempfile.TemporaryDirectory() as td:
+            page = os.path.join(td, "page.png")
+            img.save(page)
+            cmd = [config.TESSERACT_CMD, page, "stdout", "-l", lang] + _tesseract_config(settings).split()
+            out = _run_killable(cmd, timeout, env=_tesseract_env(settings))
+        return out.decode("utf-8", errors="replace")
+    finally:
+        img.close()
+
+
+def _ocr_pure_python(src: Path, lang="eng", max_pages: int = 0, expires: Optional[float] = None,
+                     settings: dict = None, jobs: int = None):
+    """Tesseract on rendered pages, OCR_JOBS pages at a time (at most that many page images alive)."""
     if not HAS_PURE_OCR:
         return ""
-    pages = convert_from_path(str(src))
-    return "\n\n".join(pytesseract.image_to_string(img, lang=lang) for img in pages)
+    limit = _ocr_timeout(expires)
+    ends = None if limit is None else time.monotonic() + limit
+
+    def left():
+        return None if ends is None else max(0.01, ends - time.monotonic())
+
+    settings = settings or ocr_settings()
+    pages = _iter_page_images(src, max_pages, expires, settings)
+    jobs = max(1, jobs or config.OCR_JOBS)
+    if jobs == 1:
+        return PAGE_BREAK.join(_ocr_image(img, lang, left(), settings) for img in pages)
+
+    from concurrent.futures import ThreadPoolExecutor
+    texts, pending = [], deque()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for img in pages:
+            pending.append(executor.submit(_ocr_image, img, lang, left(), settings))
+            if len(pending) >= jobs:
+                texts.append(pending.popleft().result())
+        texts.extend(f.result() for f in pending)
+    return PAGE_BREAK.join(texts)
+
+
+
+# --------------------------------------------------
+# DOCX extraction (streamed from the zip, no object model)
+# --------------------------------------------------
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+# characters produced by run-level elements, as python-docx renders them
+_DOCX_RUN_TEXT = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+
+
+def _docx_part_lines(stream) -> Iterator[str]:
+    """
+    Yield the text of each paragraph of one WordprocessingML part in document order.
+    Table cells come row by row and text boxes where they are anchored; the VML copy of a
+    text box (mc:Fallback) and deleted text are skipped. Finished paragraphs are cleared,
+    so memory stays flat however long the document is.
+    """
+    paragraphs = []  # text of the open paragraphs (a text box nests paragraphs inside a run)
+    skip = 0
+    for event, el in ET.iterparse(stream, events=("start", "end")):
+        tag = el.tag
+        if tag == _MC_FALLBACK:
+            skip += 1 if event == "start" else -1
+            continue
+        if skip:
+            continue
+        if event == "start":
+            if tag == _W + "p":
+                paragraphs.append([])
+            continue
+
+        if tag == _W + "p":
+            yield "".join(paragraphs.pop())
+            el.clear()
+        elif not paragraphs:
+            continue
+        elif tag == _W + "t":
+            paragraphs[-1].append(el.text or "")
+        elif tag == _W + "br":
+            if el.get(_W + "type", "textWrapping") == "textWrapping":
+                paragraphs[-1].append("\n")
+        elif tag in _DOCX_RUN_TEXT:
+            paragraphs[-1].append(_DOCX_RUN_TEXT[tag])
+
+
+def extract_docx_text(source: Union[str, Path, bytes]) -> str:
+    """
+    Text of a DOCX file (path or bytes in memory): headers, then the body including tables
+    and text boxes, then footers. Repeated headers/footers (first-page / even-page copies) appear once.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as z:
+        names = z.namelist()
+        part_no = lambda n: int(re.sub(r"\D", "", n) or 0)
+        headers = sorted((n for n in names if re.fullmatch(r"word/header\d*\.xml", n)), key=part_no)
+        footers = sorted((n for n in names if re.fullmatch(r"word/footer\d*\.xml", n)), key=part_no)
+
+        parts, seen = [], set()
+        for name in headers + ["word/document.xml"] + footers:
+            with z.open(name) as f:
+                text = "\n".join(_docx_part_lines(f))
+            if name != "word/document.xml" and (not text.strip() or text in seen):
+                continue
+            seen.add(text)
+            parts.append(text)
+    return "\n".join(parts)
 
 
 
 # --------------------------------------------------
 # Public API
 # --------------------------------------------------
-def load_resume(resume_path: str, ocr_lang="eng", gap_frac=0.06) -> str:
+def _docx_text(file_path: Path) -> str:
+    return _clean_text(extract_docx_text(file_path))
+
+
+def _page_text_or_ocr(page, gap_frac: float, ocr_lang: str) -> str:
+    txt = _page_text_regions(page, gap_frac=gap_frac)
+    if len(txt.strip()) < PAGE_MIN_CHARS and HAS_PURE_OCR:
+        try:
+            settings = ocr_settings()
+            img = _prepare_image(_render_page(page, settings["dpi"], settings["grayscale"]), settings)
+            txt = _ocr_image(img, ocr_lang, _ocr_timeout(None), settings) or txt
+        except Exception as e:
+            print(f"[WARNING] OCR failed for page {page.number + 1}: {e}")
+    return txt
+
+
+def iter_resume_pages(resume_path: str, ocr_lang="eng", gap_frac=0.06, max_pages: int = None,
+                      max_bytes: int = None, max_seconds: float = None) -> Iterator[str]:
+    """
+    Yield the cleaned text of a resume one page at a time (a DOCX is a single chunk).
+    Only the current page is loaded; pages with no text layer are OCR'd individually.
+    Stops after max_pages pages or max_seconds (defaults: RESUME_MAX_PAGES / RESUME_MAX_SECONDS);
+    raises ResumeTooLarge for files over max_bytes (RESUME_MAX_BYTES). 0 disables a limit.
+    """
+    file_path = Path(resume_path)
+    max_pages, max_bytes, expires = _resolve_limits(max_pages, max_bytes, max_seconds)
+    _check_size(file_path, max_bytes)
+
+    if file_path.suffix.lower() == '.docx':
+        yield _docx_text(file_path)
+        return
+
+    if HAS_PYMUPDF:
+        pages = _iter_pdf_pages(file_path, lambda page: _page_text_or_ocr(page, gap_frac, ocr_lang), max_pages, expires)
+    else:
+        pages = _iter_pdfplumber_pages(file_path, max_pages, expires)
+    for txt in pages:
+        yield _clean_text(txt)
+
+
+def load_resume(resume_path: str, ocr_lang="eng", gap_frac=0.06, max_pages: int = None,
+                max_bytes: int = None, max_seconds: float = None) -> str:
     """
     1. For DOCX: Extract text directly
     2. For PDF: Region-based splitting (handles hybrid layouts)
     3. PyMuPDF fallbacks (reading-order / block-sorted)
     4. pdfplumber fallback
     5. OCR fallbacks
+    PDFs are read page by page within the same limits as iter_resume_pages. A file over the byte
+    limit raises ResumeTooLarge; other failures are printed and return "".
     """
     try:
         file_path = Path(resume_path)
+        max_pages, max_bytes, expires = _resolve_limits(max_pages, max_bytes, max_seconds)
+        _check_size(file_path, max_bytes)
 
         # Handle DOCX files
         if file_path.suffix.lower() == '.docx':
-            if not HAS_DOCX:
-                raise Exception("python-docx not available for DOCX processing")
-            doc = Document(file_path)
-            txt = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-            return _clean_text(txt)
+            return _docx_text(file_path)
 
         # Handle PDF files
         pdf_path = file_path
 
         if HAS_PYMUPDF:
-            txt = _extract_text_regions_pymupdf(pdf_path, gap_frac=gap_frac)
+            txt = _extract_text_regions_pymupdf(pdf_path, gap_frac=gap_frac, max_pages=max_pages, expires=expires)
 
             if _is_sparse(txt):
-                alt1 = _extract_text_reading_order_pymupdf(pdf_path)
-                alt2 = _extract_text_blocks_sorted_pymupdf(pdf_path)
+                alt1 = _extract_text_reading_order_pymupdf(pdf_path, max_pages, expires)
+                alt2 = _extract_text_blocks_sorted_pymupdf(pdf_path, max_pages, expires)
                 txt = max([txt, alt1, alt2], key=lambda s: len(s or ""))
         else:
-            txt = _extract_with_pdfplumber(pdf_path)
+            txt = _extract_with_pdfplumber(pdf_path, max_pages, expires)
 
-        if _is_sparse(txt) and _has_ocrmypdf():
-            try:
-                txt = _ocr_with_ocrmypdf(pdf_path)
-            except:
-                pass
-
-        if _is_sparse(txt) and HAS_PURE_OCR:
-            try:
-                txt = _ocr_pure_python(pdf_path, lang=ocr_lang)
-            except:
-                pass
+        if _is_sparse(txt):
+            txt = _ocr_document(pdf_path, lang=ocr_lang, max_pages=max_pages, expires=expires) or txt
 
         return _clean_text(txt)
 
+    except ResumeTooLarge:
+        raise  # the caller rejects the file (413 in the API) instead of scoring an empty resume
     except Exception as e:
         print(f"[ERROR] Could not load resume: {resume_path}")
         print(e)
         return ""
 
-import os
-from . import config
-
-
 def main():
     import logging
     logger = logging.getLogger(__name__)
@@ -360,7 +887,7 @@ def main():
 
     # Process resumes and save as .txt files
     for file in os.listdir(resumes_folder):
-        if file.lower().endswith(".pdf"):
+        if file.lower().endswith((".pdf", ".docx")):
             base = os.path.splitext(file)[0]
             dst_path = os.path.join(out_resumes, f"{base}.txt")
 
@@ -371,13 +898,23 @@ def main():
 
             # Process and save resume
             src_path = os.path.join(resumes_folder, file)
-            text = load_resume(src_path)  # Load the resume using load_resume function
+            try:
+                text = load_resume(src_path)  # Load the resume using load_resume function
+            except ResumeTooLarge as e:
+                logger.warning("Skipping resume: %s", e)
+                continue
             with open(dst_path, "w", encoding="utf-8") as f:
                 f.write(text or "")
             logger.info("Saved parsed resume: %s", file)
 
+    stats = ocr_stats()
+    if stats["documents"]:
+        logger.info("OCR: %s documents (%s from cache), %s runs, %s timeouts, %.1fs",
+                    stats["documents"], stats["cache_hits"], stats["runs"], stats["timeouts"], stats["seconds"])
     logger.info("Finished processing resumes.")
 
 
 if __name__ == "__main__":
+    from .logging_util import setup_logging
+    setup_logging()
     main()
@@ -0,0 +1,234 @@
+"""
+Load-generation harness for the API server.
+
+Drives `/evaluate-resume` and/or `/segment-jd` either in-process (ASGI, no network)
+or over HTTP, closed-loop (fixed concurrency) or open-loop (fixed arrival rate), and
+reports latency percentiles, throughput, error rate and event-loop lag per level.
+
+Typical offline run (stub LLM + stub file server on :8001, see stub_server.py):
+    OPENAI_ENDPOINT=http://127.0.0.1:8001/openai/v1/ OPENAI_API_KEY=stub \
+        python -m Resume_Pipeline.loadtest --concurrency 1,4,16 --duration 20
+
+Run with: python -m Resume_Pipeline.loadtest --help
+"""
+
+import os
+import json
+import math
+import time
+import asyncio
+import argparse
+import itertools
+import random
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+from . import config
+
+# ----------------------------- CONFIG -----------------------------
+DEFAULT_FILES_URL = os.environ.get("LOADTEST_FILES_URL", "http://127.0.0.1:8001/files")
+DEFAULT_JD_JSON = os.path.join(config.JD_SEGMENTED_JSON_FOLDER, "jd2.json")
+DEFAULT_JD_TEXT = os.path.join(config.JD_INPUT_FOLDER, "jd2.txt")
+LAG_PROBE_INTERVAL = 0.01  # seconds
+
+
+# ----------------------------- STATS HELPERS -----------------------------
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct * len(ordered) / 100.0))  # pct * n first: 7 / 100 * 100 > 7
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def _probe_loop_lag(samples: List[float], stop: asyncio.Event):
+    """Measure how late the event loop wakes us up compared to the requested sleep."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        samples.append(max(0.0, time.perf_counter() - start - LAG_PROBE_INTERVAL))
+
+
+# ----------------------------- WORKLOAD -----------------------------
+def build_payloads(endpoint: str, files_url: str, jd_json_path: str, jd_text_path: str):
+    """Return an endless iterator of (path, json_body) tuples for the chosen endpoint(s)."""
+    with open(jd_json_path, "r", encoding="utf-8") as f:
+        jd_json = json.load(f)
+    with open(jd_text_path, "r", encoding="utf-8") as f:
+        jd_text = f.read()
+
+    pdfs = sorted(f for f in os.listdir(config.RESUME_RAW_FOLDER) if f.lower().endswith(".pdf"))
+    evaluate = [
+        ("/evaluate-resume", {"resume_url": f"{files_url.rstrip('/')}/{name}", "jd_json": jd_json})
+        for name in pdfs
+    ]
+    segment = [("/segment-jd", {"jd_text": jd_text})]
+
+    if endpoint == "evaluate-resume":
+        pool = evaluate
+    elif endpoint == "segment-jd":
+        pool = segment
+    else:
+        # mixed: interleave so every JD segmentation competes with resume evaluations
+        pool = evaluate + segment
+    if not pool:
+        raise RuntimeError("No workload: no PDFs found in " + config.RESUME_RAW_FOLDER)
+    return itertools.cycle(pool)
+
+
+async def _one_request(client: httpx.AsyncClient, path: str, body: Dict[str, Any], timeout: float):
+    start = time.perf_counter()
+    try:
+        resp = await client.post(path, json=body, timeout=timeout)
+        ok = resp.status_code == 200
+        status = resp.status_code
+    except Exception as e:
+        ok, status = False, type(e).__name__
+    return ok, status, time.perf_counter() - start
+
+
+# ----------------------------- RUNNERS -----------------------------
+async def run_closed_loop(client, payloads, concurrency: int, duration: float, max_requests: Optional[int], timeout: float):
+    """`concurrency` workers each send the next request as soon as their previous one finishes."""
+    results = []
+    deadline = time.perf_counter() + duration
+    counter = itertools.count()
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            if max_requests is not None and next(counter) >= max_requests:
+                return
+            path, body = next(payloads)
+            results.append(await _one_request(client, path, body, timeout))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+async def run_open_loop(client, payloads, rate: float, duration: float, max_requests: Optional[int], timeout: float, poisson: bool):
+    """Fire requests at `rate` per second regardless of completions.
+
+    Latency is measured from the scheduled send time, so queueing inside the client
+    counts against the server (avoids coordinated omission).
+    """
+    results = []
+    tasks = []
+    rng = random.Random(0)
+    start = time.perf_counter()
+    next_at = start
+    sent = 0
+
+    async def fire(scheduled: float, path, body):
+        ok, status, _ = await _one_request(client, path, body, timeout)
+        results.append((ok, status, time.perf_counter() - scheduled))
+
+    while next_at < start + duration and (max_requests is None or sent < max_requests):
+        delay = next_at - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        path, body = next(payloads)
+        tasks.append(asyncio.ensure_future(fire(next_at, path, body)))
+        sent += 1
+        next_at += rng.expovariate(rate) if poisson else 1.0 / rate
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    return results
+
+
+def summarize(level: str, results, wall: float, lag_samples: List[float]) -> Dict[str, Any]:
+    latencies = [r[2] for r in results if r[0]]
+    errors = {}
+    for ok, status, _ in results:
+        if not ok:
+            errors[str(status)] = errors.get(str(status), 0) + 1
+    total = len(results)
+    return {
+        "level": level,
+        "requests": total,
+        "ok": len(latencies),
+        "error_rate": (total - len(latencies)) / total if total else 0.0,
+        "errors": errors,
+        "throughput_rps": len(latencies) / wall if wall > 0 else 0.0,
+        "p50_s": percentile(latencies, 50),
+        "p95_s": percentile(latencies, 95),
+        "p99_s": percentile(latencies, 99),
+        "max_s": max(latencies) if latencies else 0.0,
+        "loop_lag_p99_ms": percentile(lag_samples, 99) * 1000,
+        "loop_lag_max_ms": (max(lag_samples) if lag_samples else 0.0) * 1000,
+    }
+
+
+def print_table(rows: List[Dict[str, Any]], header: bool = True):
+    if header:
+        line = f"{'level':>10} {'reqs':>6} {'rps':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'lag99ms':>8} {'lagmax':>8}"
+        print(line)
+        print("-" * len(line))
+    for r in rows:
+        print(
+            f"{r['level']:>10} {r['requests']:>6} {r['throughput_rps']:>8.2f} {r['error_rate'] * 100:>6.1f} "
+            f"{r['p50_s']:>8.3f} {r['p95_s']:>8.3f} {r['p99_s']:>8.3f} "
+            f"{r['loop_lag_p99_ms']:>8.1f} {r['loop_lag_max_ms']:>8.1f}"
+        )
+
+
+async def run(args) -> List[Dict[str, Any]]:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url)
+    else:
+        # In-process: the API shares this event loop, so loop lag reflects server-side blocking
+        from .api_server import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest")
+
+    payloads = build_payloads(args.endpoint, args.files_url, args.jd_json, args.jd_text)
+    levels = [float(x) for x in (args.rate if args.mode == "open" else args.concurrency).split(",") if x.strip()]
+
+    rows = []
+    async with client:
+        for level in levels:
+            lag_samples: List[float] = []
+            stop = asyncio.Event()
+            probe = asyncio.ensure_future(_probe_loop_lag(lag_samples, stop))
+            started = time.perf_counter()
+            if args.mode == "open":
+                results = await run_open_loop(client, payloads, level, args.duration, args.requests, args.timeout, args.poisson)
+                label = f"{level:g}/s"
+            else:
+                results = await run_closed_loop(client, payloads, int(level), args.duration, args.requests, args.timeout)
+                label = f"c={int(level)}"
+            wall = time.perf_counter() - started
+            stop.set()
+            await probe
+            rows.append(summarize(label, results, wall, lag_samples))
+            print_table(rows[-1:], header=len(rows) == 1)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the AI Recruit API")
+    parser.add_argument("--url", help="Base URL of a running server; omit to drive api_server.app in-process")
+    parser.add_argument("--endpoint", choices=["evaluate-resume", "segment-jd", "mixed"], default="evaluate-resume")
+    parser.add_argument("--mode", choices=["closed", "open"], default="closed", help="closed = fixed concurrency, open = fixed arrival rate")
+    parser.add_argument("--concurrency", default="1,2,4,8", help="Comma-separated concurrency levels (closed loop)")
+    parser.add_argument("--rate", default="1,2,4", help="Comma-separated arrival rates in req/s (open loop)")
+    parser.add_argument("--poisson", action="store_true", help="Poisson arrivals instead of a fixed interval (open loop)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per level")
+    parser.add_argument("--requests", type=int, help="Stop each level after this many requests")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Per-request client timeout in seconds")
+    parser.add_argument("--files-url", default=DEFAULT_FILES_URL, help="Base URL serving raw_resumes/*.pdf")
+    parser.add_argument("--jd-json", default=DEFAULT_JD_JSON, help="JD JSON sent to /evaluate-resume")
+    parser.add_argument("--jd-text", default=DEFAULT_JD_TEXT, help="Raw JD text sent to /segment-jd")
+    parser.add_argument("--output", help="Write the per-level results as JSON to this path")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=4)
+        print("Saved results to:", args.output)
+
+
+if __name__ == "__main__":
+    main()
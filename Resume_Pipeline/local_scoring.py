@@ -0,0 +1,311 @@
+#local_scoring.py
+# Deterministic resume scoring without a model: JD requirements are matched against the resume's
+# terms and the Experience dates give continuity / recency. Returns the same three-criterion
+# structure as scoring.parse_evaluation, so dry runs produce evaluations offline and the score
+# can rank a large pool cheaply before the model sees the top candidates.
+
+import os
+import re
+import json
+import time
+import argparse
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import config
+from .scoring import EVALUATION_CRITERIA
+
+# ----------------------------- TERM MATCHING -----------------------------
+_TOKEN_RE = re.compile(r"\.net\b|[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+_YEARS_RE = re.compile(r"(\d+)\s*(?:\+|–|—|-|to)?\s*\d*\s*\+?\s*years?", re.I)
+
+# Words that say how a requirement is phrased rather than what it asks for
+GENERIC_TERMS = {
+    "a", "an", "and", "or", "the", "of", "in", "on", "to", "for", "with", "via", "at", "as", "by", "is", "are",
+    "be", "have", "has", "such", "like", "e.g", "eg", "etc", "i.e", "other", "similar", "related", "including",
+    "least", "minimum", "plus", "year", "years", "hands", "experience", "experienced", "knowledge", "understanding",
+    "familiarity", "familiar", "proficiency", "proficient", "strong", "solid", "good", "excellent", "ability",
+    "skill", "skills", "exposure", "interest", "working", "work", "using", "use", "based", "practice", "practices",
+    "development", "developing", "tool", "tools", "preferred", "required", "must", "nice", "bonus", "degree",
+    "concept", "concepts", "fundamental", "fundamentals", "principle", "principles", "language", "languages",
+    "framework", "frameworks", "technology", "technologies", "platform", "platforms",
+}
+ALIASES = {
+    "js": "javascript", "ts": "typescript", "k8s": "kubernetes", "postgres": "postgresql", "golang": "go",
+    "node": "node.js", "nodejs": "node.js", "react.js": "react", "reactjs": "react", "vue.js": "vue",
+    "springboot": "spring", "c-sharp": "c#", "dotnet": ".net",
+}
+# Multi-word names folded onto their one-token abbreviation before tokenizing, so the single words
+# ("machine", "google", "amazon") keep their own meaning
+PHRASE_ALIASES = {
+    "machine learning": "ml", "artificial intelligence": "ai", "google cloud platform": "gcp", "google cloud": "gcp",
+    "amazon web services": "aws",
+}
+_PHRASE_RE = re.compile(r"\b(" + "|".join(sorted((p.replace(" ", r"[\s-]+") for p in PHRASE_ALIASES), key=len, reverse=True))
+                        + r")\b")
+
+
+@lru_cache(maxsize=65536)
+def _normalize(token: str) -> Optional[str]:
+    """Alias / plural-folded term, or None for generic wording and numbers like "3+" (cached: the vocabulary is small)."""
+    token = ALIASES.get(token, token)
+    if token in GENERIC_TERMS or not any(c.isalpha() for c in token):
+        return None
+    if len(token) > 4 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+    return None if token in GENERIC_TERMS else token
+
+
+def terms(text: str) -> Set[str]:
+    """Normalized content terms of a text (generic requirement wording and bare numbers dropped)."""
+    text = _PHRASE_RE.sub(lambda m: PHRASE_ALIASES[re.sub(r"[\s-]+", " ", m.group(1))], text.lower())
+    out = {_normalize(token) for token in set(_TOKEN_RE.findall(text))}
+    out.discard(None)
+    return out
+
+
+def flatten(value: Any) -> Iterable[str]:
+    """Every key and scalar value of a nested dict / list, as strings."""
+    if isinstance(value, dict):
+        for k, v in value.items():
+            yield str(k)
+            yield from flatten(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from flatten(v)
+    elif value is not None:
+        yield str(value)
+
+
+def load_json(value: Any) -> Any:
+    """Parse JSON text; anything else (or text that is not JSON) is returned as is."""
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+# ----------------------------- EXPERIENCE DATES -----------------------------
+_MONTHS = {m: i for i, names in enumerate([
+    ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"), ("may",), ("jun", "june"),
+    ("jul", "july"), ("aug", "august"), ("sep", "sept", "september"), ("oct", "october"),
+    ("nov", "november"), ("dec", "december")], 1) for m in names}
+_MONTH = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|" \
+         r"oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+_DATE = rf"(?:({_MONTH})\.?,?\s*|(\d{{1,2}})[/.-])?\b((?:19|20)\d{{2}})\b"
+_RANGE_RE = re.compile(rf"{_DATE}\s*(?:–|—|-|to|until|till)\s*(?:{_DATE}|(present|current|now|date|ongoing|today))",
+                       re.I)
+_SINGLE_RE = re.compile(_DATE, re.I)
+_YEAR_RE = re.compile(r"(?:19|20)\d\d")
+
+
+def _month_index(month_name: Optional[str], month_num: Optional[str], year: str, default_month: int) -> int:
+    if month_name:
+        month = _MONTHS.get(month_name.lower().rstrip("."), default_month)
+    elif month_num and 1 <= int(month_num) <= 12:
+        month = int(month_num)
+    else:
+        month = default_month
+    return int(year) * 12 + month - 1
+
+
+def experience_intervals(entries: Iterable[str], today: date) -> List[Tuple[int, int]]:
+    """Merged (start, end) month indexes of the date ranges in Experience entries.
+
+    Ranges like "May 2022 – Nov 2022", "(2005–2010)", "03/2019 - Present" are recognized; when none
+    are, single dates ("Year: 2024") count as that month / year.
+    """
+    now = today.year * 12 + today.month - 1
+    entries = [e for e in entries if _YEAR_RE.search(e)]  # most entries are descriptions without dates
+    intervals = []
+    for entry in entries:
+        for m in _RANGE_RE.finditer(entry):
+            start = _month_index(m.group(1), m.group(2), m.group(3), 1)
+            end = now if m.group(7) else _month_index(m.group(4), m.group(5), m.group(6), 12)
+            if start <= end <= now:
+                intervals.append((start, end))
+            elif start <= now:
+                intervals.append((start, min(max(start, end), now)))
+    if not intervals:
+        for entry in entries:
+            for m in _SINGLE_RE.finditer(entry):
+                start = _month_index(m.group(1), m.group(2), m.group(3), 1)
+                end = start if (m.group(1) or m.group(2)) else _month_index(None, None, m.group(3), 12)
+                if start <= now:
+                    intervals.append((start, min(end, now)))
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def experience_entries(resume: Any) -> List[str]:
+    """The flattened Experience section of a structured resume ([] for plain text)."""
+    return list(flatten(resume.get("Experience", []))) if isinstance(resume, dict) else []
+
+
+def gap_continuity(intervals: List[Tuple[int, int]]) -> Tuple[int, float]:
+    """(longest gap between merged intervals in months, continuity 0-1); gaps up to 6 months are free."""
+    longest_gap = max((b[0] - a[1] - 1 for a, b in zip(intervals, intervals[1:])), default=0)
+    return longest_gap, 1.0 if longest_gap <= 6 else max(0.0, 1 - (longest_gap - 6) / 30)
+
+
+# ----------------------------- SCORER -----------------------------
+def score_label(fraction: float) -> str:
+    """A 0-1 fraction as the "n/10" score of an evaluation."""
+    return f"{max(0, min(10, round(fraction * 10)))}/10"
+
+
+def shorten(items: List[str], limit: int = 3) -> str:
+    """The first ``limit`` items, each cut to 60 characters, for descriptions."""
+    shown = [i if len(i) <= 60 else i[:57] + "..." for i in items[:limit]]
+    return "; ".join(shown) + (f" (+{len(items) - limit} more)" if len(items) > limit else "")
+
+
+class LocalScorer:
+    """Scores resumes against one JD; the JD's requirement terms are prepared once."""
+
+    def __init__(self, jd: Any, today: Optional[date] = None):
+        jd = load_json(jd)
+        if not isinstance(jd, dict):
+            jd = {"Non-Negotiable Requirements": [l.strip("-•* ") for l in str(jd).splitlines() if l.strip()]}
+        self.today = today or date.today()
+        self.must = self._requirements(jd.get("Non-Negotiable Requirements", []))
+        self.nice = self._requirements(jd.get("Negotiable Requirements", []))
+        self.jd_terms = set().union(*(r[1] for r in self.must + self.nice)) if self.must or self.nice else set()
+
+    @staticmethod
+    def _requirements(items) -> List[Tuple[str, Set[str], int]]:
+        out = []
+        for item in items if isinstance(items, list) else [items]:
+            text = str(item)
+            years = _YEARS_RE.search(text)
+            out.append((text, terms(text), int(years.group(1)) if years else 0))
+        return out
+
+    @staticmethod
+    def _credit(req_terms: Set[str], min_years: int, resume_terms: Set[str], years: float) -> float:
+        """1.0 when two of the requirement's terms (or its only one) appear; scaled by years when it asks for some."""
+        if req_terms:
+            credit = min(1.0, len(req_terms & resume_terms) / min(2, len(req_terms)))
+        else:
+            credit = 1.0 if min_years else 0.0
+        if min_years:
+            credit *= min(1.0, years / min_years)
+        return credit
+
+    def _fulfillment(self, requirements, resume_terms, years, label):
+        if not requirements:
+            return {"score": "10/10", "description": f"The JD lists no {label} requirements.\nNothing to match."}
+        credits = [self._credit(t, y, resume_terms, years) for _, t, y in requirements]
+        met = [r[0] for r, c in zip(requirements, credits) if c >= 0.99]
+        missing = [r[0] for r, c in zip(requirements, credits) if c < 0.5]
+        first = f"Matched {len(met)} of {len(requirements)} {label} requirements" + (f": {shorten(met)}." if met else ".")
+        second = f"Not evident: {shorten(missing)}." if missing else "Every requirement is at least partly evidenced."
+        return {"score": score_label(sum(credits) / len(credits)), "description": f"{first}\n{second}"}
+
+    def _continuity(self, intervals, experience_terms):
+        if not intervals:
+            return {"score": "0/10", "description": "No dated experience entries were found.\n"
+                                                     "Continuity and recency could not be established."}
+        now = self.today.year * 12 + self.today.month - 1
+        since_last = now - intervals[-1][1]
+        longest_gap, continuity = gap_continuity(intervals)
+        recency = 1.0 if since_last <= 6 else max(0.0, 1 - (since_last - 6) / 54)
+        relevance = min(1.0, 2 * len(self.jd_terms & experience_terms) / len(self.jd_terms)) if self.jd_terms else 0.0
+        months = sum(end - start + 1 for start, end in intervals)
+        first = (f"{months / 12:.1f} years of dated experience; "
+                 + ("currently employed." if since_last == 0 else f"last role ended {since_last} months ago.")
+                 + (f" Longest gap {longest_gap} months." if longest_gap > 0 else ""))
+        second = f"Experience entries mention {len(self.jd_terms & experience_terms)} of the JD's {len(self.jd_terms)} key terms."
+        return {"score": score_label(0.4 * recency + 0.3 * continuity + 0.3 * relevance), "description": f"{first}\n{second}"}
+
+    def evaluate(self, resume: Any) -> Dict[str, Dict[str, str]]:
+        """Three-criterion evaluation in the parse_evaluation structure."""
+        resume = load_json(resume)
+        experience = experience_entries(resume)
+        intervals = experience_intervals(experience, self.today)
+        years = sum(end - start + 1 for start, end in intervals) / 12
+        # every key and value at once; json.dumps is much faster than walking the structure
+        resume_terms = terms(json.dumps(resume, ensure_ascii=False) if not isinstance(resume, str) else resume)
+        return {
+            EVALUATION_CRITERIA[0]: self._fulfillment(self.must, resume_terms, years, "non-negotiable"),
+            EVALUATION_CRITERIA[1]: self._fulfillment(self.nice, resume_terms, years, "negotiable"),
+            EVALUATION_CRITERIA[2]: self._continuity(intervals, terms(" ".join(experience))),
+        }
+
+    def rank(self, resumes: Dict[str, Any], top: Optional[int] = None) -> List[Tuple[str, int]]:
+        """(name, total score) sorted best first; ties keep name order."""
+        ranked = sorted(((name, total_score(self.evaluate(r))) for name, r in sorted(resumes.items())),
+                        key=lambda item: -item[1])
+        return ranked[:top] if top else ranked
+
+
+def local_evaluate(resume: Any, jd: Any, today: Optional[date] = None) -> Dict[str, Dict[str, str]]:
+    """Evaluate one resume (dict or JSON text) against one JD without a model call."""
+    return LocalScorer(jd, today=today).evaluate(resume)
+
+
+def total_score(evaluation: Dict[str, Dict[str, str]]) -> int:
+    """Sum of the criterion scores ("7/10" -> 7) of a parsed evaluation."""
+    total = 0
+    for item in evaluation.values():
+        m = re.match(r"\s*(\d+)", str(item.get("score", "")))
+        total += int(m.group(1)) if m else 0
+    return total
+
+
+# ----------------------------- CLI -----------------------------
+def _load_folder(folder: str) -> Dict[str, Any]:
+    resumes = {}
+    for fname in sorted(os.listdir(folder)):
+        if fname.endswith(".json"):
+            with open(os.path.join(folder, fname), "r", encoding="utf-8") as f:
+                resumes[fname] = json.load(f)
+    return resumes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score resumes against a JD locally (no model calls)")
+    parser.add_argument("--jd", default=os.path.join(config.JD_SEGMENTED_JSON_FOLDER, "jd2.json"), help="JD JSON")
+    parser.add_argument("--resume-folder", default=config.RESUME_SEGMENTED_JSON_FOLDER)
+    parser.add_argument("--output", help="Folder to write <resume>.json evaluations to")
+    parser.add_argument("--top", type=int, default=10, help="Print the N best-ranked resumes")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Time scoring N resumes (samples repeated)")
+    args = parser.parse_args()
+
+    with open(args.jd, "r", encoding="utf-8") as f:
+        scorer = LocalScorer(json.load(f))
+    resumes = _load_folder(args.resume_folder)
+    if not resumes:
+        print("No resume JSON files found in", args.resume_folder)
+        return
+
+    if args.benchmark:
+        pool = list(resumes.values())
+        start = time.perf_counter()
+        for i in range(args.benchmark):
+            scorer.evaluate(pool[i % len(pool)])
+        elapsed = time.perf_counter() - start
+        print(f"Scored {args.benchmark} resumes in {elapsed:.2f}s ({args.benchmark / elapsed:.0f} resumes/s)")
+        return
+
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+        for fname, resume in resumes.items():
+            out = {"resume_filename": fname, "evaluation": scorer.evaluate(resume), "scorer": "local"}
+            with open(os.path.join(args.output, fname), "w", encoding="utf-8") as f:
+                json.dump(out, f, indent=4)
+    for rank, (fname, total) in enumerate(scorer.rank(resumes, args.top), 1):
+        print(f"{rank:>3}. {fname:<24} {total:>2}/30")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+OCR preset benchmark: renders and OCRs the sample PDFs that have a text layer with each preset
+in loader_resume.OCR_PRESETS and compares the OCR text with the PyMuPDF text layer of the same
+pages, so the fastest preset that still reads the resumes well enough can be picked for OCR_PRESET.
+
+Reports OCR seconds per page and word-level similarity (F1 of the lower-cased word multisets, so
+column order does not matter) per file and preset, then recommends the fastest preset whose mean
+similarity is at least --min-similarity. Needs tesseract.
+
+Run with: python -m Resume_Pipeline.ocr_benchmark [--files a.pdf b.pdf] [--pages 2] [--presets fast balanced]
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import argparse
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+from . import config
+from .loader_resume import (OCR_PRESETS, _extract_text_reading_order_pymupdf, _fitz, _is_sparse, _ocr_pure_python,
+                            ocr_settings)
+
+_WORD = re.compile(r"[a-z0-9]+(?:[.+#'-][a-z0-9]+)*")
+
+# ----------------------------- SIMILARITY -----------------------------
+def words(text: str) -> Counter:
+    return Counter(_WORD.findall((text or "").lower()))
+
+
+def similarity(reference: str, candidate: str) -> float:
+    """F1 of the word multisets: 1.0 when OCR recovers exactly the reference words."""
+    ref, cand = words(reference), words(candidate)
+    if not ref or not cand:
+        return 0.0
+    common = sum((ref & cand).values())
+    if not common:
+        return 0.0
+    precision, recall = common / sum(cand.values()), common / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+# ----------------------------- SAMPLES -----------------------------
+def sample_files(pages: int) -> List[str]:
+    """Sample resumes whose text layer is usable as the reference (scanned ones are skipped)."""
+    folder = Path(config.RESUME_RAW_FOLDER)
+    files = []
+    for path in sorted(folder.glob("*.pdf")):
+        if not _is_sparse(_extract_text_reading_order_pymupdf(path, pages)):
+            files.append(str(path))
+    return files
+
+
+# ----------------------------- MEASUREMENT -----------------------------
+def page_count(path: str, pages: int) -> int:
+    doc = _fitz().open(path)
+    try:
+        return min(doc.page_count, pages) if pages else doc.page_count
+    finally:
+        doc.close()
+
+
+def measure(path: str, preset: str, pages: int) -> Dict[str, float]:
+    """OCR the first ``pages`` pages one at a time (OCR_JOBS is not applied, so times are per page)."""
+    reference = _extract_text_reading_order_pymupdf(Path(path), pages)
+    start = time.perf_counter()
+    text = _ocr_pure_python(Path(path), max_pages=pages, settings=ocr_settings(preset), jobs=1)
+    seconds = time.perf_counter() - start
+    return {"seconds": round(seconds, 3), "per_page": round(seconds / max(1, page_count(path, pages)), 3),
+            "similarity": round(similarity(reference, text), 4)}
+
+
+def recommend(summary: Dict[str, Dict[str, float]], min_similarity: float):
+    """Fastest preset whose mean similarity reaches ``min_similarity`` (None if none does)."""
+    good = [name for name, s in summary.items() if s["similarity"] >= min_similarity]
+    return min(good, key=lambda name: summary[name]["seconds"]) if good else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR presets against the PDF text layer")
+    parser.add_argument("--files", nargs="*", default=[], help="PDFs with a text layer (default: the sample resumes)")
+    parser.add_argument("--presets", nargs="*", default=list(OCR_PRESETS), choices=list(OCR_PRESETS))
+    parser.add_argument("--pages", type=int, default=2, help="Pages OCR'd per file")
+    parser.add_argument("--min-similarity", type=float, default=0.9, help="Quality bar for the recommendation")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    if not shutil.which(config.TESSERACT_CMD):
+        raise SystemExit(f"tesseract is required for the OCR benchmark ({config.TESSERACT_CMD} not found)")
+
+    files = args.files or sample_files(args.pages)
+    if not files:
+        raise SystemExit("no PDFs with a text layer to compare against")
+    results = []
+    for path in files:
+        row = {"file": os.path.basename(path)}
+        for preset in args.presets:
+            row[preset] = measure(path, preset, args.pages)
+        results.append(row)
+
+    summary = {
+        preset: {
+            "seconds": round(sum(r[preset]["seconds"] for r in results), 3),
+            "similarity": round(sum(r[preset]["similarity"] for r in results) / len(results), 4),
+            "min_similarity": min(r[preset]["similarity"] for r in results),
+        }
+        for preset in args.presets
+    }
+    best = recommend(summary, args.min_similarity)
+
+    if args.json:
+        print(json.dumps({"files": results, "summary": summary, "recommended": best}, indent=2))
+        return
+    print(f"{'file':<22}{'preset':<10}{'seconds':>9}{'s/page':>9}{'similarity':>12}")
+    for row in results:
+        for preset in args.presets:
+            r = row[preset]
+            print(f"{row['file']:<22}{preset:<10}{r['seconds']:>9}{r['per_page']:>9}{r['similarity']:>12}")
+    print()
+    for preset, s in summary.items():
+        print(f"{preset:<10} total {s['seconds']:>8}s  mean similarity {s['similarity']:.3f} "
+              f"(min {s['min_similarity']:.3f})  {OCR_PRESETS[preset]}")
+    if best:
+        print(f"\nRecommended: OCR_PRESET={best} (fastest with mean similarity >= {args.min_similarity})")
+    else:
+        print(f"\nNo preset reaches mean similarity {args.min_similarity}")
+
+
+if __name__ == "__main__":
+    main()
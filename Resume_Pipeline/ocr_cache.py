@@ -0,0 +1,104 @@
+#ocr_cache.py
+# Size-bounded store of OCR'd resume text keyed by PDF content hash (plus OCR language, page
+# limit and OCR settings), so a scanned resume that is submitted again skips OCR. SQLite in WAL
+# mode: the API's extraction workers share one file. When the stored text exceeds the size limit
+# the least recently used entries are dropped.
+
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Union
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+
+def pdf_digest(path: Union[str, Path]) -> str:
+    """SHA-256 of the file content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(digest: str, lang: str, max_pages: int, settings: str = "") -> str:
+    """``settings`` identifies the OCR settings (loader_resume.ocr_settings_tag): other settings, other text."""
+    return f"{digest}:{lang}:{max_pages or 0}:{settings}"
+
+
+class OcrCache:
+    """SQLite store of OCR text, at most ``max_bytes`` of text (LRU eviction); safe to share between threads."""
+
+    def __init__(self, path: str = None, max_bytes: int = None):
+        self.path = path or config.OCR_CACHE_PATH
+        self.max_bytes = config.OCR_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_text ("
+                " key TEXT PRIMARY KEY, text TEXT NOT NULL, size INTEGER NOT NULL,"
+                " seconds REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ocr_text_last_used ON ocr_text (last_used)")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT text FROM ocr_text WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE ocr_text SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0] if row else None
+
+    def put(self, key: str, text: str, seconds: float):
+        size = len(text.encode("utf-8"))
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO ocr_text VALUES (?, ?, ?, ?, ?)",
+                               (key, text, size, seconds, time.time()))
+            if self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_text").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        dropped = 0
+        for key, size in self._conn.execute("SELECT key, size FROM ocr_text ORDER BY last_used").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM ocr_text WHERE key = ?", (key,))
+            total -= size
+            dropped += 1
+        logger.info("OCR cache over %s bytes, dropped %s entries", self.max_bytes, dropped)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, size, seconds = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(seconds), 0) FROM ocr_text").fetchone()
+        return {"entries": count, "bytes": size, "ocr_seconds": round(seconds, 2)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[OcrCache]:
+    """Process-wide cache, or None when OCR_CACHE is off."""
+    global _cache
+    if not config.OCR_CACHE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = OcrCache()
+        return _cache
@@ -1,28 +1,32 @@
-from openai import OpenAI
 from . import config
 import os
 import logging
 import time
-from typing import List, Dict, Any
+import random
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Iterator
+from .deadline import DeadlineExceeded, remaining, check
+from .endpoint_pool import EndpointPool, PoolMember, load_members, retry_after_seconds
+from .circuit_breaker import CircuitBreaker
+from . import cost_ledger
 try:
     from dotenv import load_dotenv
 except Exception:
     load_dotenv = None
 
-_client = None
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+_breaker = None
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO)
 
 
-def get_client():
-    """Return a cached OpenAI client configured for Azure/OpenAI.
-
-    Raises RuntimeError if API key missing.
-    """
-    global _client
-    if _client is not None:
-        return _client
-
+def _default_api_key():
+    """API key for pool members that do not name their own (None if not configured)."""
     # First prefer any API key already present in the environment
     api_key = os.environ.get("OPENAI_API_KEY") or os.environ.get("AZURE_OPENAI_KEY")
 
@@ -36,36 +40,345 @@ def get_client():
             pass
 
     # Fallback to value read when config was imported (if any)
-    if not api_key:
-        api_key = config.OPENAI_API_KEY
+    return api_key or config.OPENAI_API_KEY
+
+
+def get_pool() -> EndpointPool:
+    """Return the process-wide endpoint pool (built from config on first use)."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = EndpointPool(load_members(default_key=_default_api_key()))
+                logger.info("Endpoint pool: %s", ", ".join(m.name for m in _pool.members))
+    return _pool
+
+
+def get_client(member: PoolMember = None):
+    """Return a cached OpenAI client for a pool member (the first member by default).
 
-    if not api_key:
+    Raises RuntimeError if API key missing.
+    """
+    member = member or get_pool().members[0]
+    client = _clients.get(member.name)
+    if client is not None:
+        return client
+
+    if not member.api_key:
         raise RuntimeError("OPENAI_API_KEY or AZURE_OPENAI_KEY must be set in environment")
 
-    _client = OpenAI(base_url=config.OPENAI_ENDPOINT, api_key=api_key)
-    return _client
+    with _clients_lock:  # concurrent first calls must share one client (and its connection pool)
+        client = _clients.get(member.name)
+        if client is None:
+            from openai import OpenAI  # imported on first use: the SDK adds ~0.3s to startup
+
+            # retries are handled (and bounded by the request deadline) in call_chat_completions
+            client = OpenAI(base_url=member.endpoint, api_key=member.api_key, max_retries=0)
+            _clients[member.name] = client
+    return client
+
+
+def warm_up():
+    """Build the endpoint pool and one client per member ahead of the first request."""
+    for member in get_pool().members:
+        if member.api_key:
+            get_client(member)
+
+
+def _deployment_for(member: PoolMember, model: str) -> str:
+    """Map the logical deployment callers ask for onto the member's own deployment name."""
+    return member.deployment if model == config.DEPLOYMENT_NAME else model
 
 
-def call_chat_completions(messages: List[Dict[str, Any]], model: str = None, max_retries: int = 3, backoff: float = 1.0):
+def call_chat_completions(messages: List[Dict[str, Any]], model: str = None, max_retries: int = 3, backoff: float = 1.0, stream: bool = False, timeout: float = None, **kwargs):
     """Call the chat.completions.create endpoint with simple retry/backoff and logging.
 
-    Returns the response object on success. Raises the last exception on failure.
+    Extra keyword arguments (e.g. ``response_format``) are passed through to the API.
+    Returns the response object on success. With ``stream=True`` returns an iterator of
+    content deltas (strings) instead; only opening the stream is retried.
+
+    Each attempt is limited to ``timeout`` (default config.MODEL_CALL_TIMEOUT) and all
+    attempts together to config.MODEL_RETRY_BUDGET, both capped by the current request
+    deadline (see deadline.py). Non-streaming calls are hedged when HEDGE_PERCENTILE is set.
+    Only retryable errors (timeouts, connection errors, 408/409/429, 5xx) are retried, with
+    full-jitter exponential backoff that waits out Retry-After when no other endpoint is
+    available. Raises the last exception on failure, DeadlineExceeded when the deadline ran
+    out, or CircuitOpenError without calling the model while the circuit breaker is open.
+
+    The usage of every completed request (hedges included) is recorded in the cost ledger under
+    the current cost_ledger.attribute(); BudgetExceeded is raised, without calling the model,
+    when the call would take the current run or JD over its budget.
     """
-    client = get_client()
+    if stream:
+        kwargs["stream"] = True
+        if config.LEDGER:
+            kwargs.setdefault("stream_options", {"include_usage": True})
+    pool = get_pool()
     model = model or config.DEPLOYMENT_NAME
+    cost_ledger.check_budget(model, messages, deployments=[_deployment_for(m, model) for m in pool.members])
+    timeout = timeout or config.MODEL_CALL_TIMEOUT
+    retry_until = time.monotonic() + config.MODEL_RETRY_BUDGET
 
     last_exc = None
     for attempt in range(1, max_retries + 1):
+        left = _time_left(retry_until)
+        if left <= 0:
+            break
+        get_breaker().before_call()
         try:
             logger.info("OpenAI request attempt %s for model %s", attempt, model)
-            resp = client.chat.completions.create(model=model, messages=messages)
-            return resp
+            if stream:
+                return _open_stream(pool, model, messages, min(timeout, left), kwargs)
+            return _create_hedged(pool, model, messages, min(timeout, left), kwargs)
         except Exception as e:
             last_exc = e
-            wait = backoff * (2 ** (attempt - 1))
+            if not is_retryable(e):
+                logger.error("OpenAI request failed with a non-retryable error: %s", e)
+                raise
+            if attempt == max_retries:
+                break
+            wait = _backoff_delay(attempt, backoff, e, pool)
+            if wait >= _time_left(retry_until):
+                logger.warning("OpenAI request failed (attempt %s/%s): %s; no time left to retry", attempt, max_retries, e)
+                break
             logger.warning("OpenAI request failed (attempt %s/%s): %s; retrying in %.1fs", attempt, max_retries, e, wait)
             time.sleep(wait)
 
-    logger.error("OpenAI request failed after %s attempts", max_retries)
+    request_left = remaining()
+    if last_exc is None or (request_left is not None and request_left <= 0):
+        # the request deadline (not the attempt count) ended the call: report it as a timeout
+        logger.error("OpenAI request abandoned: no time left before the deadline")
+        raise DeadlineExceeded("model call ran out of time before the request deadline") from last_exc
+    logger.error("OpenAI request failed after %s attempts", attempt)
+    raise last_exc
+
+
+# ----------------------------- ERROR CLASSIFICATION / BACKOFF -----------------------------
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection errors, 408/409/429 and 5xx are worth retrying; auth failures,
+    400s (oversized prompt, content filter), 404s and local errors are not."""
+    import openai
+    if isinstance(error, openai.APIConnectionError):  # includes APITimeoutError
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status in RETRYABLE_STATUS or status >= 500)
+
+
+def is_outage(error: BaseException) -> bool:
+    """Failures that say the endpoint itself is down (these feed the circuit breaker)."""
+    import openai
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and status >= 500
+
+
+def _backoff_delay(attempt: int, backoff: float, error: BaseException, pool) -> float:
+    """Full-jitter exponential backoff; a Retry-After is honored when no other endpoint is free."""
+    wait = random.uniform(0, min(config.MODEL_BACKOFF_MAX, backoff * (2 ** (attempt - 1))))
+    retry_after = retry_after_seconds(error)
+    if retry_after and not pool.has_available():
+        wait = max(wait, min(retry_after, config.MODEL_BACKOFF_MAX))
+    return wait
+
+
+def get_breaker() -> CircuitBreaker:
+    global _breaker
+    if _breaker is None:
+        with _pool_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker()
+    return _breaker
+
+
+def _record_outcome(pool, member, latency=None, error=None):
+    """Release the pool member and feed the call's outcome to the circuit breaker."""
+    pool.release(member, latency=latency, error=error)
+    if error is None:
+        get_breaker().record_success()
+    elif is_outage(error):
+        get_breaker().record_failure()
+    else:
+        get_breaker().record_neutral()
+
+
+def _time_left(retry_until: float) -> float:
+    """Seconds left for this call: the retry budget capped by the request deadline."""
+    left = retry_until - time.monotonic()
+    request_left = remaining()
+    return left if request_left is None else min(left, request_left)
+
+
+# ----------------------------- HEDGING -----------------------------
+_latencies: Dict[str, deque] = {}
+_latency_lock = threading.Lock()
+_hedge_pool = None
+
+
+def record_latency(model: str, seconds: float):
+    with _latency_lock:
+        _latencies.setdefault(model, deque(maxlen=200)).append(seconds)
+
+
+def hedge_delay(model: str):
+    """Seconds to wait before hedging a call to ``model`` (the HEDGE_PERCENTILE of recent
+    successful latencies), or None when hedging is off or there are too few samples."""
+    if config.HEDGE_PERCENTILE <= 0:
+        return None
+    with _latency_lock:
+        samples = sorted(_latencies.get(model, ()))
+    if len(samples) < max(1, config.HEDGE_MIN_SAMPLES):
+        return None
+    idx = min(len(samples) - 1, int(len(samples) * config.HEDGE_PERCENTILE / 100))
+    return samples[idx]
+
+
+def _get_hedge_pool():
+    global _hedge_pool
+    if _hedge_pool is None:
+        with _latency_lock:
+            if _hedge_pool is None:
+                _hedge_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="openai-hedge")
+    return _hedge_pool
+
+
+def _timed_create(pool, member, model, messages, timeout, kwargs):
+    """Send one request to an acquired pool member, then release it with the outcome."""
+    started = time.monotonic()
+    deployment = _deployment_for(member, model)
+    try:
+        resp = get_client(member).chat.completions.create(
+            model=deployment, messages=messages, timeout=timeout, **kwargs
+        )
+    except Exception as e:
+        _record_outcome(pool, member, error=e)
+        raise
+    latency = time.monotonic() - started
+    _record_outcome(pool, member, latency=latency)
+    record_latency(model, latency)
+    cost_ledger.record(getattr(resp, "model", None) or deployment, getattr(resp, "usage", None), latency,
+                       deployment=deployment)
+    return resp
+
+
+def _open_stream(pool, model, messages, timeout, kwargs):
+    member = pool.acquire()
+    deployment = _deployment_for(member, model)
+    try:
+        resp = get_client(member).chat.completions.create(
+            model=deployment, messages=messages, timeout=timeout, **kwargs
+        )
+    except Exception as e:
+        _record_outcome(pool, member, error=e)
+        raise
+    # the stream is consumed later, possibly in another context: keep the attribution of the caller
+    return _StreamText(resp, pool, member, usage_to=(deployment, cost_ledger.current(), time.monotonic()))
+
+
+def _create_hedged(pool, model, messages, timeout, kwargs):
+    """One attempt on the least-loaded pool member; if it is still running after hedge_delay(),
+    race a duplicate request on another member (with HEDGE_DEPLOYMENT when set) and return
+    whichever succeeds first.
+
+    The slower request cannot be cancelled mid-flight; it finishes (or times out) in the
+    background and only contributes a latency sample.
+    """
+    member = pool.acquire()
+    delay = hedge_delay(model)
+    if delay is None or delay >= timeout:
+        return _timed_create(pool, member, model, messages, timeout, kwargs)
+
+    executor = _get_hedge_pool()
+    started = time.monotonic()
+    # each request runs in a copy of the caller's context, so its usage keeps the ledger attribution
+    primary = executor.submit(contextvars.copy_context().run, _timed_create, pool, member, model, messages, timeout, kwargs)
+    try:
+        return primary.result(timeout=delay)
+    except FuturesTimeout:
+        pass
+
+    hedge_model = config.HEDGE_DEPLOYMENT or model
+    logger.info("OpenAI request to %s slower than p%g (%.2fs); hedging to %s", model, config.HEDGE_PERCENTILE, delay, hedge_model)
+    hedge_member = pool.acquire(exclude=member)
+    hedge = executor.submit(contextvars.copy_context().run, _timed_create, pool, hedge_member, hedge_model, messages,
+                            max(0.1, timeout - (time.monotonic() - started)), kwargs)
+    pending = {primary, hedge}
+    last_exc = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is None:
+                if fut is hedge:
+                    logger.info("Hedged request to %s (%s) answered first", hedge_model, hedge_member.name)
+                return fut.result()
+            last_exc = fut.exception()
     raise last_exc
 
+
+class _StreamText:
+    """Iterator over a stream's text (see _iter_stream_text) that also releases the pool member when
+    it is closed or dropped before its first item: a generator's finally block only runs once it
+    has started."""
+
+    def __init__(self, stream, pool, member, usage_to):
+        self._stream, self._pool, self._member = stream, pool, member
+        self._texts = _iter_stream_text(stream, pool, member, usage_to)
+        self._started = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        self._started = True
+        return next(self._texts)
+
+    def close(self):
+        if not self._started:
+            self._started = True  # release once
+            close = getattr(self._stream, "close", None)
+            if close:
+                close()
+            self._pool.release(self._member)
+            get_breaker().record_neutral()
+        self._texts.close()
+
+    def __del__(self):
+        self.close()
+
+
+def _iter_stream_text(stream, pool=None, member=None, usage_to=None) -> Iterator[str]:
+    """Yield the text content of each streamed chunk, skipping empty deltas.
+
+    Stops with DeadlineExceeded (closing the connection) once the request deadline passes.
+    The pool member serving the stream is released when the stream ends. With ``usage_to``
+    (deployment, ledger attribution, start time) the usage of the final chunk is recorded.
+    """
+    error = None
+    try:
+        for chunk in stream:
+            check("streamed model call")
+            if usage_to is not None and getattr(chunk, "usage", None) is not None:
+                deployment, fields, started = usage_to
+                cost_ledger.record(getattr(chunk, "model", None) or deployment, chunk.usage,
+                                   time.monotonic() - started, deployment=deployment, **fields)
+            for choice in chunk.choices or []:
+                text = getattr(choice.delta, "content", None)
+                if text:
+                    yield text
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
+        if member is not None and isinstance(error, (DeadlineExceeded, GeneratorExit)):
+            # our own cut-off says nothing about the endpoint: no success that would close a half-open breaker
+            pool.release(member)
+            get_breaker().record_neutral()
+        elif member is not None:
+            # full-stream duration is not comparable to request latency, so only health is recorded
+            _record_outcome(pool, member, error=error)
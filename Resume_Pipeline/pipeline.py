@@ -4,6 +4,15 @@ Steps (preserves existing logic and outputs):
   - JD: segment -> save segmented .txt -> format -> save .json
   - Resumes: parse PDFs -> save parsed .txt -> segment -> save segmented .txt -> format -> save .json
   - Scoring: evaluate each resume JSON against a chosen JD JSON -> save evaluation JSON
+    (--matrix: against every JD JSON -> <jd>/<resume>.json plus a matrix.json summary;
+     --dry-run: local deterministic scorer -> LOCAL_SCORING_OUTPUT_FOLDER;
+     --per-requirement: cached per-requirement ratings aggregated into the three criteria)
+  Batch mode (--batch-export / --batch-ingest, see batch_jobs): pending model requests are written as provider
+  batch-input files and the batch output is ingested later, instead of calling the model synchronously.
+  Every step reads and writes through the result sink (RESULT_SINK: per-file folders or one JSONL file).
+  Model usage is recorded in the cost ledger per run, stage, resume and JD (see cost_ledger); when a call
+  would exceed LEDGER_RUN_BUDGET / LEDGER_JD_BUDGET the run stops, or with LEDGER_BUDGET_ACTION=local the
+  rest is segmented and scored locally.
 
 Run with: python -m finalCode.pipeline (from repository root)
 """
@@ -18,7 +27,15 @@ from . import resume_format
 from . import jd_segment
 from . import jd_format
 from .scoring import evaluate_resume, parse_evaluation
+from . import scoring_matrix
+from . import batch_jobs
+from . import cost_ledger
+from .local_scoring import LocalScorer
+from .requirement_scoring import RequirementScorer
+from .result_sink import get_sink
 from .logging_util import setup_logging
+from .circuit_breaker import CircuitOpenError
+from .cost_ledger import BudgetExceeded, PricesMissing
 import logging
 
 
@@ -39,105 +56,189 @@ def ensure_dirs():
 def process_jds(dry_run: bool = False):
     logger = logging.getLogger(__name__)
     logger.info("Processing JDs...")
+    sink = get_sink()
     txt_files = [f for f in os.listdir(config.JD_INPUT_FOLDER) if f.endswith(".txt")]
     for fname in txt_files:
         src = os.path.join(config.JD_INPUT_FOLDER, fname)
         with open(src, "r", encoding="utf-8") as f:
             text = f.read()
 
-        segmented = jd_segment.segment_job_description(text, dry_run=dry_run)
-        seg_path = os.path.join(config.JD_SEGMENTED_FOLDER, fname)
-        with open(seg_path, "w", encoding="utf-8") as f:
-            f.write(segmented)
+        name = os.path.splitext(fname)[0]
+        with cost_ledger.attribute(jd=name):
+            segmented = jd_segment.segment_job_description(text, dry_run=dry_run)
+        sink.put("jd_segmented", name, segmented)
 
         formatted = jd_format.format_job_description_text(segmented)
-        json_name = fname.replace(".txt", ".json")
-        json_path = os.path.join(config.JD_SEGMENTED_JSON_FOLDER, json_name)
-        with open(json_path, "w", encoding="utf-8") as jf:
-            json.dump(formatted, jf, indent=4, ensure_ascii=False)
+        sink.put("jd_json", name, formatted)
 
         logger.info("JD processed: %s", fname)
 
 
-def process_resumes(dry_run: bool = False):
+def parse_resumes():
+    """Parse PDFs to text"""
     logger = logging.getLogger(__name__)
-    logger.info("Processing resumes (PDF -> parsed text -> segmented -> json)...")
-
-    # Parse PDFs to text
+    sink = get_sink()
     pdfs = [f for f in os.listdir(config.RESUME_RAW_FOLDER) if f.lower().endswith(".pdf")]
     for pdf in pdfs:
         src_pdf = os.path.join(config.RESUME_RAW_FOLDER, pdf)
-        parsed_text = loader_resume.load_resume(src_pdf)
-        out_name = os.path.splitext(pdf)[0] + ".txt"
-        out_path = os.path.join(config.RESUME_PARSED_OUTPUT, out_name)
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.write(parsed_text or "")
-        logger.info("Parsed resume: %s -> %s", pdf, out_name)
+        try:
+            parsed_text = loader_resume.load_resume(src_pdf)
+        except loader_resume.ResumeTooLarge as e:
+            logger.warning("Skipping resume: %s", e)
+            continue
+        name = os.path.splitext(pdf)[0]
+        sink.put("resume_parsed", name, parsed_text or "")
+        logger.info("Parsed resume: %s -> %s", pdf, name)
+
+
+def process_resumes(dry_run: bool = False):
+    logger = logging.getLogger(__name__)
+    logger.info("Processing resumes (PDF -> parsed text -> segmented -> json)...")
+    sink = get_sink()
+    parse_resumes()
 
     # Segment parsed resumes
-    parsed_txts = [f for f in os.listdir(config.RESUME_PARSED_OUTPUT) if f.endswith(".txt")]
-    for fname in parsed_txts:
-        path = os.path.join(config.RESUME_PARSED_OUTPUT, fname)
-        with open(path, "r", encoding="utf-8") as f:
-            txt = f.read()
+    for name in sink.names("resume_parsed"):
+        txt = sink.get("resume_parsed", name)
 
-        segmented = resume_segment.segment_resume(txt, dry_run=dry_run)
-        seg_path = os.path.join(config.RESUME_SEGMENTED_FOLDER, fname)
-        with open(seg_path, "w", encoding="utf-8") as f:
-            f.write(segmented)
+        with cost_ledger.attribute(resume=name):
+            segmented = resume_segment.segment_resume(txt, dry_run=dry_run)
+        sink.put("resume_segmented", name, segmented)
 
         formatted = resume_format.format_resume_text(segmented)
-        json_name = fname.replace(".txt", ".json")
-        json_path = os.path.join(config.RESUME_SEGMENTED_JSON_FOLDER, json_name)
-        with open(json_path, "w", encoding="utf-8") as jf:
-            json.dump(formatted, jf, indent=4, ensure_ascii=False)
+        sink.put("resume_json", name, formatted)
 
-        logger.info("Resume segmented & formatted: %s", fname)
+        logger.info("Resume segmented & formatted: %s", name)
 
+    if not dry_run:
+        stats = resume_segment.get_segmentation_stats()
+        logger.info("Local segmentation hit rate: %s/%s (%.0f%%)", stats["local"],
+                    stats["local"] + stats["model"], stats["hit_rate"] * 100)
 
-def select_jd_json():
-    # Allow override via env var; otherwise pick first JD json in folder
+
+def select_jd():
+    """(name, JD JSON) to score against: PIPELINE_JD_JSON if it exists, else the first stored JD JSON."""
     env = os.environ.get("PIPELINE_JD_JSON")
     if env and os.path.exists(env):
-        return env
+        with open(env, "r", encoding="utf-8") as jf:
+            return os.path.splitext(os.path.basename(env))[0], json.load(jf)
 
-    files = [f for f in os.listdir(config.JD_SEGMENTED_JSON_FOLDER) if f.endswith(".json")]
-    if not files:
+    names = get_sink().names("jd_json")
+    if not names:
         raise RuntimeError("No JD JSON files found in " + config.JD_SEGMENTED_JSON_FOLDER)
-    return os.path.join(config.JD_SEGMENTED_JSON_FOLDER, files[0])
+    return names[0], get_sink().get("jd_json", names[0])
 
 
-def scoring_step(dry_run=False):
+def select_jd_json():
+    """The JD to score against (see select_jd)."""
+    return select_jd()[1]
+
+
+def local_scoring_step(jd_data, names=None):
+    """Dry-run scoring: deterministic local evaluations, written apart from model evaluations."""
+    print("Scoring resumes against JD locally (dry run)...")
+    sink = get_sink()
+    scorer = LocalScorer(jd_data)
+    names = sink.names("resume_json") if names is None else names
+    for name in names:
+        evaluation = scorer.evaluate(sink.get("resume_json", name))
+        sink.put("local_evaluation", name, {"resume_filename": name + ".json", "evaluation": evaluation, "scorer": "local"})
+    print(f"Saved {len(names)} local evaluations")
+
+
+def score_resumes(jd_name, jd_data, evaluate, scorer=None):
+    """Model-score every resume with ``evaluate(resume_json)``. When a call would exceed a budget the
+    run stops (BudgetExceeded), or with LEDGER_BUDGET_ACTION=local the remaining resumes are scored locally."""
+    sink = get_sink()
+    names = sink.names("resume_json")
+    for i, name in enumerate(names):
+        try:
+            with cost_ledger.attribute(resume=name, jd=jd_name):
+                evaluation = evaluate(sink.get("resume_json", name))
+        except BudgetExceeded as e:
+            if config.LEDGER_BUDGET_ACTION != "local":
+                raise
+            print(f"{e}: scoring the remaining {len(names) - i} resumes locally")
+            local_scoring_step(jd_data, names[i:])
+            return
+        out = {"resume_filename": name + ".json", "evaluation": evaluation}
+        if scorer:
+            out["scorer"] = scorer
+        sink.put("evaluation", name, out)
+        print(f"Saved evaluation for: {name}")
+
+
+def requirement_scoring_step(jd_name, jd_data):
+    """Per-requirement scoring: only requirements without a cached rating reach the model."""
+    print("Scoring resumes against JD per requirement...")
+    scorer = RequirementScorer(jd_data)
+    score_resumes(jd_name, jd_data, scorer.evaluate, scorer="requirements")
+    s = scorer.stats
+    print(f"Requirement ratings: {s['hits']} cached, {s['misses']} new in {s['calls']} model calls")
+
+
+def scoring_step(dry_run=False, per_requirement=False):
+    jd_name, jd_data = select_jd()
     if dry_run:
-        print("Skipping scoring in dry-run mode.")
+        local_scoring_step(jd_data)
+        return
+    if per_requirement:
+        requirement_scoring_step(jd_name, jd_data)
         return
-        
+
     print("Scoring resumes against JD...")
-    jd_json_path = select_jd_json()
-    with open(jd_json_path, "r", encoding="utf-8") as jf:
-        jd_data = json.load(jf)
     jd_text = json.dumps(jd_data, indent=4)
+    # evaluate_resume returns the parsed evaluation
+    score_resumes(jd_name, jd_data, lambda resume: evaluate_resume(json.dumps(resume, indent=4), jd_text))
 
-    resume_jsons = [f for f in os.listdir(config.RESUME_SEGMENTED_JSON_FOLDER) if f.endswith(".json")]
-    for fname in resume_jsons:
-        resume_path = os.path.join(config.RESUME_SEGMENTED_JSON_FOLDER, fname)
-        with open(resume_path, "r", encoding="utf-8") as rf:
-            resume_data = json.load(rf)
-        resume_text = json.dumps(resume_data, indent=4)
 
-        raw_evaluation = evaluate_resume(resume_text, jd_text)
-        evaluation = raw_evaluation  # Already parsed in evaluate_resume
-        out = {"resume_filename": fname, "evaluation": evaluation}
-        out_path = os.path.join(config.SCORING_OUTPUT_FOLDER, fname)
-        with open(out_path, "w", encoding="utf-8") as of:
-            json.dump(out, of, indent=4)
-        print(f"Saved evaluation for: {fname}")
+def matrix_step(jd_glob="*.json", workers=5, dry_run=False, top=None, per_requirement=False):
+    jds = scoring_matrix.select_jds(jd_glob)
+    if not jds:
+        raise RuntimeError("No JD JSON files matching " + jd_glob + " in " + config.JD_SEGMENTED_JSON_FOLDER)
+    if dry_run:
+        counts = scoring_matrix.run_matrix(jds, scoring_matrix.select_resumes(), local=True)
+    else:
+        counts = scoring_matrix.run_matrix(jds, scoring_matrix.select_resumes(), workers=workers, top=top,
+                                           requirements=per_requirement)
+    print(f"Scoring matrix: {counts['scored']} scored, {counts['failed']} failed, {counts['skipped']} already done")
+    if counts.get("over_budget"):
+        print(f"Over budget: {counts['over_budget']} pairs "
+              + ("scored locally" if config.LEDGER_BUDGET_ACTION == "local" else "left unscored"))
+    if counts.get("stopped"):
+        raise SystemExit(1)
+
+
+def batch_export_step(folder, jd_glob="*.json"):
+    """Parse resumes locally, then write every pending model request as batch-input files."""
+    parse_resumes()
+    result = batch_jobs.export(folder, jd_glob=jd_glob)
+    counts = result["counts"]
+    print(f"Batch export: {counts['jd_segment']} JD + {counts['resume_segment']} resume segmentation and "
+          f"{counts['score']} scoring requests ({counts['local']} segmented locally) in {len(result['files'])} files")
+    for path in result["files"]:
+        print(f"  {path}")
+
+
+def batch_ingest_step(files):
+    counts = batch_jobs.ingest(files)
+    print(f"Batch ingest: {counts['stored']} stored, {counts['failed']} failed, {counts['incomplete']} incomplete")
 
 
 def main():
     parser = argparse.ArgumentParser(description="Run the resume+JD pipeline end-to-end")
-    parser.add_argument("--dry-run", action="store_true", help="Do not call model APIs; run local steps only")
+    parser.add_argument("--dry-run", action="store_true", help="Do not call model APIs; run local steps only (local scorer)")
     parser.add_argument("--jd-json", type=str, help="Path to JD JSON for scoring (overrides auto selection)")
+    parser.add_argument("--matrix", action="store_true", help="Score every resume against every JD JSON")
+    parser.add_argument("--jd-glob", default="*.json", help="With --matrix: JD JSON file name pattern")
+    parser.add_argument("--workers", type=int, default=5, help="With --matrix: concurrent evaluations")
+    parser.add_argument("--top", type=int, help="With --matrix: only model-score each JD's N best resumes by local score")
+    parser.add_argument("--per-requirement", action="store_true",
+                        help="Score each JD requirement separately through the rating cache (JD edits only re-rate changed requirements)")
+    parser.add_argument("--batch-export", nargs="?", const=config.BATCH_FOLDER, metavar="FOLDER",
+                        help="Write pending segmentation / scoring requests as provider batch-input files instead of calling the model")
+    parser.add_argument("--batch-ingest", nargs="+", metavar="FILE",
+                        help="Store the results of batch output files (segmentations, then evaluations)")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
     args = parser.parse_args()
 
@@ -149,15 +250,43 @@ def main():
     if args.dry_run:
         logger.info("Dry-run: JD segmentation and resume parsing will run where possible, but model calls are skipped.")
 
-    process_jds(args.dry_run)
-    process_resumes(args.dry_run)
-
     if args.jd_json:
         os.environ["PIPELINE_JD_JSON"] = args.jd_json
 
-    scoring_step(args.dry_run)
+    cost_ledger.start_run()
+
+    if args.batch_export or args.batch_ingest:
+        try:
+            if args.batch_ingest:
+                batch_ingest_step(args.batch_ingest)
+            if args.batch_export:
+                batch_export_step(args.batch_export, args.jd_glob)
+        finally:
+            get_sink().flush(fsync=True)
+        return
+
+    try:
+        process_jds(args.dry_run)
+        process_resumes(args.dry_run)
+        if args.matrix:
+            matrix_step(args.jd_glob, args.workers, args.dry_run, args.top, args.per_requirement)
+        else:
+            scoring_step(args.dry_run, args.per_requirement)
+    except (CircuitOpenError, BudgetExceeded, PricesMissing) as e:
+        # the model endpoint is down / the budget is spent: stop instead of crawling through doomed calls
+        logger.error("Stopping pipeline: %s. Outputs written so far are kept.", e)
+        raise SystemExit(1)
+    finally:
+        get_sink().flush(fsync=True)
+        log_run_cost()
     logger.info("Pipeline finished. Outputs saved at each step.")
 
 
+def log_run_cost():
+    spent = cost_ledger.run_summary()
+    if spent:
+        logging.getLogger(__name__).info("Run %s: %s model calls, $%.4f", spent["run"], spent["calls"], spent["cost"])
+
+
 if __name__ == "__main__":
     main()
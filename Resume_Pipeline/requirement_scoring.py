@@ -0,0 +1,252 @@
+#requirement_scoring.py
+# Per-requirement scoring: the model rates the resume's evidence for each JD requirement on its own,
+# each rating is cached in SQLite by (resume hash, normalized requirement text, model), and the three
+# criteria scores are aggregated locally from the ratings. Editing one JD bullet then costs one call
+# per candidate for that bullet only; unchanged requirements (even reordered or reformatted) are hits.
+
+import re
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+import unicodedata
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+from . import config
+from .scoring import EVALUATION_CRITERIA
+from .compaction import count_tokens, to_prompt_json
+from .deadline import DeadlineExceeded
+from .circuit_breaker import CircuitOpenError
+from .cost_ledger import BudgetExceeded, PricesMissing, attribute
+from .local_scoring import experience_entries, experience_intervals, gap_continuity, load_json, score_label, shorten
+
+logger = logging.getLogger(__name__)
+
+MET_SCORE = 7  # a requirement rated at least this is reported as met, below 4 as missing
+
+# ----------------------------- PROMPT -----------------------------
+REQUIREMENT_SYSTEM_PROMPT = (
+    "You are a recruiter checking a candidate's resume against individual job requirements. "
+    "For each numbered requirement, rate how well the resume evidences it, judging only that requirement.\n\n"
+    "Respond with a single JSON object and nothing else, using exactly this schema:\n"
+    '{"requirements": [{"id": integer, "score": integer 0-10, "evidence": string, "last_used": integer year or null}]}\n\n'
+    "One entry per requirement id. score: 0 = no evidence, 5 = partly or indirectly evidenced, 10 = clearly and fully met. "
+    "evidence: one short sentence quoting or citing the resume. "
+    "last_used: the latest year the resume shows the requirement being used (the current year for ongoing roles), "
+    "or null when there is no dated evidence."
+)
+
+
+# ----------------------------- KEYS -----------------------------
+_BULLET_RE = re.compile(r"^\s*(?:[-*•·–]+|\(?\d+[.)])\s*")
+
+
+def normalize_requirement(text: str) -> str:
+    """Cache key text: bullets/numbering, case, spacing and trailing punctuation do not matter."""
+    text = unicodedata.normalize("NFKC", str(text))
+    text = _BULLET_RE.sub("", text).lower()
+    return re.sub(r"\s+", " ", text).strip(" .;,:")
+
+
+def resume_hash(resume: Any) -> str:
+    """Content hash of a structured resume (dict or JSON text); key order does not matter."""
+    resume = load_json(resume)
+    canonical = resume if isinstance(resume, str) else json.dumps(resume, sort_keys=True, ensure_ascii=False,
+                                                                 separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+# ----------------------------- CACHE -----------------------------
+class RequirementCache:
+    """SQLite store of per-requirement ratings; safe to share between threads."""
+
+    def __init__(self, path: str = None):
+        self.path = path or config.REQUIREMENT_CACHE_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS requirement_scores ("
+                " resume_hash TEXT NOT NULL, requirement TEXT NOT NULL, model TEXT NOT NULL,"
+                " score INTEGER NOT NULL, evidence TEXT, last_used INTEGER, created REAL NOT NULL,"
+                " PRIMARY KEY (resume_hash, requirement, model))"
+            )
+
+    def get_many(self, resume_key: str, requirements: List[str], model: str) -> Dict[str, dict]:
+        """Cached ratings of the given normalized requirements, keyed by requirement."""
+        if not requirements:
+            return {}
+        marks = ",".join("?" * len(requirements))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT requirement, score, evidence, last_used FROM requirement_scores "
+                f"WHERE resume_hash = ? AND model = ? AND requirement IN ({marks})",
+                [resume_key, model, *requirements],
+            ).fetchall()
+        return {r: {"score": s, "evidence": e or "", "last_used": y} for r, s, e, y in rows}
+
+    def put_many(self, resume_key: str, ratings: Dict[str, dict], model: str):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO requirement_scores VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(resume_key, req, model, r["score"], r["evidence"], r["last_used"], now) for req, r in ratings.items()],
+            )
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM requirement_scores").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> RequirementCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RequirementCache()
+        return _cache
+
+
+# ----------------------------- MODEL CALL -----------------------------
+def _strip_code_fence(text: str) -> str:
+    m = re.match(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", text or "", re.S)
+    return m.group(1) if m else (text or "")
+
+
+def validate_ratings(data: Any, count: int) -> List[dict]:
+    """Ratings for requirement ids 1..count in order. Raises ValueError on any mismatch."""
+    entries = data.get("requirements") if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError("'requirements' must be a list")
+    ratings = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            raise ValueError("requirement entries must be objects")
+        num, score, evidence, last_used = entry.get("id"), entry.get("score"), entry.get("evidence"), entry.get("last_used")
+        if not isinstance(num, int) or not 1 <= num <= count:
+            raise ValueError(f"unknown requirement id: {num!r}")
+        if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 10:
+            raise ValueError(f"score out of range for requirement {num}: {score!r}")
+        if last_used is not None and (isinstance(last_used, bool) or not isinstance(last_used, int)):
+            raise ValueError(f"last_used must be a year or null for requirement {num}")
+        ratings[num] = {"score": int(round(score)), "evidence": str(evidence or "").strip(), "last_used": last_used}
+    if len(ratings) != count:
+        raise ValueError(f"expected {count} ratings, got {len(ratings)}")
+    return [ratings[i] for i in range(1, count + 1)]
+
+
+def rate_requirements(resume: Any, requirements: List[str], model: str = None) -> List[dict]:
+    """One model call rating the resume against each requirement (same order). Raises ValueError on a bad reply."""
+    from .openai_client import call_chat_completions
+
+    listing = "\n".join(f"{i}. {req}" for i, req in enumerate(requirements, 1))
+    budget = max(0, config.PROMPT_TOKEN_BUDGET - count_tokens(REQUIREMENT_SYSTEM_PROMPT) - count_tokens(listing))
+    messages = [
+        {"role": "system", "content": REQUIREMENT_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Resume: {to_prompt_json(load_json(resume), budget)}\nRequirements:\n{listing}"},
+    ]
+    with attribute(stage="requirements"):
+        response = call_chat_completions(messages, model=model or config.DEPLOYMENT_NAME,
+                                         response_format={"type": "json_object"})
+    return validate_ratings(json.loads(_strip_code_fence(response.choices[0].message.content)), len(requirements))
+
+
+# ----------------------------- SCORER -----------------------------
+def _requirements(items) -> List[str]:
+    items = items if isinstance(items, list) else [items] if items else []
+    return [str(i).strip() for i in items if str(i).strip()]
+
+
+class RequirementScorer:
+    """Scores resumes against one JD from cached or freshly rated requirements."""
+
+    def __init__(self, jd: Any, cache: RequirementCache = None, model: str = None, today: Optional[date] = None):
+        jd = load_json(jd)
+        if not isinstance(jd, dict):
+            jd = {"Non-Negotiable Requirements": [l.strip("-•* ") for l in str(jd).splitlines() if l.strip()]}
+        self.must = _requirements(jd.get("Non-Negotiable Requirements", []))
+        self.nice = _requirements(jd.get("Negotiable Requirements", []))
+        self.cache = cache or get_cache()
+        self.model = model or config.DEPLOYMENT_NAME
+        self.today = today or date.today()
+        self.batch_size = max(1, config.REQUIREMENT_BATCH_SIZE)
+        self.stats = {"hits": 0, "misses": 0, "calls": 0}
+        self._stats_lock = threading.Lock()
+
+    def ratings(self, resume: Any) -> Dict[str, dict]:
+        """Rating per normalized requirement; only requirements missing from the cache are sent to the model."""
+        key = resume_hash(resume)
+        wanted: Dict[str, str] = {}  # normalized -> text shown to the model
+        for req in self.must + self.nice:
+            wanted.setdefault(normalize_requirement(req), req)
+        found = self.cache.get_many(key, list(wanted), self.model)
+        missing = [norm for norm in wanted if norm not in found]
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            rated = dict(zip(batch, rate_requirements(resume, [wanted[n] for n in batch], self.model)))
+            self.cache.put_many(key, rated, self.model)
+            found.update(rated)
+        with self._stats_lock:
+            self.stats["hits"] += len(wanted) - len(missing)
+            self.stats["misses"] += len(missing)
+            self.stats["calls"] += -(-len(missing) // self.batch_size)
+        return found
+
+    def _fulfillment(self, requirements: List[str], ratings: Dict[str, dict], label: str) -> Dict[str, str]:
+        if not requirements:
+            return {"score": "10/10", "description": f"The JD lists no {label} requirements.\nNothing to rate."}
+        scores = [ratings[normalize_requirement(r)]["score"] for r in requirements]
+        met = [r for r, s in zip(requirements, scores) if s >= MET_SCORE]
+        missing = [r for r, s in zip(requirements, scores) if s < 4]
+        first = f"Met {len(met)} of {len(requirements)} {label} requirements" + (f": {shorten(met)}." if met else ".")
+        second = f"Weak or no evidence: {shorten(missing)}." if missing else "Every requirement is at least partly evidenced."
+        return {"score": score_label(sum(scores) / len(scores) / 10), "description": f"{first}\n{second}"}
+
+    def _continuity(self, resume: Any, ratings: Dict[str, dict]) -> Dict[str, str]:
+        """Recency of the evidenced requirements (weighted by their score) and gaps between dated roles."""
+        rated = [r for r in ratings.values() if r["score"] > 0]
+        dated = [r for r in rated if r["last_used"]]
+        if not dated:
+            return {"score": "0/10", "description": "No requirement has dated evidence in the resume.\n"
+                                                     "Continuity and recency could not be established."}
+        weight = sum(r["score"] for r in dated)
+        recency = sum(r["score"] * max(0.0, 1 - max(0, self.today.year - r["last_used"] - 1) / 4) for r in dated) / weight
+        longest_gap, continuity = gap_continuity(experience_intervals(experience_entries(resume), self.today))
+        stale = sorted({r["last_used"] for r in dated if self.today.year - r["last_used"] > 1})
+        first = f"{len(dated)} of {len(rated)} evidenced requirements are dated; latest use {max(r['last_used'] for r in dated)}."
+        second = (f"Longest gap between roles {longest_gap} months." if longest_gap > 0 else "No gaps between dated roles.") \
+            + (f" Older evidence from {shorten([str(y) for y in stale])}." if stale else "")
+        return {"score": score_label(0.7 * recency + 0.3 * continuity), "description": f"{first}\n{second}"}
+
+    def evaluate(self, resume: Any) -> Dict[str, Dict[str, str]]:
+        """Three-criterion evaluation in the parse_evaluation structure ({} when the model reply is unusable)."""
+        resume = load_json(resume)
+        try:
+            ratings = self.ratings(resume)
+        except (DeadlineExceeded, CircuitOpenError, BudgetExceeded, PricesMissing):
+            raise
+        except Exception as e:
+            # json.JSONDecodeError and validation errors are ValueErrors; nothing was cached for them
+            logger.warning("Per-requirement rating failed: %s", e)
+            return {}
+        return {
+            EVALUATION_CRITERIA[0]: self._fulfillment(self.must, ratings, "non-negotiable"),
+            EVALUATION_CRITERIA[1]: self._fulfillment(self.nice, ratings, "negotiable"),
+            EVALUATION_CRITERIA[2]: self._continuity(resume, ratings),
+        }
+
+
+def evaluate_by_requirement(resume: Any, jd: Any) -> Dict[str, Dict[str, str]]:
+    """Evaluate one resume (dict or JSON text) against one JD through the requirement cache."""
+    return RequirementScorer(jd).evaluate(resume)
@@ -0,0 +1,298 @@
+#result_sink.py
+# Where pipeline results are stored. FolderSink is the original layout: one pretty-printed file per
+# item per stage (parsed_resumes/<name>.txt, segmented_resumes_json/<name>.json, ...). JsonlSink
+# appends one compact record per item per stage to a single JSONL file, with batched writes and
+# periodic fsync. Both expose the same logical view: put / get / exists / names per stage.
+
+import os
+import json
+import time
+import atexit
+import logging
+import argparse
+import threading
+from importlib.util import find_spec
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+
+logger = logging.getLogger(__name__)
+
+HAS_ORJSON = find_spec("orjson") is not None  # fast encoder/decoder; falls back to the json module
+
+# Logical stage -> (config attribute of its folder, file extension). ".txt" stages hold text,
+# ".json" stages hold JSON values; names may contain "/" (e.g. "<jd>/<resume>" evaluations).
+STAGES: Dict[str, Tuple[str, str]] = {
+    "jd_segmented": ("JD_SEGMENTED_FOLDER", ".txt"),
+    "jd_json": ("JD_SEGMENTED_JSON_FOLDER", ".json"),
+    "resume_parsed": ("RESUME_PARSED_OUTPUT", ".txt"),
+    "resume_segmented": ("RESUME_SEGMENTED_FOLDER", ".txt"),
+    "resume_json": ("RESUME_SEGMENTED_JSON_FOLDER", ".json"),
+    "evaluation": ("SCORING_OUTPUT_FOLDER", ".json"),
+    "local_evaluation": ("LOCAL_SCORING_OUTPUT_FOLDER", ".json"),
+}
+
+
+# ----------------------------- ENCODING -----------------------------
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON (orjson when installed)."""
+    if HAS_ORJSON:
+        import orjson
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    if HAS_ORJSON:
+        import orjson
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# ----------------------------- ONE FILE PER ITEM -----------------------------
+class FolderSink:
+    """The per-file layout: <stage folder>/<name><ext>, JSON pretty-printed.
+
+    ``folders`` overrides the configured folder of some stages, e.g. {"evaluation": "/tmp/out"}.
+    """
+
+    def __init__(self, folders: Optional[Dict[str, str]] = None):
+        self.folders = folders or {}
+
+    def folder(self, stage: str) -> str:
+        return self.folders.get(stage) or getattr(config, STAGES[stage][0])
+
+    def location(self, stage: str) -> str:
+        """Where ``stage`` is stored, for messages."""
+        return self.folder(stage)
+
+    def _path(self, stage: str, name: str) -> str:
+        return os.path.join(self.folder(stage), name + STAGES[stage][1])
+
+    def put(self, stage: str, name: str, value: Any):
+        path = self._path(stage, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            if STAGES[stage][1] == ".txt":
+                f.write(value or "")
+            else:
+                json.dump(value, f, indent=4, ensure_ascii=False)
+
+    def get(self, stage: str, name: str, default: Any = None) -> Any:
+        path = self._path(stage, name)
+        if not os.path.exists(path):
+            return default
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read() if STAGES[stage][1] == ".txt" else json.load(f)
+
+    def exists(self, stage: str, name: str) -> bool:
+        return os.path.exists(self._path(stage, name))
+
+    def names(self, stage: str) -> List[str]:
+        root, ext = self.folder(stage), STAGES[stage][1]
+        out = []
+        for dirpath, _, files in os.walk(root):
+            rel = os.path.relpath(dirpath, root)
+            for f in files:
+                if f.endswith(ext):
+                    name = f[:-len(ext)]
+                    out.append(name if rel == "." else f"{rel.replace(os.sep, '/')}/{name}")
+        return sorted(out)
+
+    def flush(self, fsync: bool = False):
+        pass
+
+    def close(self):
+        pass
+
+
+# ----------------------------- APPEND-ONLY JSONL -----------------------------
+class JsonlSink:
+    """
+    One JSONL file of {"stage", "name", "value", "ts"} records; the latest record of a (stage, name)
+    wins. Writes are buffered and flushed every ``flush_records`` records, and the file is fsynced
+    at most every ``fsync_interval`` seconds (0 = on every flush). A torn last line from a crash is
+    truncated on open. One writer process per file.
+    """
+
+    def __init__(self, path: str = None, flush_records: int = None, fsync_interval: float = None):
+        self.path = path or config.RESULT_JSONL_PATH
+        self.flush_records = flush_records or config.RESULT_FLUSH_RECORDS
+        self.fsync_interval = config.RESULT_FSYNC_INTERVAL if fsync_interval is None else fsync_interval
+        self._lock = threading.Lock()
+        self._index: Dict[Tuple[str, str], int] = {}  # (stage, name) -> byte offset of its latest record
+        self._pending: Dict[Tuple[str, str], Any] = {}  # written but not yet flushed
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self.records = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._size = self._scan()
+        self._file = open(self.path, "ab")
+        self._last_fsync = time.monotonic()
+
+    def location(self, stage: str) -> str:
+        return self.path
+
+    def _scan(self) -> int:
+        """Index the existing file; returns the offset after the last complete record."""
+        if not os.path.exists(self.path):
+            return 0
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = loads(line)
+                except ValueError:
+                    logger.warning("Truncating %s at byte %s (torn record)", self.path, offset)
+                    break
+                self._index[(record["stage"], record["name"])] = offset
+                self.records += 1
+                offset += len(line)
+        if offset != os.path.getsize(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+        return offset
+
+    def put(self, stage: str, name: str, value: Any):
+        if stage not in STAGES:
+            raise KeyError(f"unknown stage: {stage}")
+        line = dumps({"stage": stage, "name": name, "value": value, "ts": round(time.time(), 3)}) + b"\n"
+        with self._lock:
+            key = (stage, name)
+            self._index[key] = self._size + self._buffered
+            self._pending[key] = value
+            self._buffer.append(line)
+            self._buffered += len(line)
+            self.records += 1
+            if len(self._buffer) >= self.flush_records:
+                self._flush_locked()
+
+    def _flush_locked(self, fsync: bool = False):
+        if self._buffer:
+            self._file.write(b"".join(self._buffer))
+            self._file.flush()
+            self._size += self._buffered
+            self._buffer.clear()
+            self._buffered = 0
+            self._pending.clear()
+        now = time.monotonic()
+        if fsync or now - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def flush(self, fsync: bool = False):
+        with self._lock:
+            self._flush_locked(fsync)
+
+    def get(self, stage: str, name: str, default: Any = None) -> Any:
+        key = (stage, name)
+        with self._lock:
+            if key in self._pending:
+                return self._pending[key]
+            offset = self._index.get(key)
+        if offset is None:
+            return default
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return loads(f.readline())["value"]
+
+    def exists(self, stage: str, name: str) -> bool:
+        return (stage, name) in self._index
+
+    def names(self, stage: str) -> List[str]:
+        with self._lock:
+            return sorted(name for s, name in self._index if s == stage)
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._flush_locked(fsync=True)
+                self._file.close()
+
+
+# ----------------------------- PROCESS-WIDE SINK -----------------------------
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_sink():
+    """The sink selected by RESULT_SINK ("files" or "jsonl"); a JSONL sink is closed at exit."""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            if config.RESULT_SINK == "jsonl":
+                _sink = JsonlSink()
+                atexit.register(_sink.close)
+            else:
+                _sink = FolderSink()
+        return _sink
+
+
+def close_sink():
+    global _sink
+    with _sink_lock:
+        if _sink is not None:
+            _sink.close()
+            _sink = None
+
+
+def benchmark(n: int) -> Dict[str, Dict[str, float]]:
+    """Write and read back ``n`` sample evaluations with each sink, in a temporary folder."""
+    import tempfile
+    evaluation = {"resume_filename": "resume.json", "evaluation": {
+        title: {"score": "7/10", "description": "Matches most requirements.\nSome gaps in recent experience."}
+        for title in ("Non-Negotiable", "Negotiable", "Continuity")}}
+    results = {}
+    with tempfile.TemporaryDirectory() as td:
+        sinks = {"files": FolderSink({"evaluation": os.path.join(td, "evaluated")}),
+                 "jsonl": JsonlSink(os.path.join(td, "results.jsonl"))}
+        for label, store in sinks.items():
+            start = time.perf_counter()
+            for i in range(n):
+                store.put("evaluation", f"jd/resume{i}", evaluation)
+            store.close()
+            written = time.perf_counter() - start
+            if label == "jsonl":
+                store = JsonlSink(store.path)  # reopen: index rebuilt from the file
+            start = time.perf_counter()
+            for name in store.names("evaluation"):
+                store.get("evaluation", name)
+            read = time.perf_counter() - start
+            store.close()
+            files = 1 if label == "jsonl" else sum(len(f) for _, _, f in os.walk(store.folder("evaluation")))
+            results[label] = {"write_s": round(written, 3), "read_s": round(read, 3), "files": files}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or export a JSONL result file")
+    parser.add_argument("--path", default=config.RESULT_JSONL_PATH)
+    parser.add_argument("--export", action="store_true",
+                        help="Write the latest value of every record to the per-file folders")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Time writing and reading N evaluations per sink")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        for label, r in benchmark(args.benchmark).items():
+            print(f"{label:<6} write {r['write_s']:>7}s  read {r['read_s']:>7}s  files {r['files']}")
+        return
+
+    store = JsonlSink(args.path)
+    for stage in STAGES:
+        names = store.names(stage)
+        if names:
+            print(f"{stage:<18} {len(names):>7} items")
+    print(f"{store.records} records, {os.path.getsize(store.path) / 1e6:.1f} MB")
+    if args.export:
+        folders = FolderSink()
+        for stage in STAGES:
+            for name in store.names(stage):
+                folders.put(stage, name, store.get(stage, name))
+        print("Exported to the per-file folders")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
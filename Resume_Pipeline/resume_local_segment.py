@@ -0,0 +1,230 @@
+#resume_local_segment.py
+# Deterministic resume segmentation: detect section headings in loader output and emit the
+# same seven-section text the model produces, together with a confidence score.
+
+import re
+from typing import Dict, List, Tuple
+
+# Output order must match resume_segment.SEGMENTATION_SYSTEM_PROMPT / resume_format headings
+SECTIONS = [
+    "Personal Information",
+    "Education",
+    "Experience",
+    "Skills/programming Languages",
+    "Projects",
+    "Certifications/Courses",
+    "Other Information",
+]
+
+# ----------------------------- HEADING VOCABULARY -----------------------------
+# Exact (normalized) heading text -> section
+HEADING_MAP: Dict[str, str] = {}
+_HEADINGS_BY_SECTION = {
+    "Personal Information": [
+        "contact", "contact information", "contact info", "contact details", "personal information",
+        "personal details", "personal info", "links", "social",
+    ],
+    "Education": [
+        "education", "academic qualification", "academic qualifications", "academics", "academic background",
+        "education and training", "educational background", "qualifications", "education & training",
+    ],
+    "Experience": [
+        "experience", "work experience", "professional experience", "employment", "employment history",
+        "work history", "technical experience", "internships", "internship", "career history",
+        "relevant experience", "industry experience", "professional background",
+    ],
+    "Skills/programming Languages": [
+        "skills", "technical skills", "soft skills", "skills & proficiencies", "skills and proficiencies",
+        "skills and tools", "skills & tools", "languages and technologies", "programming languages",
+        "tools", "other tools", "core competencies", "competencies", "expertise", "technologies",
+        "tech stack", "technical expertise", "key skills",
+    ],
+    "Projects": [
+        "projects", "personal projects", "academic projects", "key projects", "selected projects",
+        "side projects", "project experience",
+    ],
+    "Certifications/Courses": [
+        "certifications", "certification", "certificates", "courses", "coursework", "licenses",
+        "licenses & certifications", "licenses and certifications", "trainings", "training",
+        "certifications & courses", "certifications and courses", "microsoft certifications",
+        "online courses", "relevant coursework",
+    ],
+    "Other Information": [
+        "profile", "about", "about me", "summary", "professional summary", "career summary", "objective",
+        "career objective", "awards", "honors & awards", "honors and awards", "achievements",
+        "accomplishments", "languages", "interests", "hobbies", "references", "reference",
+        "volunteering", "volunteer experience", "publications", "extracurricular activities",
+        "additional experience and awards", "additional information", "activities", "leadership",
+    ],
+}
+for _section, _names in _HEADINGS_BY_SECTION.items():
+    for _name in _names:
+        HEADING_MAP[_name] = _section
+
+# Sections every real resume has; used for confidence
+CORE_SECTIONS = ("Education", "Experience", "Skills/programming Languages")
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"\+?\(?\d[\d\s\-()]{8,}\d")
+YEAR_RANGE_RE = re.compile(r"^\(?(19|20)\d\d\s*[-\u2013]\s*(19|20)\d\d\)?$")  # "(2012 - 2016" is not a phone
+LABEL_RE = re.compile(r"^[A-Za-z][A-Za-z \-]{1,20}:$")
+CONTACT_LABELS = {"name", "email", "e-mail", "phone", "mobile", "cell", "tel"}
+NAME_RE = re.compile(r"^[A-Za-z][A-Za-z.'\-]*(?:\s+[A-Za-z][A-Za-z.'\-]*){1,4}$")
+
+
+def _normalize_heading(line: str) -> str:
+    s = re.sub(r"^\s*(?:\d+\.|[-•▪*●])\s*", "", line)
+    s = s.strip().rstrip(":").strip().lower()
+    return re.sub(r"\s+", " ", s)
+
+
+def match_heading(line: str):
+    """Return ``(section, inline_text)`` if the line is a section heading, else None.
+
+    Handles bare headings ("EDUCATION", "Work Experience:") and inline ones
+    ("Skills: Python, SQL") where the text after the colon belongs to the section.
+    """
+    stripped = line.strip()
+    if not stripped:
+        return None
+    if len(stripped) <= 45:
+        section = HEADING_MAP.get(_normalize_heading(stripped))
+        if section:
+            return section, ""
+    if ":" in stripped:
+        head, rest = stripped.split(":", 1)
+        section = HEADING_MAP.get(_normalize_heading(head))
+        if section and rest.strip():
+            return section, rest.strip()
+    return None
+
+
+def _join_labels(lines: List[str]) -> List[str]:
+    """Merge a bare "Label:" line with the value on the next line ("Phone:" + "+92 ..." -> "Phone: +92 ...")."""
+    out = []
+    items = [l.strip() for l in lines if l.strip()]
+    i = 0
+    while i < len(items):
+        ln = items[i]
+        if LABEL_RE.match(ln) and i + 1 < len(items) and not LABEL_RE.match(items[i + 1]):
+            out.append(f"{ln} {items[i + 1]}")
+            i += 2
+            continue
+        out.append(ln)
+        i += 1
+    return out
+
+
+def _display_name(line: str) -> str:
+    """Title-case all-caps names ("SYED FAIZAN AHMED" -> "Syed Faizan Ahmed")."""
+    return " ".join(w.capitalize() if w.isupper() else w for w in line.strip().split())
+
+
+def _find_name(lines: List[str]) -> str:
+    for ln in lines:
+        s = ln.strip()
+        if NAME_RE.match(s) and not match_heading(s) and len(s) <= 40:
+            return _display_name(s)
+    return ""
+
+
+# ----------------------------- FUNCTION: segment locally -----------------------------
+def segment_resume_local(text: str) -> Tuple[str, float]:
+    """Segment resume text by heading detection.
+
+    Returns ``(segmented_text, confidence)`` where ``segmented_text`` uses the same
+    seven headings as the model output and ``confidence`` is in [0, 1].
+    """
+    lines = [l.rstrip() for l in (text or "").replace("\r\n", "\n").split("\n")]
+    content_lines = [l for l in lines if l.strip()]
+    buckets: Dict[str, List[str]] = {s: [] for s in SECTIONS}
+    preamble: List[str] = []
+    current = None
+    headings_found = 0
+
+    for line in lines:
+        if not line.strip():
+            if current:
+                buckets[current].append("")
+            continue
+        hit = match_heading(line)
+        if hit:
+            current, inline = hit
+            headings_found += 1
+            if buckets[current] and buckets[current][-1] != "":
+                buckets[current].append("")
+            if inline:
+                buckets[current].append(inline)
+            continue
+        if current is None:
+            preamble.append(line.strip())
+        else:
+            buckets[current].append(line.strip())
+
+    # Personal Information: name, email and phone as "Key: value" lines, then the preamble
+    email = EMAIL_RE.search(text or "")
+    phone = next((m for m in PHONE_RE.finditer(text or "")
+                  if sum(c.isdigit() for c in m.group(0)) >= 9 and not YEAR_RANGE_RE.match(m.group(0).strip())), None)
+    name = _find_name(preamble)
+    if not name and email:
+        # contact block may sit anywhere (e.g. a sidebar extracted last): nearest name-like line to the email
+        idx = next((i for i, l in enumerate(content_lines) if email.group(0) in l), 0)
+        nearby = content_lines[max(0, idx - 4):idx][::-1] + content_lines[idx + 1:idx + 4]
+        name = _find_name(nearby)
+
+    contact_values = {v for v in (name, email and email.group(0), phone and phone.group(0).strip()) if v}
+    personal = []
+    if name:
+        personal.append(f"Name: {name}")
+    if email:
+        personal.append(f"Email: {email.group(0)}")
+    if phone:
+        personal.append(f"Phone: {phone.group(0).strip()}")
+    for ln in _join_labels(preamble + buckets["Personal Information"]):
+        if ln in contact_values or _display_name(ln) in contact_values:
+            continue
+        label = ln.split(":", 1)[0].strip().lower() if ":" in ln else ""
+        if label in CONTACT_LABELS:
+            continue  # already emitted as Name/Email/Phone above
+        personal.append(ln)
+    buckets["Personal Information"] = personal
+    # drop contact lines that landed inside other sections (sidebars extracted out of order)
+    for sec in SECTIONS[1:]:
+        buckets[sec] = [l for l in buckets[sec] if l not in contact_values and _display_name(l) not in contact_values]
+
+    out = []
+    for s in SECTIONS:
+        out.append(s)
+        body = "\n".join(buckets[s]).strip()
+        body = re.sub(r"\n{3,}", "\n\n", body)
+        if body:
+            out.append(body)
+        out.append("")
+
+    return "\n".join(out).strip(), _confidence(content_lines, buckets, preamble, headings_found,
+                                                bool(email or phone), bool(name))
+
+
+# Confidence ceiling when neither a name nor contact details were found: the Personal Information
+# section would come out empty, so the model should segment it
+NO_IDENTITY_CAP = 0.5
+
+
+def _confidence(content_lines, buckets, preamble, headings_found, has_contact, has_name) -> float:
+    """Score how much of the resume was placed under recognized headings.
+
+    - core coverage: Education / Experience / Skills found (45%)
+    - line coverage: share of lines after a recognized heading, allowing a short preamble (30%)
+    - contact details found (15%)
+    - enough distinct headings to trust the structure (10%)
+
+    Without a name or contact details the score is capped at NO_IDENTITY_CAP.
+    """
+    if not content_lines:
+        return 0.0
+    core = sum(1 for s in CORE_SECTIONS if any(l.strip() for l in buckets[s])) / len(CORE_SECTIONS)
+    stray = max(0, len(preamble) - 8)  # a name/contact block before the first heading is normal
+    coverage = 1.0 - stray / len(content_lines)
+    distinct = min(1.0, headings_found / 4.0)
+    score = round(0.45 * core + 0.30 * coverage + 0.15 * has_contact + 0.10 * distinct, 3)
+    return score if has_contact or has_name else min(score, NO_IDENTITY_CAP)
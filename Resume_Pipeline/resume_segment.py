@@ -3,14 +3,31 @@
 
 
 import os
+import re
+import argparse
+import logging
+import threading
 import concurrent.futures
 from . import config
+from .resume_local_segment import segment_resume_local, SECTIONS
+from .compaction import PromptTooLarge, compact_text, chunk_text, count_tokens
+from .circuit_breaker import CircuitOpenError
+from .cost_ledger import BudgetExceeded, attribute
 
 # ----------------------------- CONFIG -----------------------------
 INPUT_FOLDER = config.RESUME_PARSED_FOLDER
 OUTPUT_FOLDER = config.RESUME_SEGMENTED_FOLDER
 SKIP_EXISTING = config.SKIP_EXISTING
 DEPLOYMENT_NAME = config.DEPLOYMENT_NAME
+LOCAL_SEGMENTATION = config.RESUME_LOCAL_SEGMENTATION
+LOCAL_CONFIDENCE = config.RESUME_LOCAL_CONFIDENCE
+TOKEN_BUDGET = config.PROMPT_TOKEN_BUDGET
+
+logger = logging.getLogger(__name__)
+
+# Local-vs-model counters (shared across worker threads)
+_stats_lock = threading.Lock()
+_stats = {"local": 0, "model": 0}
 
 # Note: client initialization is lazy inside call helper to avoid requiring
 # OPENAI_API_KEY at import time (supports dry-run/testing).
@@ -31,58 +48,145 @@ SEGMENTATION_SYSTEM_PROMPT = (
 
 # ----------------------------- FUNCTION: segment a resume -----------------------------
 def segment_resume(text: str, dry_run: bool = False) -> str:
-    """Segment a resume. If dry_run=True, avoid API calls and return a simple structured segmentation."""
+    """Segment a resume.
+
+    The local heading-based segmenter runs first; its result is used when its confidence
+    reaches LOCAL_CONFIDENCE (or always when dry_run=True, which never calls the API).
+    Otherwise the model segments the resume, unless that would exceed a cost budget and
+    LEDGER_BUDGET_ACTION is "local".
+    """
+    local_text, confidence = segment_resume_local(text)
     if dry_run:
-        # Create structured section headers and place full text under Other Information
-        sections = [
-            "Personal Information",
-            "Education",
-            "Experience",
-            "Skills/programming Languages",
-            "Projects",
-            "Certifications/Courses",
-            "Other Information",
-        ]
-        out = []
-        for s in sections[:-1]:
-            out.append(s)
-            out.append("")
-        out.append("Other Information")
-        out.append(text or "")
-        return "\n".join(out)
+        return local_text
 
+    if LOCAL_SEGMENTATION and confidence >= LOCAL_CONFIDENCE:
+        _record("local")
+        logger.info("Local segmentation used (confidence %.2f)", confidence)
+        return local_text
+
+    _record("model")
+    logger.info("Local segmentation confidence %.2f below %.2f; calling model", confidence, LOCAL_CONFIDENCE)
     from .openai_client import call_chat_completions
 
-    messages = [
-        {"role": "system", "content": SEGMENTATION_SYSTEM_PROMPT},
-        {"role": "user", "content": text},
+    parts = []
+    try:
+        with attribute(stage="resume_segment"):
+            for messages in segmentation_messages(text):
+                response = call_chat_completions(messages, model=DEPLOYMENT_NAME)
+                parts.append(response.choices[0].message.content)
+    except BudgetExceeded as e:
+        if config.LEDGER_BUDGET_ACTION != "local":
+            raise
+        logger.warning("%s; using the local segmentation (confidence %.2f)", e, confidence)
+        return local_text
+    if len(parts) > 1:
+        logger.info("Resume segmented in %s chunks; merging sections", len(parts))
+    return merge_segmented(parts)
+
+
+def segmentation_messages(text: str) -> list:
+    """One segmentation prompt per chunk of the resume (the replies are joined with merge_segmented)."""
+    # Compact the input and keep each prompt, system prompt included, within the token budget;
+    # long resumes are segmented chunk by chunk and the sections merged back together
+    room = TOKEN_BUDGET - count_tokens(SEGMENTATION_SYSTEM_PROMPT)
+    if room <= 0:
+        raise PromptTooLarge(f"PROMPT_TOKEN_BUDGET={TOKEN_BUDGET} leaves no room next to the segmentation system prompt")
+    return [
+        [
+            {"role": "system", "content": SEGMENTATION_SYSTEM_PROMPT},
+            {"role": "user", "content": chunk},
+        ]
+        for chunk in chunk_text(compact_text(text), room)
     ]
 
-    response = call_chat_completions(messages, model=DEPLOYMENT_NAME)
-    return response.choices[0].message.content
+
+def merge_segmented(parts) -> str:
+    """Merge several segmented outputs (one per chunk) section by section, in canonical order."""
+    if len(parts) == 1:
+        return parts[0]
+    canonical = {s.lower(): s for s in SECTIONS}
+    pattern = r"(?im)^(?:\d+\.\s*)?(%s)\s*$" % "|".join(re.escape(s) for s in SECTIONS)
+    merged = {s: [] for s in SECTIONS}
+    for part in parts:
+        matches = list(re.finditer(pattern, part))
+        for i, m in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(part)
+            body = part[m.end():end].strip()
+            if body:
+                merged[canonical[m.group(1).lower()]].append(body)
+    # Contact fields repeat across chunks: keep the first value for each "Key:" label
+    personal, labels = [], set()
+    for line in "\n".join(merged["Personal Information"]).splitlines():
+        label = line.split(":", 1)[0].strip().lower() if ":" in line else None
+        if label and label in labels:
+            continue
+        if label:
+            labels.add(label)
+        personal.append(line)
+    merged["Personal Information"] = ["\n".join(personal)] if personal else []
+
+    out = []
+    for s in SECTIONS:
+        out.append(s)
+        out.extend(merged[s])
+        out.append("")
+    return "\n".join(out).strip()
+
+
+def _record(kind: str):
+    with _stats_lock:
+        _stats[kind] += 1
+
+
+def get_segmentation_stats() -> dict:
+    """Return local/model call counts and the local hit rate since process start."""
+    with _stats_lock:
+        local, model = _stats["local"], _stats["model"]
+    total = local + model
+    return {"local": local, "model": model, "hit_rate": (local / total) if total else 0.0}
 
 # ----------------------------- MAIN -----------------------------
 def process_file(fname):
     out_path = os.path.join(OUTPUT_FOLDER, fname)
     if SKIP_EXISTING and os.path.exists(out_path):
-        import logging
-        logging.getLogger(__name__).info("Skipping %s, already segmented.", fname)
+        logger.info("Skipping %s, already segmented.", fname)
         return
 
     path = os.path.join(INPUT_FOLDER, fname)
     with open(path, "r", encoding="utf-8") as f:
         raw_text = f.read()
 
-    import logging
-    logging.getLogger(__name__).info("Processing: %s", fname)
+    logger.info("Processing: %s", fname)
     segmented = segment_resume(raw_text)
 
     with open(out_path, "w", encoding="utf-8") as f:
         f.write(segmented)
-    logging.getLogger(__name__).info("Saved segmented resume: %s", fname)
+    logger.info("Saved segmented resume: %s", fname)
 
 # ----------------------------- MAIN EXECUTION -----------------------------
+def report():
+    """Print local-segmenter confidence per parsed resume and the expected hit rate (no API calls)."""
+    files = sorted(f for f in os.listdir(INPUT_FOLDER) if f.endswith(".txt"))
+    hits = 0
+    for fname in files:
+        with open(os.path.join(INPUT_FOLDER, fname), "r", encoding="utf-8") as f:
+            _, confidence = segment_resume_local(f.read())
+        local = confidence >= LOCAL_CONFIDENCE
+        hits += local
+        print(f"{fname:<30} confidence={confidence:.2f} -> {'local' if local else 'model'}")
+    if files:
+        print(f"Local hit rate: {hits}/{len(files)} ({hits / len(files):.0%}) at threshold {LOCAL_CONFIDENCE:.2f}")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Segment parsed resumes")
+    parser.add_argument("--report", action="store_true", help="Only report local segmentation confidence / hit rate")
+    args = parser.parse_args()
+
+    if args.report:
+        report()
+        return
+
     if not os.path.exists(OUTPUT_FOLDER):
         os.makedirs(OUTPUT_FOLDER)
 
@@ -90,9 +194,22 @@ def main():
 
     # Use ThreadPoolExecutor to run the segmenting process concurrently
     with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        executor.map(process_file, files)
-
+        futures = [executor.submit(process_file, fname) for fname in files]
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+        except CircuitOpenError as e:
+            # endpoint is down: drop the queued resumes instead of failing each one; rerun to resume
+            for future in futures:
+                future.cancel()
+            print(f"Stopping: {e}. Resumes already segmented are kept; rerun to continue.")
+            return
+
+    stats = get_segmentation_stats()
+    print(f"Local segmentation hit rate: {stats['local']}/{stats['local'] + stats['model']} ({stats['hit_rate']:.0%})")
     print("Done. Segmented resumes saved in:", OUTPUT_FOLDER)
 
 if __name__ == "__main__":
+    from .logging_util import setup_logging
+    setup_logging()
     main()
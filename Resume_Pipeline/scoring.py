@@ -1,7 +1,17 @@
+import logging
 import os
+import re
 import concurrent.futures
 import json
 from . import config
+from .compaction import PromptTooLarge, to_prompt_json, count_tokens
+from .deadline import DeadlineExceeded
+from .circuit_breaker import CircuitOpenError
+from . import cost_ledger
+from .cost_ledger import BudgetExceeded, PricesMissing, attribute
+from .result_sink import get_sink
+
+logger = logging.getLogger(__name__)
 
 # ----------------------------- CONFIG -----------------------------
 RESUME_FOLDER = config.RESUME_SEGMENTED_JSON_FOLDER
@@ -12,6 +22,7 @@ JD_FILE = os.environ.get(
 OUTPUT_FOLDER = config.SCORING_OUTPUT_FOLDER
 SKIP_EXISTING = config.SKIP_EXISTING
 DEPLOYMENT_NAME = config.DEPLOYMENT_NAME
+TOKEN_BUDGET = config.PROMPT_TOKEN_BUDGET
 
 # Note: client initialization is lazy inside call helper to avoid requiring
 # OPENAI_API_KEY at import time (supports dry-run/testing).
@@ -25,6 +36,13 @@ EVALUATION_SYSTEM_PROMPT = (
     "3. Continuity and Recency of Experience with both Non-Negotiable and Negotiable Criteria in JD\n\n"
     "For each of these criteria, assign a score out of 10 and provide a two-line justification for the score given.\n\n")
 
+# Criterion titles as they appear in parsed evaluations (keys of parse_evaluation output)
+EVALUATION_CRITERIA = [
+    "Fulfillment with Non-Negotiable Criteria",
+    "Fulfillment with Negotiable Criteria",
+    "Continuity and Recency of Experience",
+]
+
 
 # ----------------------------- FUNCTION: parse evaluation text into structured JSON -----------------------------
 def parse_evaluation(evaluation_text: str) -> dict:
@@ -44,72 +62,171 @@ def parse_evaluation(evaluation_text: str) -> dict:
                 }
     return parsed
 
+# ----------------------------- INCREMENTAL PARSER (streaming) -----------------------------
+class EvaluationStreamParser:
+    """Incrementally parse streamed evaluation text.
+
+    ``feed`` returns the criteria completed by the new text as dicts with ``title``,
+    ``score`` and ``description``; a criterion is complete once a blank line or the next
+    numbered criterion follows it. ``close`` flushes the last one. The union of all
+    returned criteria equals ``parse_evaluation`` on the full text.
+    """
+
+    _NEXT_ITEM = re.compile(r"\n(?=\s*\d+\.\s*[^\n]+?:\s*\d+/10)")
+
+    def __init__(self):
+        self._buffer = ""
+        self.parsed = {}
+
+    def feed(self, text: str) -> list:
+        self._buffer += text
+        done = []
+        while True:
+            cut = self._split_point()
+            if cut is None:
+                return done
+            block, self._buffer = self._buffer[:cut], self._buffer[cut:].lstrip("\n")
+            done.extend(self._emit(block))
+
+    def close(self) -> list:
+        block, self._buffer = self._buffer, ""
+        return self._emit(block)
+
+    def _split_point(self):
+        blank = self._buffer.find("\n\n")
+        nxt = self._NEXT_ITEM.search(self._buffer)
+        cuts = [c for c in (blank if blank >= 0 else None, nxt.start() if nxt and nxt.start() > 0 else None) if c is not None]
+        return min(cuts) if cuts else None
+
+    def _emit(self, block: str) -> list:
+        out = []
+        for title, item in parse_evaluation(block).items():
+            self.parsed[title] = item
+            out.append({"title": title, **item})
+        return out
+
+
 # ----------------------------- FUNCTION: evaluate resume against JD -----------------------------
+def _prompt_overhead() -> int:
+    """Tokens of the evaluation messages without any resume / JD text (system prompt, labels)."""
+    return sum(count_tokens(m["content"]) for m in evaluation_messages("", ""))
+
+
+def fit_jd_prompt(jd_text) -> str:
+    """Compact the JD, trimmed to at most half of what the system prompt leaves of the budget."""
+    room = TOKEN_BUDGET - _prompt_overhead()
+    if room < 2:
+        raise PromptTooLarge(f"PROMPT_TOKEN_BUDGET={TOKEN_BUDGET} leaves no room next to the evaluation system prompt")
+    return to_prompt_json(jd_text, room // 2)
+
+
+def resume_token_budget(jd_prompt: str) -> int:
+    """Tokens left for the resume once the system prompt and the (compacted) JD are in the prompt."""
+    left = TOKEN_BUDGET - _prompt_overhead() - count_tokens(jd_prompt)
+    if left <= 0:
+        raise PromptTooLarge(f"system prompt and JD need more than PROMPT_TOKEN_BUDGET={TOKEN_BUDGET} tokens")
+    return left
+
+
+def evaluation_messages(resume_prompt: str, jd_prompt: str, jd_first: bool = False) -> list:
+    """Evaluation messages from already compacted resume / JD text.
+
+    ``jd_first`` puts the JD right after the system prompt, so every evaluation against the
+    same JD shares a long identical prompt prefix (reused by the provider's prompt cache).
+    """
+    if jd_first:
+        content = f"Job Description: {jd_prompt}\nResume: {resume_prompt}"
+    else:
+        content = f"Resume: {resume_prompt}\nJob Description: {jd_prompt}"
+    return [
+        {"role": "system", "content": EVALUATION_SYSTEM_PROMPT},
+        {"role": "user", "content": content},
+    ]
+
+
+def build_evaluation_messages(resume_text, jd_text) -> list:
+    # Compact JSON (no indentation) and keep the resume within the prompt token budget
+    jd_text = fit_jd_prompt(jd_text)
+    resume_text = to_prompt_json(resume_text, resume_token_budget(jd_text))
+    return evaluation_messages(resume_text, jd_text)
+
+
 def evaluate_resume(resume_text: str, jd_text: str) -> dict:
+    return evaluate_messages(build_evaluation_messages(resume_text, jd_text))
+
+
+def evaluate_messages(messages: list) -> dict:
+    """Run one evaluation prompt and parse the reply ({} on failure)."""
     try:
         from .openai_client import call_chat_completions
 
-        messages = [
-            {"role": "system", "content": EVALUATION_SYSTEM_PROMPT},
-            {"role": "user", "content": f"Resume: {resume_text}\nJob Description: {jd_text}"},
-        ]
-
-        print(f"[DEBUG] Calling OpenAI for evaluation...")
-        response = call_chat_completions(messages, model=DEPLOYMENT_NAME)
+        logger.debug("Calling OpenAI for evaluation")
+        with attribute(stage="evaluate"):
+            response = call_chat_completions(messages, model=DEPLOYMENT_NAME)
         evaluation_result = response.choices[0].message.content
-        print(f"[DEBUG] AI Response: {evaluation_result[:500]}...")
+        logger.debug("AI response: %.500s", evaluation_result)
 
         parsed = parse_evaluation(evaluation_result)
-        print(f"[DEBUG] Parsed evaluation: {parsed}")
+        logger.debug("Parsed evaluation: %s", parsed)
 
         if not parsed:
-            print(f"[WARNING] parse_evaluation returned empty! Full AI response: {evaluation_result}")
+            logger.warning("parse_evaluation returned empty! Full AI response: %s", evaluation_result)
 
         return parsed
+    except (DeadlineExceeded, CircuitOpenError, BudgetExceeded, PricesMissing):
+        raise  # out of time / endpoint down / over budget: let the caller report it instead of an empty evaluation
     except Exception as e:
         print(f"[ERROR] Error in evaluating resume: {e}")
         import traceback
         traceback.print_exc()
         return {}  # Return empty dict in case of error
 
+
+def evaluate_resume_stream(resume_text, jd_text):
+    """Stream the evaluation: yield each criterion dict as soon as the model finishes it.
+
+    Unlike ``evaluate_resume`` errors propagate, so callers can report them mid-stream.
+    """
+    from .openai_client import call_chat_completions
+
+    parser = EvaluationStreamParser()
+    with attribute(stage="evaluate"):  # captured when the stream opens
+        deltas = call_chat_completions(build_evaluation_messages(resume_text, jd_text), model=DEPLOYMENT_NAME, stream=True)
+    for delta in deltas:
+        yield from parser.feed(delta)
+    yield from parser.close()
+
+
 # ----------------------------- FUNCTION: process each resume and evaluate -----------------------------
-def process_file(fname, jd_text):
-    # Output path for the evaluated resume
-    out_path = os.path.join(OUTPUT_FOLDER, fname)
-    
-    import logging
-    logger = logging.getLogger(__name__)
-
-    if SKIP_EXISTING and os.path.exists(out_path):
+def process_file(fname, jd_text, jd_name=None):
+    # Resumes and evaluations are read and written through the result sink (files or JSONL);
+    # model usage is attributed to the JD and resume so LEDGER_JD_BUDGET applies
+    name = os.path.splitext(fname)[0]
+    sink = get_sink()
+
+    if SKIP_EXISTING and sink.exists("evaluation", name):
         logger.info("Skipping %s, already evaluated.", fname)
         return
 
-    # Read resume from the resume folder (JSON format)
-    resume_path = os.path.join(RESUME_FOLDER, fname)
     try:
-        with open(resume_path, "r", encoding="utf-8") as f:
-            resume_data = json.load(f)
-            resume_text = json.dumps(resume_data, indent=4)
+        resume_text = json.dumps(sink.get("resume_json", name), indent=4)
     except Exception as e:
         print(f"Error reading resume {fname}: {e}")
         return
 
     logger.info("Evaluating: %s", fname)
-    evaluation = evaluate_resume(resume_text, jd_text)
-    print(f"EVALUATION RESULT FOR {fname}:")
-    print(repr(evaluation))
-    print("END EVALUATION RESULT")
+    with attribute(jd=jd_name, resume=name):
+        evaluation = evaluate_resume(resume_text, jd_text)
 
     if not evaluation:
         logger.warning("No evaluation result for %s", fname)
         return
 
-    logger.info("Parsed evaluation: %s", evaluation)
+    logger.debug("Parsed evaluation for %s: %s", fname, evaluation)
     logger.info("Saving evaluation for: %s", fname)
 
     try:
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(evaluation, f, indent=4)
+        sink.put("evaluation", name, evaluation)
     except Exception as e:
         print(f"Error saving evaluation for {fname}: {e}")
 
@@ -128,18 +245,33 @@ def main():
         return
 
     # Process each resume in the resume folder
-    files = [f for f in os.listdir(RESUME_FOLDER) if f.endswith(".json")]
+    files = [name + ".json" for name in get_sink().names("resume_json")]
 
     if not files:
         print("No resume files found in the directory.")
         return
 
+    cost_ledger.start_run()
+    jd_name = os.path.splitext(os.path.basename(JD_FILE))[0]
     # Use ThreadPoolExecutor to run the evaluation process concurrently
     with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
         # Passing the JD text to be used for all resumes
-        executor.map(lambda fname: process_file(fname, jd_text), files)
+        futures = [executor.submit(process_file, fname, jd_text, jd_name) for fname in files]
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                future.result()
+        except (CircuitOpenError, BudgetExceeded, PricesMissing) as e:
+            # endpoint is down / budget spent: drop the queued resumes instead of failing each one; rerun to resume
+            for future in futures:
+                future.cancel()
+            print(f"Stopping: {e}. Evaluations already saved are kept; rerun to continue.")
+            return
+        finally:
+            get_sink().flush(fsync=True)
 
-    print("Done. Evaluated resumes saved in:", OUTPUT_FOLDER)
+    print("Done. Evaluated resumes saved in:", get_sink().location("evaluation"))
 
 if __name__ == "__main__":
+    from .logging_util import setup_logging
+    setup_logging()
     main()
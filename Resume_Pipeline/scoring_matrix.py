@@ -0,0 +1,309 @@
+#scoring_matrix.py
+# Score every resume against every selected JD in one run. Outputs are keyed by (JD, resume)
+# as "<jd>/<resume>" in the result sink (SCORING_OUTPUT_FOLDER/<jd>/<resume>.json with the files
+# sink), finished pairs are skipped on rerun, and the work is queued JD by JD with the JD at the
+# front of the prompt, so all evaluations against one JD run back to back and share its prompt
+# prefix. A "matrix" summary (matrix.json) collects the scores.
+# The local scorer can replace the model (offline runs) or pre-rank resumes so only each JD's
+# top candidates are sent to the model. Per-requirement mode re-aggregates every pair from cached
+# requirement ratings, so after a JD edit only the edited requirements reach the model.
+# Model usage is attributed to each (JD, resume) pair in the cost ledger; pairs refused because a
+# budget would be exceeded are left unscored or, with LEDGER_BUDGET_ACTION=local, scored locally.
+
+import os
+import fnmatch
+import logging
+import argparse
+import threading
+import concurrent.futures
+from typing import Dict, List, Optional, Tuple
+
+from . import config
+from . import cost_ledger
+from .compaction import to_prompt_json
+from .scoring import evaluation_messages, evaluate_messages, fit_jd_prompt, resume_token_budget
+from .circuit_breaker import CircuitOpenError
+from .cost_ledger import BudgetExceeded, PricesMissing
+from .local_scoring import LocalScorer
+from .requirement_scoring import RequirementScorer
+from .result_sink import FolderSink, get_sink
+
+logger = logging.getLogger(__name__)
+
+MATRIX_SUMMARY = "matrix"
+SUBMIT_WINDOW_PER_WORKER = 2  # pairs submitted ahead per worker thread
+
+
+# ----------------------------- SELECTION -----------------------------
+def select_jds(pattern: str = "*.json", sink=None) -> List[str]:
+    """Stored JD names whose JSON file name (<name>.json) matches ``pattern``."""
+    sink = sink or get_sink()
+    return [name for name in sink.names("jd_json") if fnmatch.fnmatch(name + ".json", pattern)]
+
+
+def select_resumes(sink=None) -> List[str]:
+    return (sink or get_sink()).names("resume_json")
+
+
+def _stem(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def pair_name(jd: str, resume: str) -> str:
+    return f"{jd}/{resume}"
+
+
+def plan_pairs(jds: List[str], resumes: List[str], sink=None, stage: str = "evaluation",
+               skip_existing: bool = True) -> List[Tuple[str, str]]:
+    """(jd, resume) pairs still to score, JD-major so each JD's evaluations run back to back."""
+    sink = sink or get_sink()
+    return [
+        (jd, resume)
+        for jd in jds
+        for resume in resumes
+        if not (skip_existing and sink.exists(stage, pair_name(jd, resume)))
+    ]
+
+
+# ----------------------------- SHARED PROMPT PARTS -----------------------------
+class PromptCache:
+    """Compacted JD / resume prompt text, built once per JD and once per (resume, token budget).
+
+    Shared by the scoring threads; the full messages of a pair are only built when it is scored.
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink or get_sink()
+        self._jds: Dict[str, Tuple[str, int]] = {}
+        self._resumes: Dict[Tuple[str, int], str] = {}
+        self._lock = threading.Lock()
+
+    def jd(self, name: str) -> Tuple[str, int]:
+        """(compacted JD text, resume token budget left next to it)."""
+        with self._lock:
+            if name not in self._jds:
+                prompt = fit_jd_prompt(self.sink.get("jd_json", name))
+                self._jds[name] = (prompt, resume_token_budget(prompt))
+            return self._jds[name]
+
+    def resume(self, name: str, budget: int) -> str:
+        key = (name, budget)
+        with self._lock:
+            if key not in self._resumes:
+                self._resumes[key] = to_prompt_json(self.sink.get("resume_json", name), budget)
+            return self._resumes[key]
+
+    def messages(self, jd: str, resume: str) -> list:
+        jd_prompt, budget = self.jd(jd)
+        return evaluation_messages(self.resume(resume, budget), jd_prompt, jd_first=True)
+
+
+# ----------------------------- SCORING -----------------------------
+def save_pair(jd: str, resume: str, evaluation: dict, sink=None, stage: str = "evaluation", scorer: str = "model"):
+    out = {"resume_filename": resume + ".json", "jd_filename": jd + ".json", "evaluation": evaluation}
+    if scorer != "model":
+        out["scorer"] = scorer
+    (sink or get_sink()).put(stage, pair_name(jd, resume), out)
+
+
+def score_pair(jd: str, resume: str, messages: list, sink=None) -> bool:
+    """Evaluate one pair and save it; False when the model gave no usable evaluation."""
+    with cost_ledger.attribute(jd=jd, resume=resume):
+        evaluation = evaluate_messages(messages)
+    if not evaluation:
+        logger.warning("No evaluation for %s x %s", jd, resume)
+        return False
+    save_pair(jd, resume, evaluation, sink)
+    logger.info("Saved evaluation: %s x %s", jd, resume)
+    return True
+
+
+def _local_scorers(jds: List[str], sink=None) -> Dict[str, LocalScorer]:
+    sink = sink or get_sink()
+    return {jd: LocalScorer(sink.get("jd_json", jd)) for jd in jds}
+
+
+def _load_resumes(resumes: List[str], sink=None) -> Dict[str, dict]:
+    sink = sink or get_sink()
+    return {name: sink.get("resume_json", name) for name in resumes}
+
+
+def shortlist(jds: List[str], resumes: List[str], top: int, sink=None) -> Dict[str, List[str]]:
+    """Per JD, the ``top`` resumes by local score (ties keep name order)."""
+    loaded = _load_resumes(resumes, sink)
+    return {jd: [name for name, _ in scorer.rank(loaded, top)] for jd, scorer in _local_scorers(jds, sink).items()}
+
+
+def write_summary(jds: List[str], resumes: List[str], sink=None, stage: str = "evaluation") -> dict:
+    """Store the "matrix" summary: per resume and JD, the criterion scores of every saved evaluation."""
+    sink = sink or get_sink()
+    scores: Dict[str, Dict[str, Optional[Dict[str, str]]]] = {}
+    for resume in resumes:
+        row = scores.setdefault(resume, {})
+        for jd in jds:
+            saved = sink.get(stage, pair_name(jd, resume))
+            if saved is None:
+                row[jd] = None
+                continue
+            row[jd] = {title: item.get("score") for title, item in saved.get("evaluation", {}).items()}
+    summary = {"jds": list(jds), "resumes": list(resumes), "scores": scores}
+    sink.put(stage, MATRIX_SUMMARY, summary)
+    return summary
+
+
+def _score_cached_pair(prompts: PromptCache, jd: str, resume: str, sink) -> bool:
+    return score_pair(jd, resume, prompts.messages(jd, resume), sink)
+
+
+def _score_by_requirement(scorer: RequirementScorer, jd: str, resume: str, sink) -> bool:
+    with cost_ledger.attribute(jd=jd, resume=resume):
+        evaluation = scorer.evaluate(sink.get("resume_json", resume))
+    if not evaluation:
+        logger.warning("No evaluation for %s x %s", jd, resume)
+        return False
+    save_pair(jd, resume, evaluation, sink, scorer="requirements")
+    return True
+
+
+def _score_locally(pairs: List[Tuple[str, str]], sink, stage: str = "local_evaluation"):
+    scorers = _local_scorers(sorted({jd for jd, _ in pairs}), sink)
+    loaded = _load_resumes(sorted({resume for _, resume in pairs}), sink)
+    for jd, resume in pairs:
+        save_pair(jd, resume, scorers[jd].evaluate(loaded[resume]), sink, stage, scorer="local")
+
+
+def run_matrix(jds: List[str], resumes: List[str], workers: int = 5, sink=None, skip_existing: bool = None,
+               local: bool = False, top: int = None, requirements: bool = False) -> Dict[str, int]:
+    """Score all missing (JD, resume) pairs; stops cleanly if the model endpoint goes down.
+
+    ``local`` scores every pair with the local scorer instead of the model (stored under the
+    "local_evaluation" stage); ``top`` sends only each JD's ``top`` resumes by local score to the model.
+    ``requirements`` scores per requirement through the rating cache; every pair is re-aggregated
+    (existing outputs are not skipped) because unchanged requirements cost no model call.
+    Pairs refused by a cost budget are counted as "over_budget": a spent JD budget only stops that
+    JD's pairs, a spent run budget all of them.
+    """
+    sink = sink or get_sink()
+    stage = "local_evaluation" if local else "evaluation"
+    skip_existing = config.SKIP_EXISTING if skip_existing is None else skip_existing
+    if requirements and not local:
+        skip_existing = False
+    pairs = plan_pairs(jds, resumes, sink, stage, skip_existing)
+    total = len(jds) * len(resumes)
+    if top and not local:
+        selected = {jd: set(names) for jd, names in shortlist(jds, resumes, top, sink).items()}
+        pairs = [(jd, resume) for jd, resume in pairs if resume in selected[jd]]
+    logger.info("Scoring matrix: %s JDs x %s resumes, %s pairs to score", len(jds), len(resumes), len(pairs))
+
+    counts = {"pairs": total, "scored": 0, "failed": 0, "skipped": total - len(pairs)}
+    if local:
+        _score_locally(pairs, sink, stage)
+        counts["scored"] = len(pairs)
+        write_summary(jds, resumes, sink, stage)
+        sink.flush()
+        return counts
+
+    if requirements:
+        scorers = {jd: RequirementScorer(sink.get("jd_json", jd)) for jd in jds}
+        task = lambda jd, resume: _score_by_requirement(scorers[jd], jd, resume, sink)
+    else:
+        prompts = PromptCache(sink)
+        task = lambda jd, resume: _score_cached_pair(prompts, jd, resume, sink)
+    # pairs are submitted JD-major through a window of a few per worker: the executor's FIFO queue
+    # runs them JD by JD, and only the pairs in flight hold a prompt and a future
+    window = max(1, workers) * SUBMIT_WINDOW_PER_WORKER
+    over_budget, run_spent = [], False
+    todo = iter(pairs)
+    in_flight: Dict[concurrent.futures.Future, Tuple[str, str]] = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            while True:
+                while not run_spent and len(in_flight) < window:
+                    pair = next(todo, None)
+                    if pair is None:
+                        break
+                    in_flight[executor.submit(task, *pair)] = pair
+                if not in_flight:
+                    break
+                done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    pair = in_flight.pop(future)
+                    if future.cancelled():  # dropped after the run budget ran out
+                        over_budget.append(pair)
+                        continue
+                    try:
+                        counts["scored" if future.result() else "failed"] += 1
+                    except BudgetExceeded as e:
+                        # the rest of an over-budget JD is refused without model calls; a spent run budget stops all
+                        over_budget.append(pair)
+                        if e.scope == "run" and not run_spent:
+                            logger.error("Stopping: %s. Evaluations already saved are kept.", e)
+                            run_spent = True
+                            over_budget.extend(todo)
+                            for pending in in_flight:
+                                pending.cancel()
+        except (CircuitOpenError, PricesMissing) as e:
+            for future in in_flight:
+                future.cancel()
+            logger.error("Stopping: %s. Evaluations already saved are kept; rerun to continue.", e)
+            counts["stopped"] = True
+
+    if over_budget:
+        counts["over_budget"] = len(over_budget)
+        if config.LEDGER_BUDGET_ACTION == "local":
+            logger.warning("%s pairs over budget; scoring them locally", len(over_budget))
+            _score_locally(over_budget, sink)
+            write_summary(jds, resumes, sink, "local_evaluation")
+        else:
+            counts["stopped"] = True
+
+    if requirements:
+        for key in ("calls", "hits", "misses"):
+            counts[key] = sum(scorer.stats[key] for scorer in scorers.values())
+    write_summary(jds, resumes, sink, stage)
+    sink.flush()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every resume against every selected JD")
+    parser.add_argument("--jd", action="append", help="JD name or JSON file name (repeatable); default: all JDs matching --jd-glob")
+    parser.add_argument("--jd-glob", default="*.json", help="JD JSON file name pattern")
+    parser.add_argument("--resume-folder", help="Read resume JSON from this folder (files sink)")
+    parser.add_argument("--output", help="Root folder for <jd>/<resume>.json (files sink)")
+    parser.add_argument("--workers", type=int, default=5)
+    parser.add_argument("--force", action="store_true", help="Re-score pairs that already have an output")
+    parser.add_argument("--local", action="store_true", help="Use the local scorer instead of the model")
+    parser.add_argument("--top", type=int, help="Only model-score each JD's N best resumes by local score")
+    parser.add_argument("--per-requirement", action="store_true",
+                        help="Rate each requirement separately through the rating cache (re-aggregates every pair)")
+    args = parser.parse_args()
+
+    cost_ledger.start_run()
+    sink = get_sink()
+    if args.resume_folder or args.output:
+        stage = "local_evaluation" if args.local else "evaluation"
+        sink = FolderSink({"resume_json": args.resume_folder, stage: args.output})
+    jds = [_stem(jd) for jd in args.jd] if args.jd else select_jds(args.jd_glob, sink)
+    resumes = select_resumes(sink)
+    if not jds or not resumes:
+        print("No JD or resume JSON found.")
+        return
+    counts = run_matrix(jds, resumes, workers=args.workers, sink=sink,
+                        skip_existing=not args.force, local=args.local, top=args.top,
+                        requirements=args.per_requirement)
+    print(f"Scored {counts['scored']}, failed {counts['failed']}, skipped {counts['skipped']} of "
+          f"{counts['pairs']} pairs.")
+    if counts.get("over_budget"):
+        print(f"Over budget: {counts['over_budget']} pairs "
+              + ("scored locally." if config.LEDGER_BUDGET_ACTION == "local" else "left unscored."))
+    if "calls" in counts:
+        print(f"Requirement ratings: {counts['hits']} cached, {counts['misses']} new in {counts['calls']} model calls.")
+    if counts.get("stopped"):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    from .logging_util import setup_logging
+    setup_logging()
+    main()
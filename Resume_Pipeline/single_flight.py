@@ -0,0 +1,94 @@
+#single_flight.py
+# In-process request coalescing for the API. SingleFlight runs one computation per key at a time:
+# identical requests that arrive while it is in flight await the same task instead of starting
+# their own, and a caller that goes away does not cancel it for the others. IdempotencyStore keeps
+# the task of each client-supplied Idempotency-Key for a while, so a retry with the same key
+# reattaches to the running computation or gets its finished result.
+
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyConflict(ValueError):
+    """The Idempotency-Key was already used for a different request."""
+
+
+def _consume(task: asyncio.Future):
+    # mark the exception as retrieved: every waiter may have gone away
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """One in-flight computation per key; concurrent callers with the same key share its result or error."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self.stats = {"started": 0, "joined": 0}
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+            self.stats["started"] += 1
+        else:
+            self.stats["joined"] += 1
+            logger.info("Joining in-flight computation for %s", key)
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Future):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        _consume(task)
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+class IdempotencyStore:
+    """Tasks by Idempotency-Key. Successful results are kept for ``ttl`` seconds after they finish
+    (at most ``max_keys`` keys, oldest dropped first); failed ones are forgotten so a retry runs again."""
+
+    def __init__(self, ttl: float, max_keys: int):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, Tuple[Hashable, asyncio.Future, float]]" = OrderedDict()
+        self.stats = {"started": 0, "reattached": 0}
+
+    def _expire(self):
+        now = time.monotonic()
+        for key in [k for k, (_, task, expires) in self._entries.items() if task.done() and expires <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+    async def run(self, idempotency_key: str, request_key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self._expire()
+        entry = self._entries.get(idempotency_key)
+        if entry is not None and entry[0] != request_key:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different request")
+        if entry is None:
+            task = asyncio.ensure_future(fn())
+            self._entries[idempotency_key] = (request_key, task, float("inf"))
+            task.add_done_callback(lambda t: self._done(idempotency_key, t))
+            self.stats["started"] += 1
+        else:
+            task = entry[1]
+            self.stats["reattached"] += 1
+        return await asyncio.shield(task)
+
+    def _done(self, idempotency_key: str, task: asyncio.Future):
+        entry = self._entries.get(idempotency_key)
+        if entry is None or entry[1] is not task:
+            return
+        if task.cancelled() or task.exception() is not None:
+            del self._entries[idempotency_key]
+        else:
+            self._entries[idempotency_key] = (entry[0], task, time.monotonic() + self.ttl)
@@ -0,0 +1,383 @@
+"""
+Local stub server for load testing.
+
+Serves a fake OpenAI-compatible ``/chat/completions`` endpoint that returns
+well-formed segmentation and evaluation text, plus a ``/files`` static route that
+stands in for Cloudinary.
+
+Point the pipeline at it with:
+    OPENAI_ENDPOINT=http://127.0.0.1:8001/openai/v1/ OPENAI_API_KEY=stub \
+        python -m Resume_Pipeline.api_server
+
+Run with: python -m Resume_Pipeline.stub_server --port 8001 --latency-dist lognormal --latency-mean 1.5
+
+``--batch INPUT OUTPUT`` answers a batch-input JSONL file offline instead (stand-in for the Batch API,
+see batch_jobs.py).
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+import argparse
+from typing import Dict, Any, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+import uvicorn
+
+from . import config
+from .resume_segment import SEGMENTATION_SYSTEM_PROMPT as RESUME_SEGMENTATION_PROMPT
+from .jd_segment import SEGMENTATION_SYSTEM_PROMPT as JD_SEGMENTATION_PROMPT
+from .scoring import EVALUATION_SYSTEM_PROMPT, EVALUATION_CRITERIA
+from .fused_evaluation import FUSED_SYSTEM_PROMPT
+from .requirement_scoring import REQUIREMENT_SYSTEM_PROMPT
+
+# ----------------------------- DEFAULTS -----------------------------
+DEFAULT_SETTINGS = {
+    "latency_dist": "fixed",     # fixed | uniform | normal | lognormal | exponential
+    "latency_mean": 0.0,         # seconds
+    "latency_stddev": 0.0,       # seconds (normal / lognormal), half-width for uniform
+    "per_token_latency": 0.0,    # extra seconds per completion token
+    "rate_429": 0.0,             # fraction of requests answered with 429
+    "error_rate": 0.0,           # fraction of requests answered with 500
+    "max_concurrency": 0,        # 0 = unlimited; above this the stub answers 429 (quota emulation)
+    "retry_after": 1,            # seconds advertised in Retry-After on 429
+    "seed": None,
+    "files_dir": config.RESUME_RAW_FOLDER,
+}
+
+RESUME_SECTIONS = [
+    "Personal Information",
+    "Education",
+    "Experience",
+    "Skills/programming Languages",
+    "Projects",
+    "Certifications/Courses",
+    "Other Information",
+]
+
+
+# ----------------------------- HELPERS -----------------------------
+def _approx_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token), good enough for usage stats."""
+    return max(1, len(text or "") // 4)
+
+
+def sample_latency(settings: Dict[str, Any], rng: random.Random) -> float:
+    """Draw one base latency (seconds) from the configured distribution."""
+    dist = settings["latency_dist"]
+    mean = float(settings["latency_mean"])
+    sd = float(settings["latency_stddev"])
+    if mean <= 0:
+        return 0.0
+    if dist == "uniform":
+        value = rng.uniform(mean - sd, mean + sd)
+    elif dist == "normal":
+        value = rng.gauss(mean, sd)
+    elif dist == "lognormal":
+        # parametrize by the desired mean/stddev of the latency itself
+        import math
+        sigma2 = math.log(1 + (sd / mean) ** 2)
+        mu = math.log(mean) - sigma2 / 2
+        value = rng.lognormvariate(mu, math.sqrt(sigma2))
+    elif dist == "exponential":
+        value = rng.expovariate(1.0 / mean)
+    else:
+        value = mean
+    return max(0.0, value)
+
+
+def _segment_resume_reply(text: str) -> str:
+    """Place contact lines under Personal Information and the rest under Other Information."""
+    lines = [l.strip() for l in (text or "").splitlines() if l.strip()]
+    personal = []
+    if lines:
+        personal.append(f"Name: {lines[0]}")
+    email = re.search(r"[\w.-]+@[\w.-]+\.\w+", text or "")
+    if email:
+        personal.append(f"Email: {email.group(0)}")
+    phone = re.search(r"\+?\d[\d\s\-()]{8,}\d", text or "")
+    if phone:
+        personal.append(f"Phone: {phone.group(0).strip()}")
+
+    out = []
+    for s in RESUME_SECTIONS:
+        out.append(s)
+        if s == "Personal Information":
+            out.extend(personal)
+        elif s == "Other Information":
+            out.extend(lines[1:])
+        out.append("")
+    return "\n".join(out).strip()
+
+
+def _segment_jd_reply(text: str) -> str:
+    """Split JD lines into must-have / nice-to-have on simple keywords."""
+    must, nice = [], []
+    for line in (text or "").splitlines():
+        item = re.sub(r"^\s*(?:[-•▪*]|\d+\.)\s*", "", line).strip()
+        if len(item) < 15 or item.endswith(":"):
+            continue
+        if re.search(r"(?i)\b(nice|plus|prefer|bonus|familiar|exposure)", item):
+            nice.append(item)
+        else:
+            must.append(item)
+
+    out = ["Non-Negotiable Requirements:"]
+    out.extend(f"{i}. {it}" for i, it in enumerate(must, 1))
+    out.append("")
+    out.append("Negotiable Requirements:")
+    out.extend(f"{i}. {it}" for i, it in enumerate(nice, 1))
+    return "\n".join(out)
+
+
+def _evaluation_reply(text: str) -> str:
+    """Deterministic scores derived from a hash of the prompt (same input -> same scores)."""
+    digest = hashlib.sha256((text or "").encode("utf-8")).digest()
+    blocks = []
+    for i, title in enumerate(EVALUATION_CRITERIA):
+        score = 1 + digest[i] % 10
+        blocks.append(
+            f"{i + 1}. {title}: {score}/10\n"
+            f"Justification: Stub evaluation for load testing; score derived from the prompt hash.\n"
+            f"No model was called for this result."
+        )
+    return "\n\n".join(blocks)
+
+
+def _fused_reply(text: str) -> str:
+    """JSON reply matching fused_evaluation.FUSED_SYSTEM_PROMPT's schema."""
+    resume_part = (text or "").split("\nJob Description:", 1)[0]
+    resume_part = resume_part[len("Resume: "):] if resume_part.startswith("Resume: ") else resume_part
+    lines = [l.strip() for l in resume_part.splitlines() if l.strip()]
+    personal = {"Name": lines[0]} if lines else {}
+    email = re.search(r"[\w.-]+@[\w.-]+\.\w+", resume_part)
+    if email:
+        personal["Email"] = email.group(0)
+
+    digest = hashlib.sha256((text or "").encode("utf-8")).digest()
+    return json.dumps({
+        "resume": {
+            "Personal Information": personal,
+            "Education": [], "Experience": [], "Skills": [], "Projects": [], "Certifications": [],
+            "Other Information": lines[1:],
+        },
+        "evaluation": [
+            {"criterion": i + 1, "score": digest[i] % 11,
+             "justification": "Stub evaluation for load testing; score derived from the prompt hash."}
+            for i in range(len(EVALUATION_CRITERIA))
+        ],
+    })
+
+
+def _requirement_reply(text: str) -> str:
+    """JSON reply matching requirement_scoring.REQUIREMENT_SYSTEM_PROMPT: one rating per numbered requirement."""
+    resume_part, _, listing = (text or "").partition("\nRequirements:\n")
+    ratings = []
+    for line in listing.splitlines():
+        m = re.match(r"(\d+)\.\s*(.*)", line)
+        if not m:
+            continue
+        digest = hashlib.sha256((resume_part + m.group(2)).encode("utf-8")).digest()
+        ratings.append({"id": int(m.group(1)), "score": digest[0] % 11,
+                        "evidence": "Stub rating derived from the prompt hash.",
+                        "last_used": None if digest[1] % 5 == 0 else 2015 + digest[1] % 11})
+    return json.dumps({"requirements": ratings})
+
+
+def build_reply(messages: List[Dict[str, Any]]) -> str:
+    """Pick a reply generator based on the system prompt the pipeline sent."""
+    system = next((m.get("content") or "" for m in messages if m.get("role") == "system"), "")
+    user = "\n".join(m.get("content") or "" for m in messages if m.get("role") == "user")
+    if system == RESUME_SEGMENTATION_PROMPT:
+        return _segment_resume_reply(user)
+    if system == JD_SEGMENTATION_PROMPT:
+        return _segment_jd_reply(user)
+    if system == EVALUATION_SYSTEM_PROMPT:
+        return _evaluation_reply(user)
+    if system == FUSED_SYSTEM_PROMPT:
+        return _fused_reply(user)
+    if system == REQUIREMENT_SYSTEM_PROMPT:
+        return _requirement_reply(user)
+    return "OK"
+
+
+def completion(content: str, model: str, prompt_tokens: int, completion_tokens: int) -> Dict[str, Any]:
+    """A chat.completion response body."""
+    return {
+        "id": f"chatcmpl-stub-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def run_batch(input_path: str, output_path: str, error_rate: float = 0.0, seed: int = None) -> Dict[str, int]:
+    """Offline stand-in for the provider's Batch API: answer every request of a batch-input JSONL file
+    and write the output file in the provider's format (``error_rate`` of the requests fail with 500)."""
+    rng = random.Random(seed)
+    counts = {"completed": 0, "failed": 0}
+    with open(input_path, "r", encoding="utf-8") as src, open(output_path, "w", encoding="utf-8") as out:
+        for line in src:
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            body = request.get("body") or {}
+            if rng.random() < error_rate:
+                status = 500
+                response = {"error": {"message": "Injected server error (stub)", "type": "server_error"}}
+                counts["failed"] += 1
+            else:
+                messages = body.get("messages") or []
+                content = build_reply(messages)
+                status = 200
+                response = completion(content, body.get("model") or config.DEPLOYMENT_NAME,
+                                      sum(_approx_tokens(m.get("content") or "") for m in messages), _approx_tokens(content))
+                counts["completed"] += 1
+            record = {
+                "id": f"batch_req_stub_{uuid.uuid4().hex[:12]}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": status, "request_id": uuid.uuid4().hex, "body": response},
+                "error": None,
+            }
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return counts
+
+
+def _error(status: int, message: str, err_type: str, headers: Dict[str, str] = None) -> JSONResponse:
+    body = {"error": {"message": message, "type": err_type, "code": str(status)}}
+    return JSONResponse(status_code=status, content=body, headers=headers or {})
+
+
+# ----------------------------- APP FACTORY -----------------------------
+def create_app(**overrides) -> FastAPI:
+    """Build a stub app. Keyword arguments override ``DEFAULT_SETTINGS``."""
+    settings = dict(DEFAULT_SETTINGS)
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    rng = random.Random(settings["seed"])
+    state = {"in_flight": 0, "requests": 0, "throttled": 0, "errors": 0}
+
+    app = FastAPI(title="AI Recruit stub LLM", version="1.0.0")
+    app.state.settings = settings
+    app.state.stats = state
+
+    async def chat_completions(request: Request):
+        payload = await request.json()
+        state["requests"] += 1
+
+        limit = int(settings["max_concurrency"] or 0)
+        if (limit and state["in_flight"] >= limit) or rng.random() < settings["rate_429"]:
+            state["throttled"] += 1
+            return _error(429, "Rate limit exceeded (stub)", "rate_limit_exceeded",
+                          {"Retry-After": str(settings["retry_after"])})
+
+        state["in_flight"] += 1
+        streaming = bool(payload.get("stream"))
+        handed_off = False  # a streaming response releases the in-flight slot when it finishes
+        try:
+            messages = payload.get("messages") or []
+            content = build_reply(messages)
+            prompt_tokens = sum(_approx_tokens(m.get("content") or "") for m in messages)
+            completion_tokens = _approx_tokens(content)
+            model = payload.get("model") or config.DEPLOYMENT_NAME
+
+            # Streaming spreads the per-token latency over the chunks instead of up front
+            delay = sample_latency(settings, rng)
+            if not streaming:
+                delay += completion_tokens * float(settings["per_token_latency"])
+            if delay:
+                await asyncio.sleep(delay)
+
+            if rng.random() < settings["error_rate"]:
+                state["errors"] += 1
+                return _error(500, "Injected server error (stub)", "server_error")
+
+            if streaming:
+                handed_off = True
+                usage = None
+                if (payload.get("stream_options") or {}).get("include_usage"):
+                    usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                             "total_tokens": prompt_tokens + completion_tokens}
+                return StreamingResponse(_stream(content, model, usage), media_type="text/event-stream")
+
+            return completion(content, model, prompt_tokens, completion_tokens)
+        finally:
+            if not handed_off:
+                state["in_flight"] -= 1
+
+    async def _stream(content: str, model: str, usage: Dict[str, int] = None):
+        """Server-sent chat.completion.chunk events, roughly one per token (then a usage chunk when asked)."""
+        chunk_id = f"chatcmpl-stub-{uuid.uuid4().hex[:12]}"
+        base = {"id": chunk_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        try:
+            for piece in re.findall(r"\S{1,4}\s*|\s+", content):
+                if settings["per_token_latency"]:
+                    await asyncio.sleep(float(settings["per_token_latency"]))
+                chunk = dict(base, choices=[{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+                yield f"data: {json.dumps(chunk)}\n\n"
+            final = dict(base, choices=[{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            yield f"data: {json.dumps(final)}\n\n"
+            if usage:
+                yield f"data: {json.dumps(dict(base, choices=[], usage=usage))}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            state["in_flight"] -= 1
+
+    # Azure-style (/openai/v1/...) and plain OpenAI-style (/v1/...) base URLs both work
+    for path in ("/openai/v1/chat/completions", "/v1/chat/completions", "/chat/completions"):
+        app.add_api_route(path, chat_completions, methods=["POST"])
+
+    @app.get("/stats")
+    async def stats():
+        return dict(state)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    if settings["files_dir"]:
+        app.mount("/files", StaticFiles(directory=settings["files_dir"]), name="files")
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible server + file server for load testing")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=8001, help="Port to bind to")
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "normal", "lognormal", "exponential"])
+    parser.add_argument("--latency-mean", type=float, help="Mean base latency in seconds")
+    parser.add_argument("--latency-stddev", type=float, help="Latency spread in seconds")
+    parser.add_argument("--per-token-latency", type=float, help="Extra seconds per completion token")
+    parser.add_argument("--rate-429", type=float, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, help="Fraction of requests answered with 500")
+    parser.add_argument("--max-concurrency", type=int, help="Answer 429 above this many in-flight requests")
+    parser.add_argument("--retry-after", type=int, help="Retry-After seconds advertised on 429")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible runs")
+    parser.add_argument("--files-dir", help="Directory served under /files (Cloudinary stand-in)")
+    parser.add_argument("--batch", nargs=2, metavar=("INPUT", "OUTPUT"),
+                        help="Answer a batch-input JSONL file offline (Batch API stand-in) instead of serving")
+    args = parser.parse_args()
+
+    if args.batch:
+        print(run_batch(*args.batch, error_rate=args.error_rate or 0.0, seed=args.seed))
+        raise SystemExit(0)
+
+    stub_app = create_app(**{k: v for k, v in vars(args).items() if k not in ("host", "port")})
+    print(f"Stub LLM on http://{args.host}:{args.port}/openai/v1/  files under /files/")
+    uvicorn.run(stub_app, host=args.host, port=args.port)
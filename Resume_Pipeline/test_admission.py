@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Admission gate checks: at most `concurrency` requests run, the queue is FIFO and bounded (429 when
+full), queued requests give up after the queue timeout (503), and slots are never leaked
+"""
+
+import asyncio
+
+import pytest
+
+from Resume_Pipeline.admission import AdmissionGate, Overloaded
+
+def test_limits_queue_and_rejections():
+    async def scenario():
+        gate = AdmissionGate("evaluate", concurrency=2, queue=2, queue_timeout=5)
+        running, peak, order = 0, 0, []
+
+        async def work(i):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            order.append(i)
+            return i
+
+        tasks = [asyncio.ensure_future(gate.run(lambda i=i: work(i))) for i in range(5)]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert peak == 2 and results[:4] == [0, 1, 2, 3]
+        assert isinstance(results[4], Overloaded) and results[4].status == 429 and results[4].retry_after >= 1
+        assert order[2:] == [2, 3]  # queued requests start in arrival order
+        assert gate.running == 0 and gate.snapshot()["queued_now"] == 0
+        assert gate.stats == {"admitted": 4, "queued": 2, "rejected": 1, "timed_out": 0}
+    asyncio.run(scenario())
+
+def test_queue_timeout_and_cancelled_waiters():
+    async def scenario():
+        gate = AdmissionGate("segment", concurrency=1, queue=4, queue_timeout=0.05)
+        slot = await gate.acquire()
+        with pytest.raises(Overloaded) as excinfo:
+            await gate.acquire()
+        assert excinfo.value.status == 503
+
+        waiter = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        slot.release()
+        slot.release()  # idempotent
+        assert gate.running == 0 and gate.snapshot()["queued_now"] == 0
+        (await gate.acquire()).release()
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    print("Testing admission control")
+    print("=" * 40)
+    test_limits_queue_and_rejections()
+    test_queue_timeout_and_cancelled_waiters()
+    print("Testing complete!")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Batch mode checks, against the stub's offline Batch API stand-in: export writes pending
+segmentation and scoring requests in the provider format, ingest stores the replies through the
+usual formatting / parsing (recording the usage at the batch price), and failed requests are
+exported again on the next run
+"""
+
+import json
+
+from Resume_Pipeline import batch_jobs, config, cost_ledger, resume_segment
+from Resume_Pipeline.result_sink import JsonlSink
+from Resume_Pipeline.stub_server import run_batch
+
+JD = {"Non-Negotiable Requirements": ["5+ years of Python", "AWS"], "Negotiable Requirements": ["Kubernetes"]}
+RESUME = "Jane Doe\njane@example.com\nSenior engineer, Python and AWS since 2016\n" + "Built pipelines\n" * 20
+
+def _sink(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "JD_INPUT_FOLDER", str(tmp_path / "no_jds"))
+    monkeypatch.setattr(resume_segment, "LOCAL_SEGMENTATION", False)  # every resume needs the model
+    monkeypatch.setattr(config, "LEDGER_PATH", str(tmp_path / "ledger.sqlite3"))
+    monkeypatch.setattr(cost_ledger, "_ledger", None)
+    sink = JsonlSink(str(tmp_path / "results.jsonl"))
+    sink.put("jd_json", "jd1", JD)
+    for name in ("alice", "bob"):
+        sink.put("resume_parsed", name, RESUME.replace("Jane Doe", name))
+    return sink
+
+def _lines(paths):
+    return [json.loads(line) for path in paths for line in open(path, encoding="utf-8")]
+
+def test_export_run_ingest_round_trip(tmp_path, monkeypatch):
+    sink = _sink(tmp_path, monkeypatch)
+    first = batch_jobs.export(str(tmp_path / "batches"), sink=sink)
+    assert first["counts"] == {"local": 0, "jd_segment": 0, "resume_segment": 2, "score": 0}
+    request = _lines(first["files"])[0]
+    assert request["method"] == "POST" and request["url"] == config.BATCH_URL
+    assert request["custom_id"] == "resume_segment|alice|1|1" and request["body"]["messages"][0]["role"] == "system"
+
+    run_batch(first["files"][0], str(tmp_path / "out1.jsonl"))
+    assert batch_jobs.ingest([str(tmp_path / "out1.jsonl")], sink)["stored"] == 2
+    assert sink.get("resume_json", "alice")["Personal Information"]["Name"] == "alice"
+    usage = cost_ledger.get_ledger().report("resume")
+    assert [row["resume"] for row in sorted(usage, key=lambda r: r["resume"])] == ["alice", "bob"]
+    assert all(row["prompt_tokens"] > 0 and row["mean_latency"] is None for row in usage)
+
+    second = batch_jobs.export(str(tmp_path / "batches"), sink=sink)
+    assert second["counts"]["score"] == 2 and second["counts"]["resume_segment"] == 0
+    run_batch(second["files"][0], str(tmp_path / "out2.jsonl"), error_rate=1.0)
+    assert batch_jobs.ingest([str(tmp_path / "out2.jsonl")], sink) == {"stored": 0, "failed": 2, "incomplete": 0, "unknown": 0}
+
+    third = batch_jobs.export(str(tmp_path / "batches"), sink=sink)  # failed pairs are still pending
+    assert [line["custom_id"] for line in _lines(third["files"])] == ["score|jd1|alice", "score|jd1|bob"]
+    run_batch(third["files"][0], str(tmp_path / "out3.jsonl"))
+    assert batch_jobs.ingest([str(tmp_path / "out3.jsonl")], sink)["stored"] == 2
+    evaluation = sink.get("evaluation", "jd1/alice")["evaluation"]
+    assert len(evaluation) == 3 and all(item["score"].endswith("/10") for item in evaluation.values())
+    assert set(sink.get("evaluation", "matrix")["scores"]) == {"alice", "bob"}
+    assert batch_jobs.export(str(tmp_path / "batches"), sink=sink)["files"] == []
+
+def test_files_split_at_request_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "BATCH_MAX_REQUESTS", 2)
+    lines = [batch_jobs.batch_line(f"score|jd|r{i}", []) for i in range(5)]
+    paths = batch_jobs.write_batches(lines, str(tmp_path), prefix="batch")
+    assert [len(open(p).readlines()) for p in paths] == [2, 2, 1]
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    import pytest
+    print("Testing batch mode")
+    print("=" * 40)
+    for test in (test_export_run_ingest_round_trip, test_files_split_at_request_limit):
+        with tempfile.TemporaryDirectory() as td, pytest.MonkeyPatch.context() as mp:
+            test(Path(td), mp)
+    print("Testing complete!")
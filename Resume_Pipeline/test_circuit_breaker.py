@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker checks: consecutive outages open it, it fails fast until the reset timeout,
+then lets a probe through - a successful probe closes it, a failed one re-opens it and a
+neutral one only frees the probe slot. A stream we cut off ourselves (deadline or caller
+closing or dropping it, even before its first chunk) counts as neutral, so it cannot close a
+half-open breaker, and releases its pool member.
+"""
+
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from Resume_Pipeline import config, openai_client
+from Resume_Pipeline.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+from Resume_Pipeline.deadline import DeadlineExceeded, deadline
+from Resume_Pipeline.endpoint_pool import EndpointPool, PoolMember
+
+@pytest.fixture
+def now(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+def _open(breaker):
+    while breaker.state != OPEN:
+        breaker.before_call()
+        breaker.record_failure()
+
+def test_closed_open_half_open_closed(now):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30, half_open_probes=1)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # a success resets the count
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    _open(breaker)
+
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.before_call()
+    assert info.value.retry_after == 30
+
+    now[0] += 31
+    breaker.before_call()  # the probe
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+    assert breaker.stats()["times_opened"] == 1 and breaker.stats()["rejected"] == 2
+
+def test_failed_probe_reopens(now):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, half_open_probes=1)
+    _open(breaker)
+    now[0] += 11
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.opened_at == now[0]
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+def test_neutral_probe_frees_the_slot_without_closing(now):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, half_open_probes=1)
+    _open(breaker)
+    now[0] += 11
+    breaker.before_call()
+    breaker.record_neutral()
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()  # the slot is free for the next probe
+
+# ----------------------------- STREAM CUT-OFFS -----------------------------
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+
+def _half_open(monkeypatch, now, chunks):
+    """A stub endpoint streaming ``chunks`` behind a breaker that lets the next call probe it."""
+    member = PoolMember("a", "http://a", "dep", "key")
+    create = lambda **kwargs: iter(chunks)
+    monkeypatch.setattr(openai_client, "_pool", EndpointPool([member]))
+    monkeypatch.setattr(openai_client, "_clients", {"a": SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))})
+    monkeypatch.setattr(config, "LEDGER", False)
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, half_open_probes=1)
+    monkeypatch.setattr(openai_client, "_breaker", breaker)
+    breaker.record_failure()
+    now[0] += 11
+    return breaker, member
+
+def test_closing_a_stream_early_is_neutral(monkeypatch, now):
+    breaker, member = _half_open(monkeypatch, now, [_chunk("a"), _chunk("b")])
+    deltas = openai_client.call_chat_completions([], stream=True)
+    assert next(deltas) == "a"
+    deltas.close()
+    assert breaker.state == HALF_OPEN and breaker.probes_in_flight == 0
+    assert member.outstanding == 0 and member.failures == 0
+
+def test_stream_dropped_before_its_first_chunk_releases_the_member(monkeypatch, now):
+    closed = []
+    class Stream:
+        def __iter__(self):
+            return self
+        def __next__(self):
+            return _chunk("a")
+        def close(self):
+            closed.append(True)
+    breaker, member = _half_open(monkeypatch, now, Stream())
+    deltas = openai_client.call_chat_completions([], stream=True)
+    assert member.outstanding == 1
+    del deltas
+    assert member.outstanding == 0 and closed == [True]
+    assert breaker.state == HALF_OPEN and breaker.probes_in_flight == 0
+
+def test_deadline_cut_off_is_neutral(monkeypatch, now):
+    def chunks():
+        yield _chunk("a")
+        now[0] += 5  # the deadline passes while streaming
+        yield _chunk("b")
+    breaker, member = _half_open(monkeypatch, now, chunks())
+    with deadline(2):
+        deltas = openai_client.call_chat_completions([], stream=True)
+        assert next(deltas) == "a"
+        with pytest.raises(DeadlineExceeded):
+            next(deltas)
+    assert breaker.state == HALF_OPEN and breaker.probes_in_flight == 0
+    assert member.outstanding == 0
+
+def test_complete_stream_closes_and_failed_stream_reopens(monkeypatch, now):
+    breaker, _ = _half_open(monkeypatch, now, [_chunk("a"), _chunk("b")])
+    assert "".join(openai_client.call_chat_completions([], stream=True)) == "ab"
+    assert breaker.state == CLOSED
+
+    def broken():
+        yield _chunk("a")
+        raise openai.APIConnectionError(request=httpx.Request("POST", "http://a"))
+    breaker, _ = _half_open(monkeypatch, now, broken())
+    with pytest.raises(openai.APIConnectionError):
+        list(openai_client.call_chat_completions([], stream=True))
+    assert breaker.state == OPEN
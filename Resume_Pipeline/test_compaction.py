@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Prompt budget checks: evaluation and segmentation messages stay within PROMPT_TOKEN_BUDGET for
+long resumes, long JDs and single over-long lines, a budget the system prompt alone uses up fails
+clearly, and compaction drops only repeated lines and page headers / footers, not repeated content
+"""
+
+import json
+
+import pytest
+
+from Resume_Pipeline import compaction, resume_segment, scoring
+from Resume_Pipeline.compaction import PAGE_BREAK, PromptTooLarge, chunk_text, compact_text, count_tokens, split_to_budget
+
+RESUME = {
+    "Personal Information": {"Name": "Jane Doe", "Email": "jane@example.com"},
+    "Experience": [f"Engineer at Company {i}, 2010-2020, built data pipelines in Python and Go" for i in range(200)],
+    "Skills": ["Python", "AWS", "Kubernetes"] * 50,
+}
+LONG_JD = {"Non-Negotiable Requirements": [f"Requirement {i}: years of hands-on distributed systems work" for i in range(400)]}
+ONE_LINE = "word " * 5000
+
+def _message_tokens(messages):
+    return sum(count_tokens(m["content"]) for m in messages)
+
+@pytest.mark.parametrize("budget", [300, 1000, 6000])
+@pytest.mark.parametrize("resume, jd", [
+    (json.dumps(RESUME), json.dumps({"Non-Negotiable Requirements": ["Python"]})),
+    (json.dumps(RESUME), json.dumps(LONG_JD)),
+    (ONE_LINE, ONE_LINE),
+])
+def test_evaluation_messages_stay_within_budget(monkeypatch, budget, resume, jd):
+    monkeypatch.setattr(scoring, "TOKEN_BUDGET", budget)
+    messages = scoring.build_evaluation_messages(resume, jd)
+    assert _message_tokens(messages) <= budget
+    assert "Job Description: " in messages[1]["content"] and len(messages[1]["content"]) > 100
+
+def test_short_prompts_are_not_trimmed(monkeypatch):
+    monkeypatch.setattr(scoring, "TOKEN_BUDGET", 6000)
+    jd = {"Non-Negotiable Requirements": ["Python"]}
+    content = scoring.build_evaluation_messages(json.dumps({"Skills": ["Python"]}), json.dumps(jd))[1]["content"]
+    assert content == 'Resume: {"Skills":["Python"]}\nJob Description: {"Non-Negotiable Requirements":["Python"]}'
+
+def test_budget_smaller_than_system_prompt_fails_clearly(monkeypatch):
+    monkeypatch.setattr(scoring, "TOKEN_BUDGET", 20)
+    with pytest.raises(PromptTooLarge):
+        scoring.build_evaluation_messages(json.dumps(RESUME), "Python")
+
+def test_over_long_line_is_hard_split(monkeypatch):
+    monkeypatch.setattr(compaction, "TOKEN_BUDGET", 100)
+    chunks = chunk_text("Header\n\n" + ONE_LINE.strip())
+    assert len(chunks) > 1
+    assert all(count_tokens(c) <= 100 for c in chunks)
+    assert " ".join(chunks).split() == ["Header"] + ONE_LINE.split()
+
+def test_split_to_budget_keeps_every_word():
+    pieces = split_to_budget(ONE_LINE, 50)
+    assert all(count_tokens(p) <= 50 for p in pieces)
+    assert " ".join(pieces).split() == ONE_LINE.split()
+
+def test_repeated_entries_keep_their_content():
+    text = ("Software Engineer\nAcme Corp, 2020 - 2023\nBuilt APIs in Python\n\n"
+            "Software Engineer\nInitech, 2017 - 2020\nBuilt APIs in Python\nBuilt APIs in Python")
+    assert compact_text(text).split("\n") == [
+        "Software Engineer", "Acme Corp, 2020 - 2023", "Built APIs in Python", "",
+        "Software Engineer", "Initech, 2017 - 2020", "Built APIs in Python",
+    ]
+
+def test_running_headers_and_footers_are_dropped():
+    page = "Jane Doe - jane@example.com\n{body}\nConfidential"
+    text = PAGE_BREAK.join(page.format(body=body) for body in ("Experience\nAcme Corp", "Education\nMIT"))
+    assert compact_text(text).split("\n") == [
+        "Jane Doe - jane@example.com", "Experience", "Acme Corp", "Confidential", "", "Education", "MIT",
+    ]
+
+def test_segmentation_prompts_count_the_system_prompt(monkeypatch):
+    monkeypatch.setattr(resume_segment, "TOKEN_BUDGET", 300)
+    prompts = resume_segment.segmentation_messages("\n\n".join(RESUME["Experience"]))
+    assert len(prompts) > 1
+    assert all(_message_tokens(messages) <= 300 for messages in prompts)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Cost ledger checks: usage is priced (cached tokens and batch requests at their discount) and
+reported per JD / stage, and a JD budget refuses the matrix's model calls once it would be
+exceeded - the pairs are left unscored, or scored locally with LEDGER_BUDGET_ACTION=local,
+and the JD's spend is read back from the ledger on the next run
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from Resume_Pipeline import config, cost_ledger, openai_client, scoring, scoring_matrix
+from Resume_Pipeline.endpoint_pool import EndpointPool, PoolMember
+from Resume_Pipeline.result_sink import JsonlSink
+from Resume_Pipeline.stub_server import build_reply
+
+JD = {"Non-Negotiable Requirements": ["5+ years of Python", "AWS"], "Negotiable Requirements": ["Kubernetes"]}
+RESUME = {"Personal Information": "Jane Doe", "Experience": ["Senior engineer, Python and AWS, 2016 - present"],
+          "Skills/programming Languages": ["Python", "AWS", "Kubernetes"]}
+
+def _fresh_ledger(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "LEDGER", True)
+    monkeypatch.setattr(config, "LEDGER_PATH", str(tmp_path / "ledger.sqlite3"))
+    monkeypatch.setattr(config, "LEDGER_PRICES", '{"o4-mini": [1.10, 0.275, 4.40], "scoring-deployment": [2, 0.5, 8]}')
+    for name, value in (("_ledger", None), ("_spent", {}), ("_completions", {}), ("_run", ""), ("_prices", None),
+                        ("_unpriced", set()), ("_served", {})):
+        monkeypatch.setattr(cost_ledger, name, value)
+
+def test_usage_priced_and_reported(tmp_path, monkeypatch):
+    _fresh_ledger(tmp_path, monkeypatch)
+    usage = {"prompt_tokens": 1000, "completion_tokens": 500, "prompt_tokens_details": {"cached_tokens": 400}}
+    with cost_ledger.attribute(jd="backend"), cost_ledger.attribute(stage="evaluate", resume="alice"):
+        entry = cost_ledger.record("o4-mini-2025-04-16", usage, latency=1.5)
+    assert entry["cost"] == pytest.approx((600 * 1.10 + 400 * 0.275 + 500 * 4.40) / 1e6)
+    batch = cost_ledger.record("o4-mini", SimpleNamespace(prompt_tokens=1000, completion_tokens=0, prompt_tokens_details=None),
+                               batch=True, stage="resume_segment", resume="bob")
+    assert batch["cost"] == pytest.approx(1000 * 1.10 / 1e6 * config.LEDGER_BATCH_DISCOUNT)
+    assert cost_ledger.record("unpriced-model", usage)["cost"] == 0.0
+    by_deployment = cost_ledger.record("gpt-x", usage, deployment="scoring-deployment")
+    assert by_deployment["cost"] == pytest.approx((600 * 2 + 400 * 0.5 + 500 * 8) / 1e6)
+    assert cost_ledger.record("o4-mini", None) is None
+
+    ledger = cost_ledger.get_ledger()
+    by_jd = {row["jd"]: row for row in ledger.report("jd")}
+    assert by_jd["backend"]["calls"] == 1 and by_jd["backend"]["cached_tokens"] == 400
+    assert by_jd["backend"]["mean_latency"] == 1.5
+    assert {row["stage"] for row in ledger.report("stage")} == {"evaluate", "resume_segment", None}
+    assert ledger.spent(jd="backend") == pytest.approx(entry["cost"])
+    with pytest.raises(ValueError):
+        ledger.report("cost; DROP TABLE model_calls")
+
+def test_budget_prices_calls_like_recorded_usage(tmp_path, monkeypatch):
+    _fresh_ledger(tmp_path, monkeypatch)
+    monkeypatch.setattr(config, "LEDGER_JD_BUDGET", 1.0)
+    messages = [{"role": "user", "content": "hello " * 100}]
+    usage = {"prompt_tokens": 1000, "completion_tokens": 500}
+    with cost_ledger.attribute(jd="backend"):
+        # the deployment's name has no price: it is priced by the model it answers with
+        cost_ledger.check_budget("scoring", messages, deployments=["my-azure-deploy"])  # not answered yet
+        cost_ledger.record("o4-mini-2025-04-16", usage, deployment="my-azure-deploy")
+        assert cost_ledger.estimate("scoring", messages, deployment="my-azure-deploy") > 0
+        cost_ledger.check_budget("scoring", messages, deployments=["my-azure-deploy"])
+
+        cost_ledger.record("gpt-x", usage, deployment="other-deploy")
+        with pytest.raises(cost_ledger.PricesMissing, match="gpt-x"):
+            cost_ledger.check_budget("scoring", messages, deployments=["other-deploy"])
+        monkeypatch.setattr(openai_client, "_pool", EndpointPool([PoolMember("a", "http://a", "other-deploy", "key")]))
+        with pytest.raises(cost_ledger.PricesMissing):
+            scoring.evaluate_messages(messages)  # not swallowed into an empty evaluation
+    cost_ledger.check_budget("scoring", messages, deployments=["other-deploy"])  # no JD, so no budget applies
+
+def _fake_client(calls):
+    def create(model, messages, timeout=None, **kwargs):
+        calls.append(messages)
+        return SimpleNamespace(model=model, usage=SimpleNamespace(prompt_tokens=100, completion_tokens=1000),
+                               choices=[SimpleNamespace(message=SimpleNamespace(content=build_reply(messages)))])
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+def test_jd_budget_stops_or_scores_locally(tmp_path, monkeypatch):
+    _fresh_ledger(tmp_path, monkeypatch)
+    calls = []
+    monkeypatch.setattr(openai_client, "get_client", lambda member=None: _fake_client(calls))
+    # one call costs ~$0.0045 (mostly its 1000 completion tokens): the second would exceed the budget
+    monkeypatch.setattr(config, "LEDGER_JD_BUDGET", 0.005)
+    sink = JsonlSink(str(tmp_path / "results.jsonl"))
+    sink.put("jd_json", "jd1", JD)
+    for name in ("alice", "bob", "carol"):
+        sink.put("resume_json", name, dict(RESUME, **{"Personal Information": name}))
+
+    counts = scoring_matrix.run_matrix(["jd1"], ["alice", "bob", "carol"], workers=1, sink=sink)
+    assert (counts["scored"], counts["over_budget"], counts["stopped"]) == (1, 2, True)
+    assert len(calls) == 1 and sink.exists("evaluation", "jd1/alice")
+    assert cost_ledger.get_ledger().report("resume", jd="jd1")[0]["resume"] == "alice"
+
+    # next run: the spend is read back from the ledger, the rest is scored locally
+    monkeypatch.setattr(cost_ledger, "_spent", {})
+    monkeypatch.setattr(config, "LEDGER_BUDGET_ACTION", "local")
+    counts = scoring_matrix.run_matrix(["jd1"], ["alice", "bob", "carol"], workers=1, sink=sink)
+    assert counts["over_budget"] == 2 and not counts.get("stopped") and len(calls) == 1
+    assert sink.get("local_evaluation", "jd1/bob")["scorer"] == "local"
+    assert set(sink.get("local_evaluation", "matrix")["scores"]["carol"]) == {"jd1"}
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    print("Testing cost ledger")
+    print("=" * 40)
+    for test in (test_usage_priced_and_reported, test_budget_prices_calls_like_recorded_usage, test_jd_budget_stops_or_scores_locally):
+        with tempfile.TemporaryDirectory() as td, pytest.MonkeyPatch.context() as mp:
+            test(Path(td), mp)
+    print("Testing complete!")
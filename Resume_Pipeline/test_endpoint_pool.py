@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Endpoint pool checks: calls go to the least-loaded member relative to its weight, throttled or
+repeatedly failing members leave rotation until their cooldown passes, and concurrent first
+calls share one client per member
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import openai
+
+from Resume_Pipeline import openai_client
+from Resume_Pipeline.endpoint_pool import EndpointPool, PoolMember, load_members
+
+def _members(*weights):
+    return [PoolMember(f"m{i}", f"http://m{i}", "dep", "key", weight=w) for i, w in enumerate(weights)]
+
+def _error(status, headers=None):
+    return SimpleNamespace(status_code=status, response=SimpleNamespace(headers=headers or {}))
+
+def test_least_loaded_member_is_chosen():
+    pool = EndpointPool(_members(1, 1, 1))
+    picked = [pool.acquire().name for _ in range(3)]
+    assert sorted(picked) == ["m0", "m1", "m2"]
+    pool.release(pool.members[1])
+    assert pool.acquire().name == "m1"
+
+def test_weights_share_the_load():
+    pool = EndpointPool(_members(3, 1))
+    picked = [pool.acquire().name for _ in range(8)]
+    assert picked.count("m0") == 6 and picked.count("m1") == 2
+
+def test_exclude_picks_another_member():
+    pool = EndpointPool(_members(1, 1))
+    first = pool.acquire()
+    assert pool.acquire(exclude=first) is not first
+    assert EndpointPool(_members(1)).acquire(exclude=first).name == "m0"  # nothing else: use what there is
+
+def test_throttled_member_fails_over_until_retry_after(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    pool = EndpointPool(_members(1, 1), cooldown=30)
+    member, other = pool.members
+    pool.release(pool.acquire(), error=_error(429, {"retry-after": "5"}))
+    assert [pool.acquire() for _ in range(3)] == [other] * 3
+    assert pool.has_available()
+    now[0] += 6
+    assert pool.acquire() is member
+
+def test_consecutive_failures_take_a_member_out_of_rotation(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    pool = EndpointPool(_members(1, 1), cooldown=30, failure_threshold=2)
+    bad, good = pool.members
+    for _ in range(2):
+        pool.acquire(exclude=good)
+        pool.release(bad, error=_error(503))
+    assert bad.failures == 2 and not bad.available(now[0])
+    assert {pool.acquire().name for _ in range(4)} == {"m1"}
+
+    pool.release(good, error=_error(400))  # caused by the request, not the member
+    assert good.failures == 0 and good.available(now[0])
+
+    now[0] += 31
+    assert bad.available(now[0])
+
+def test_all_members_cooling_down_uses_the_first_to_recover(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    pool = EndpointPool(_members(1, 1), cooldown=30)
+    pool.members[0].cooldown_until = 150.0
+    pool.members[1].cooldown_until = 120.0
+    assert not pool.has_available()
+    assert pool.acquire().name == "m1"
+
+def test_load_members_from_spec():
+    members = load_members('[{"endpoint": "http://a", "deployment": "d1", "weight": 2}, {"name": "b", "api_key": "k"}]',
+                           default_key="default")
+    assert [(m.name, m.endpoint, m.deployment, m.api_key, m.weight) for m in members][0] == ("0:d1", "http://a", "d1", "default", 2.0)
+    assert (members[1].name, members[1].api_key) == ("b", "k")
+
+def test_concurrent_first_calls_share_one_client(monkeypatch):
+    built = []
+    class SlowClient:
+        def __init__(self, **kwargs):
+            built.append(kwargs["base_url"])
+            time.sleep(0.05)
+    monkeypatch.setattr(openai, "OpenAI", SlowClient)
+    monkeypatch.setattr(openai_client, "_clients", {})
+    members = _members(1, 1)
+    clients = []
+    start = threading.Barrier(16)
+    def first_call(member):
+        start.wait()
+        clients.append((member.name, openai_client.get_client(member)))
+    threads = [threading.Thread(target=first_call, args=(members[i % 2],)) for i in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(built) == ["http://m0", "http://m1"]
+    assert len({id(client) for _, client in clients}) == 2
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Incremental evaluation parsing: feeding a reply in chunks that split it mid-token, mid-title
+or mid-score yields the same criteria as parse_evaluation on the whole text, each exactly once.
+The SSE endpoint honors the same fused / per-requirement modes and over-budget local fallback
+as /evaluate-resume
+"""
+
+import json
+import random
+
+import pytest
+
+from Resume_Pipeline import api_server, config
+from Resume_Pipeline.cost_ledger import BudgetExceeded
+from Resume_Pipeline.scoring import EVALUATION_CRITERIA, EvaluationStreamParser, evaluation_messages, parse_evaluation
+from Resume_Pipeline.stub_server import build_reply
+
+BLANK_LINES = (
+    "1. Fulfillment with Non-Negotiable Criteria: 10/10\n"
+    "   Meets every must-have requirement.\n"
+    "   Strong Python and AWS background.\n\n"
+    "2. Fulfillment with Negotiable Criteria: 7/10\n"
+    "   Some Kubernetes exposure.\n\n"
+    "3. Continuity and Recency of Experience: 9/10\n"
+    "   Continuous relevant work since 2016."
+)
+NO_BLANK_LINES = BLANK_LINES.replace("\n\n", "\n")  # some replies separate criteria with one newline
+STUB = build_reply(evaluation_messages("{}", "{}"))
+
+def _feed(chunks):
+    parser = EvaluationStreamParser()
+    emitted = []
+    for chunk in chunks:
+        emitted.extend(parser.feed(chunk))
+    emitted.extend(parser.close())
+    return emitted, parser.parsed
+
+def _as_dict(emitted):
+    return {item["title"]: {"score": item["score"], "description": item["description"]} for item in emitted}
+
+@pytest.mark.parametrize("text", [BLANK_LINES, STUB])
+def test_every_two_way_split_matches_parse_evaluation(text):
+    expected = parse_evaluation(text)
+    assert len(expected) == 3
+    for cut in range(len(text) + 1):
+        emitted, parsed = _feed([text[:cut], text[cut:]])
+        assert len(emitted) == 3, cut
+        assert _as_dict(emitted) == parsed == expected, cut
+
+@pytest.mark.parametrize("text, expected", [
+    (BLANK_LINES, parse_evaluation(BLANK_LINES)),
+    (NO_BLANK_LINES, parse_evaluation(BLANK_LINES)),  # split on the next numbered criterion instead
+    (STUB, parse_evaluation(STUB)),
+])
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8])
+def test_fixed_size_chunks_match_parse_evaluation(text, expected, size):
+    emitted, parsed = _feed(text[i:i + size] for i in range(0, len(text), size))
+    assert len(emitted) == 3
+    assert _as_dict(emitted) == parsed == expected
+
+def test_random_chunks_match_parse_evaluation():
+    rng = random.Random(7)
+    expected = parse_evaluation(BLANK_LINES)
+    for _ in range(200):
+        cuts = sorted(rng.sample(range(1, len(BLANK_LINES)), rng.randint(1, 20)))
+        chunks = [BLANK_LINES[a:b] for a, b in zip([0] + cuts, cuts + [len(BLANK_LINES)])]
+        emitted, _ = _feed(chunks)
+        assert _as_dict(emitted) == expected
+
+def test_criterion_is_emitted_once_complete():
+    parser = EvaluationStreamParser()
+    first, rest = BLANK_LINES.split("\n\n", 1)
+    assert parser.feed(first) == []  # could still get another description line
+    assert [c["title"] for c in parser.feed("\n\n")] == ["Fulfillment with Non-Negotiable Criteria"]
+    assert parser.feed(rest) != []
+    assert [c["title"] for c in parser.close()] == ["Continuity and Recency of Experience"]
+
+# ----------------------------- SSE ENDPOINT -----------------------------
+RESUME = {"Personal Information": ["Jane Doe", "jane@example.com"], "Skills": ["Python", "AWS"],
+          "Experience": ["Senior engineer, Python and AWS, 2016 - present"]}
+JD = {"Non-Negotiable Requirements": ["Python"], "Negotiable Requirements": ["AWS"]}
+SCORED = {title: {"score": "8/10", "description": "stub"} for title in EVALUATION_CRITERIA}
+
+def _events(monkeypatch, **modes):
+    """Run the SSE generator against stubbed download / extraction and return its (event, data) pairs."""
+    monkeypatch.setattr(api_server, "download_file_from_url", lambda url, temp_dir: "resume.pdf")
+    monkeypatch.setattr(api_server, "extract_text_sync", lambda path: "Jane Doe jane@example.com " * 10)
+    monkeypatch.setattr(api_server, "segment_and_format", lambda text: RESUME)
+    request = api_server.ResumeEvaluationRequest(resume_url="http://x/resume.pdf", jd_json=JD, **modes)
+    events = []
+    for message in api_server._evaluation_events(request):
+        event, data = message.strip().split("\n")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+def _criteria(events):
+    return [data["title"] for event, data in events if event == "criterion"]
+
+def _no_call(*args):
+    raise AssertionError("not this mode")
+
+def test_stream_honors_fused_mode(monkeypatch):
+    monkeypatch.setattr(api_server, "evaluate_resume_fused", lambda resume, jd: (RESUME, dict(SCORED)))
+    monkeypatch.setattr(api_server, "evaluate_resume_stream", _no_call)
+    events = _events(monkeypatch, fused=True, per_requirement=False)
+    assert _criteria(events) == EVALUATION_CRITERIA
+    assert events[-1][0] == "result" and events[-1][1]["evaluation"]["personal_info"]["email"] == "jane@example.com"
+
+def test_stream_honors_per_requirement_mode(monkeypatch):
+    monkeypatch.setattr(api_server, "evaluate_by_requirement", lambda resume, jd: dict(SCORED))
+    monkeypatch.setattr(api_server, "evaluate_resume_stream", _no_call)
+    events = _events(monkeypatch, fused=False, per_requirement=True)
+    assert _criteria(events) == EVALUATION_CRITERIA
+
+@pytest.mark.parametrize("action", ["local", "stop"])
+def test_stream_over_budget_follows_the_budget_action(monkeypatch, action):
+    def over_budget(resume, jd):
+        raise BudgetExceeded("jd", "jd1", 0.01, 0.01, 0.002)
+        yield
+    monkeypatch.setattr(api_server, "evaluate_resume_stream", over_budget)
+    monkeypatch.setattr(config, "LEDGER_BUDGET_ACTION", action)
+    events = _events(monkeypatch, fused=False, per_requirement=False)
+    if action == "local":
+        assert _criteria(events) == EVALUATION_CRITERIA
+        assert set(events[-1][1]["evaluation"]) == set(EVALUATION_CRITERIA) | {"personal_info"}
+    else:
+        assert events[-1] == ("error", {"status": 402, "detail": events[-1][1]["detail"]})
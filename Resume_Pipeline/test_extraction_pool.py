@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Extraction pool recovery: a task's timeout runs from when a worker starts it, so tasks queued
+behind a saturated pool still complete; a task that runs past it is aborted in its worker
+without disturbing the others, a worker that ignores the abort is killed and the pool rebuilt
+(the tasks killed with it are retried once), a worker that keeps crashing is reported, and
+later tasks succeed
+"""
+
+import os
+import signal
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from Resume_Pipeline import extraction_pool
+from Resume_Pipeline.extraction_pool import ExtractionPool, ExtractionTimeout
+
+# Tasks run in worker processes, so they must be importable module-level functions
+def _sleep(seconds):
+    time.sleep(seconds)
+    return os.getpid()
+
+def _stuck(seconds):
+    signal.signal(signal.SIGALRM, signal.SIG_IGN)  # like a task blocked in native code
+    time.sleep(seconds)
+
+def _crash():
+    os._exit(1)
+
+@pytest.fixture
+def pool():
+    pool = ExtractionPool(workers=2, timeout=3, max_tasks_per_child=10, memory_limit_mb=0)
+    pool.start()
+    yield pool
+    pool.shutdown()
+
+def _run_all(pool, calls, stagger=0.0):
+    """Run each (key, fn, *args) call from its own thread, ``stagger`` seconds apart."""
+    results = {}
+    def run(key, fn, *args):
+        try:
+            results[key] = pool.run_sync(fn, *args)
+        except Exception as e:
+            results[key] = e
+    threads = [threading.Thread(target=run, args=call) for call in calls]
+    for thread in threads:
+        thread.start()
+        time.sleep(stagger)
+    for thread in threads:
+        thread.join(20)
+    return results
+
+def test_queued_tasks_complete_on_a_saturated_pool(pool):
+    # six 1.2s tasks on two workers: the last ones wait ~2.4s in the queue, then run well within 3s
+    started = time.monotonic()
+    results = _run_all(pool, [(i, _sleep, 1.2) for i in range(6)])
+    assert time.monotonic() - started > 3
+    assert all(isinstance(results[i], int) for i in range(6))
+    assert pool.stats() == {"workers": 2, "tasks": 6, "timeouts": 0, "restarts": 0}
+
+def test_timeout_aborts_only_the_slow_task(pool):
+    pool.run_sync(_sleep, 0)
+    results = _run_all(pool, [("slow", _sleep, 30), ("neighbour", _sleep, 2)])
+    assert isinstance(results["slow"], ExtractionTimeout)
+    assert isinstance(results["neighbour"], int)
+    assert pool.stats() == {"workers": 2, "tasks": 3, "timeouts": 1, "restarts": 0}
+    assert isinstance(pool.run_sync(_sleep, 0), int)
+
+def test_worker_ignoring_its_timeout_is_killed(pool, monkeypatch):
+    monkeypatch.setattr(extraction_pool, "KILL_GRACE", 0.5)
+    pool.run_sync(_sleep, 0)
+    started = time.monotonic()
+    # the neighbour is still running when the stuck worker is killed at ~3.5s
+    results = _run_all(pool, [("stuck", _stuck, 30), ("neighbour", _sleep, 1.5)], stagger=2.5)
+    assert time.monotonic() - started < 10
+    assert isinstance(results["stuck"], ExtractionTimeout)
+    assert isinstance(results["neighbour"], int)  # killed with the pool, then retried on the new one
+    assert pool.stats() == {"workers": 2, "tasks": 4, "timeouts": 1, "restarts": 1}
+    assert isinstance(pool.run_sync(_sleep, 0), int)
+
+def test_crashing_worker_is_retried_once_then_reported(pool):
+    with pytest.raises(BrokenProcessPool):
+        pool.run_sync(_crash)
+    assert pool.stats()["restarts"] == 2
+    assert isinstance(pool.run_sync(_sleep, 0), int)
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Fused evaluation checks against a stubbed model: a schema-valid reply (also inside a code fence)
+becomes the formatted resume and the three criterion scores, and an invalid or failing reply
+returns None so the caller falls back to the two-step path
+"""
+
+import json
+from types import SimpleNamespace
+
+from Resume_Pipeline import fused_evaluation, openai_client
+from Resume_Pipeline.scoring import EVALUATION_CRITERIA
+from Resume_Pipeline.stub_server import build_reply
+
+RESUME = "Jane Doe\njane@example.com\nSenior engineer, Python and AWS since 2016"
+JD = {"Non-Negotiable Requirements": ["5+ years of Python"], "Negotiable Requirements": ["Kubernetes"]}
+
+def _model(monkeypatch, reply):
+    calls = []
+    def call_chat_completions(messages, model=None, **kwargs):
+        calls.append(kwargs)
+        content = reply(messages) if callable(reply) else reply
+        if isinstance(content, Exception):
+            raise content
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+    monkeypatch.setattr(openai_client, "call_chat_completions", call_chat_completions)
+    return calls
+
+def test_valid_reply_is_structured_and_scored(monkeypatch):
+    calls = _model(monkeypatch, build_reply)  # the stub answers FUSED_SYSTEM_PROMPT with its schema
+    formatted, evaluation = fused_evaluation.evaluate_resume_fused(RESUME, json.dumps(JD))
+    assert calls == [{"response_format": {"type": "json_object"}}]
+    assert formatted["Personal Information"] == {"Name": "Jane Doe", "Email": "jane@example.com"}
+    assert list(evaluation) == EVALUATION_CRITERIA
+    assert all(item["score"].endswith("/10") and item["description"] for item in evaluation.values())
+
+def test_code_fenced_reply_is_accepted(monkeypatch):
+    _model(monkeypatch, lambda messages: "```json\n" + build_reply(messages) + "\n```")
+    assert fused_evaluation.evaluate_resume_fused(RESUME, json.dumps(JD)) is not None
+
+def test_invalid_or_failed_reply_falls_back(monkeypatch):
+    reply = json.loads(build_reply([{"role": "system", "content": fused_evaluation.FUSED_SYSTEM_PROMPT},
+                                    {"role": "user", "content": "Resume: " + RESUME}]))
+    reply["evaluation"][0]["score"] = 11
+    for bad in ("not json", json.dumps(reply), json.dumps({"resume": {}, "evaluation": []}), RuntimeError("500")):
+        _model(monkeypatch, bad)
+        assert fused_evaluation.evaluate_resume_fused(RESUME, json.dumps(JD)) is None
+
+if __name__ == "__main__":
+    import pytest
+    print("Testing fused evaluation")
+    print("=" * 40)
+    for test in (test_valid_reply_is_structured_and_scored, test_code_fenced_reply_is_accepted,
+                 test_invalid_or_failed_reply_falls_back):
+        with pytest.MonkeyPatch.context() as mp:
+            test(mp)
+    print("Testing complete!")
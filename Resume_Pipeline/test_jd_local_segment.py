@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Local JD segmenter checks: JDs with standard headings (must / nice, Requirements only,
+Qualifications + Preferred, the sample JD) are segmented locally above JD_LOCAL_CONFIDENCE without
+a model call; JDs without requirement headings, whose bullets contradict them, or whose bullets
+under a generic heading are all uncertain ("familiarity with"), go to the model
+"""
+
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from Resume_Pipeline import jd_segment, openai_client
+from Resume_Pipeline.jd_local_segment import segment_job_description_local
+
+JD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jds")
+
+REQUIREMENTS_ONLY = """Backend Engineer
+Requirements
+- 5+ years of Python
+- Experience with PostgreSQL
+- Docker is a plus
+"""
+
+QUALIFICATIONS_PREFERRED = """Responsibilities
+- Build and run data pipelines
+- Review code
+
+Qualifications
+- Degree in computer science
+- Experience with AWS
+
+Preferred
+- Kubernetes
+- Terraform
+"""
+
+FREE_TEXT = """We are a fast-growing startup looking for an engineer who loves Python and
+wants to build data products with a small team. You will work on our API and data platform."""
+
+CONTRADICTED = """Must have:
+- Kubernetes is a plus
+- Terraform would be nice to have
+- Ideally some Go
+"""
+
+UNCERTAIN = """Requirements
+- Familiarity with Kafka
+- Exposure to GraphQL
+- Familiarity with Terraform
+"""
+
+def _lists(text):
+    """Segmented text -> (non-negotiable items, negotiable items)"""
+    must, nice = text.split("\nNegotiable Requirements:")
+    items = lambda block: [line.split(". ", 1)[1] for line in block.splitlines() if line[:1].isdigit()]
+    return items(must), items(nice)
+
+def _model(monkeypatch):
+    calls = []
+    def call_chat_completions(messages, model=None, **kwargs):
+        calls.append(messages)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="from the model"))])
+    monkeypatch.setattr(openai_client, "call_chat_completions", call_chat_completions)
+    return calls
+
+@pytest.mark.parametrize("text, must, nice", [
+    (REQUIREMENTS_ONLY, ["5+ years of Python", "Experience with PostgreSQL"], ["Docker is a plus"]),
+    (QUALIFICATIONS_PREFERRED, ["Degree in computer science", "Experience with AWS"], ["Kubernetes", "Terraform"]),
+])
+def test_standard_headings_are_segmented_locally(monkeypatch, text, must, nice):
+    segmented, confidence = segment_job_description_local(text)
+    assert confidence >= jd_segment.LOCAL_CONFIDENCE
+    assert _lists(segmented) == (must, nice)
+    calls = _model(monkeypatch)
+    assert jd_segment.segment_job_description(text) == segmented and not calls
+
+def test_sample_jd_is_local():
+    with open(os.path.join(JD_DIR, "jd2.txt"), encoding="utf-8") as f:
+        segmented, confidence = segment_job_description_local(f.read())
+    must, nice = _lists(segmented)
+    assert confidence >= jd_segment.LOCAL_CONFIDENCE and len(must) == 8 and len(nice) == 5
+    assert not any("RESTful APIs" in item for item in must + nice)  # responsibilities are skipped
+
+@pytest.mark.parametrize("text", [FREE_TEXT, CONTRADICTED, UNCERTAIN])
+def test_unclear_jds_fall_back_to_model(monkeypatch, text):
+    assert segment_job_description_local(text)[1] < jd_segment.LOCAL_CONFIDENCE
+    calls = _model(monkeypatch)
+    assert jd_segment.segment_job_description(text) == "from the model" and len(calls) == 1
+
+if __name__ == "__main__":
+    print("Testing local JD segmentation")
+    print("=" * 40)
+    for text, must, nice in ((REQUIREMENTS_ONLY, ["5+ years of Python", "Experience with PostgreSQL"], ["Docker is a plus"]),
+                             (QUALIFICATIONS_PREFERRED, ["Degree in computer science", "Experience with AWS"], ["Kubernetes", "Terraform"])):
+        with pytest.MonkeyPatch.context() as mp:
+            test_standard_headings_are_segmented_locally(mp, text, must, nice)
+    test_sample_jd_is_local()
+    for text in (FREE_TEXT, CONTRADICTED, UNCERTAIN):
+        with pytest.MonkeyPatch.context() as mp:
+            test_unclear_jds_fall_back_to_model(mp, text)
+    print("Testing complete!")
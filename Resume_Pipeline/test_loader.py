@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Loader checks: the NumPy region/column path must produce exactly the same text as the
+tuple-based path (sample resumes and dense synthetic multi-column pages), and the streaming
+DOCX extractor must keep tables, text boxes and headers in reading order; OCR presets resolve
+with their overrides, binarization splits ink from paper and each tesseract run gets its own
+thread limit; the page, byte and time limits stop extraction (a file over the byte limit is
+rejected with ResumeTooLarge)
+"""
+
+import io
+import os
+import glob
+import time
+import random
+import zipfile
+
+import pytest
+
+from Resume_Pipeline import loader_resume
+
+RAW_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "raw_resumes")
+
+needs_numpy = pytest.mark.skipif(not loader_resume.HAS_NUMPY, reason="numpy not installed")
+
+def _tuple_layout(blocks, width, height):
+    regions = loader_resume._group_blocks_into_regions(blocks, height)
+    texts = (loader_resume._region_to_text(r, width) for r in regions)
+    return "\n\n".join(t for t in texts if t.strip())
+
+def _dense_page(rng, rows, staggered):
+    """Two columns of short blocks (staggered: left and right never overlap vertically)"""
+    step = 760 / rows
+    right_text = lambda j: "2019 - 2021" if j % 4 == 0 else f"Right block {j} Kubernetes leadership"
+    blocks = []
+    for j in range(rows):
+        y = 20 + j * step
+        h = step * (0.45 if staggered else 0.9)
+        right_y = y + (step * 0.5 if staggered else 1)
+        blocks.append((30 + rng.random(), y, 290, y + h, f"Left block {j} Python AWS", j, 0))
+        blocks.append((320 + rng.random(), right_y, 590, right_y + h, right_text(j), j, 0))
+    rng.shuffle(blocks)
+    return blocks
+
+@needs_numpy
+@pytest.mark.skipif(not loader_resume.HAS_PYMUPDF, reason="PyMuPDF not installed")
+def test_vector_layout_matches_samples():
+    """Every page of the sample resumes lays out identically on both paths"""
+    fitz = loader_resume._fitz()
+    pages = 0
+    for path in sorted(glob.glob(os.path.join(RAW_DIR, "*.pdf"))):
+        with fitz.open(path) as doc:
+            for page in doc:
+                blocks = page.get_text("blocks")
+                w, h = page.rect.width, page.rect.height
+                assert loader_resume._layout_text_np(blocks, w, h) == _tuple_layout(blocks, w, h), path
+                pages += 1
+    print(f"{pages} sample pages identical")
+
+@needs_numpy
+def test_vector_layout_matches_dense_pages():
+    """Dense aligned / staggered two-column pages (the all-pairs worst case) lay out identically"""
+    rng = random.Random(7)
+    for rows in (3, 25, 200):
+        for staggered in (False, True):
+            blocks = _dense_page(rng, rows, staggered)
+            assert loader_resume._layout_text_np(blocks, 612, 792) == _tuple_layout(blocks, 612, 792)
+
+W = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+MC = 'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+
+def _para(*runs):
+    return "<w:p>" + "".join(f"<w:r>{r}</w:r>" for r in runs) + "</w:p>"
+
+def _docx_bytes():
+    """A minimal two-column DOCX: header, table layout, a text box with its VML fallback, tabs/breaks"""
+    textbox = "<w:txbxContent>" + _para("<w:t>Sidebar: Python, SQL</w:t>") + "</w:txbxContent>"
+    body = (
+        _para("<w:t>Jane </w:t>", "<w:t>Doe</w:t>")
+        + "<w:tbl><w:tr>"
+        + "<w:tc>" + _para("<w:t>SKILLS</w:t>") + _para("<w:t>Kubernetes</w:t>") + "</w:tc>"
+        + "<w:tc>" + _para("<w:t>EXPERIENCE</w:t>") + _para("<w:t>Engineer</w:t><w:tab/><w:t>2021</w:t>") + "</w:tc>"
+        + "</w:tr></w:tbl>"
+        + f"<w:p><w:r><mc:AlternateContent><mc:Choice>{textbox}</mc:Choice>"
+        + f"<mc:Fallback>{textbox}</mc:Fallback></mc:AlternateContent></w:r></w:p>"
+        + _para("<w:t>Line one</w:t><w:br/><w:t>Line two</w:t><w:br w:type=\"page\"/>")
+    )
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("word/document.xml", f"<w:document {W} {MC}><w:body>{body}</w:body></w:document>")
+        for name in ("header1.xml", "header2.xml"):  # default + first-page copy of the same header
+            z.writestr(f"word/{name}", f"<w:hdr {W}>" + _para("<w:t>jane@example.com</w:t>") + "</w:hdr>")
+    return buf.getvalue()
+
+def test_docx_reading_order_from_bytes():
+    """Header once, paragraphs, table cells row by row, text box once (no VML duplicate)"""
+    text = loader_resume.extract_docx_text(_docx_bytes())
+    assert text.split("\n") == [
+        "jane@example.com", "Jane Doe", "SKILLS", "Kubernetes", "EXPERIENCE", "Engineer\t2021",
+        "Sidebar: Python, SQL", "", "Line one", "Line two",
+    ]
+
+def test_docx_matches_python_docx_on_plain_documents(tmp_path):
+    """On paragraph-only documents the output equals the old python-docx path"""
+    docx = pytest.importorskip("docx")
+    doc = docx.Document()
+    doc.add_heading("Jane Doe", level=1)
+    doc.add_paragraph("Senior Engineer\tExample Corp")
+    doc.add_paragraph("Built pipelines", style="List Bullet").add_run().add_break()
+    path = tmp_path / "plain.docx"
+    doc.save(path)
+    expected = "\n".join(p.text for p in docx.Document(path).paragraphs)
+    assert loader_resume.extract_docx_text(str(path)) == expected
+    assert loader_resume.load_resume(str(path)) == loader_resume._clean_text(expected)
+
+def test_ocr_presets_and_binarization(monkeypatch):
+    """Presets resolve with their OCR_* overrides; Otsu binarization leaves only ink and paper"""
+    assert loader_resume.ocr_settings("accurate")["dpi"] == 300
+    monkeypatch.setattr(loader_resume.config, "OCR_PRESET", "fast")
+    monkeypatch.setattr(loader_resume.config, "OCR_DPI", 240)
+    monkeypatch.setattr(loader_resume.config, "OCR_BINARIZE", "false")
+    settings = loader_resume.ocr_settings()
+    assert (settings["preset"], settings["dpi"], settings["binarize"], settings["psm"]) == ("fast", 240, False, 6)
+    with pytest.raises(ValueError):
+        loader_resume.ocr_settings("bogus")
+
+    # ink around gray level 40, paper around 220: the threshold falls between them
+    histogram = [0] * 256
+    histogram[35:45] = [10] * 10
+    histogram[215:225] = [90] * 10
+    assert 44 <= loader_resume._otsu_threshold(histogram) < 215
+    Image = pytest.importorskip("PIL.Image")
+    page = Image.new("RGB", (20, 10), (230, 230, 230))
+    page.paste((30, 30, 30), (0, 0, 5, 10))
+    binary = loader_resume._prepare_image(page, loader_resume.ocr_settings("fast"))
+    assert binary.mode == "L" and sorted(set(binary.tobytes())) == [0, 255]
+
+def test_tesseract_thread_limit_is_per_process(tmp_path, monkeypatch):
+    """Each tesseract run gets its OMP_THREAD_LIMIT in its own environment; os.environ is untouched"""
+    Image = pytest.importorskip("PIL.Image")
+    fake = tmp_path / "tesseract"
+    fake.write_text("#!/usr/bin/env python3\nimport os, sys\n"
+                    "print(os.environ.get('OMP_THREAD_LIMIT'), os.path.exists(sys.argv[1]), *sys.argv[2:])\n")
+    fake.chmod(0o755)
+    monkeypatch.setattr(loader_resume.config, "TESSERACT_CMD", str(fake))
+    monkeypatch.delenv("OMP_THREAD_LIMIT", raising=False)
+
+    def ocr(threads):
+        settings = dict(loader_resume.ocr_settings("fast"), threads=threads)
+        return loader_resume._ocr_image(Image.new("L", (8, 8), 255), "deu", 10, settings).split()
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(ocr, [1, 2, 3, 4] * 3))
+    assert results == [[str(n), "True", "stdout", "-l", "deu", "--psm", "6", "--oem", "1"] for n in [1, 2, 3, 4] * 3]
+    assert "OMP_THREAD_LIMIT" not in os.environ
+
+needs_pymupdf = pytest.mark.skipif(not loader_resume.HAS_PYMUPDF, reason="PyMuPDF not installed")
+
+def _pdf(path, pages):
+    """A text PDF whose pages are long enough that no OCR fallback kicks in"""
+    doc = loader_resume._fitz().open()
+    for i in range(1, pages + 1):
+        page = doc.new_page()
+        for line in range(12):
+            page.insert_text((72, 72 + 14 * line), f"Page {i} line {line}: Python AWS Kubernetes engineer")
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+@needs_pymupdf
+def test_byte_limit_rejects_the_file(tmp_path):
+    path = _pdf(tmp_path / "big.pdf", 3)
+    with pytest.raises(loader_resume.ResumeTooLarge):
+        loader_resume.load_resume(path, max_bytes=100)
+    with pytest.raises(loader_resume.ResumeTooLarge):
+        next(loader_resume.iter_resume_pages(path, max_bytes=100))
+    assert "Page 3" in loader_resume.load_resume(path, max_bytes=0)  # 0 disables the limit
+
+@needs_pymupdf
+def test_page_limit_keeps_the_first_pages(tmp_path):
+    path = _pdf(tmp_path / "long.pdf", 5)
+    text = loader_resume.load_resume(path, max_pages=2)
+    assert "Page 1 " in text and "Page 2 " in text and "Page 3 " not in text
+    assert len(list(loader_resume.iter_resume_pages(path, max_pages=2))) == 2
+
+@needs_pymupdf
+def test_time_limit_keeps_the_pages_read_so_far(tmp_path, monkeypatch):
+    path = _pdf(tmp_path / "slow.pdf", 5)
+    now = [100.0]
+    def slow_clock():
+        now[0] += 1.0  # every look at the clock costs a second
+        return now[0]
+    monkeypatch.setattr(time, "monotonic", slow_clock)
+    pages = list(loader_resume.iter_resume_pages(path, max_pages=0, max_seconds=2.5))
+    assert 1 <= len(pages) < 5 and "Page 1 " in pages[0]
+    text = loader_resume.load_resume(path, max_pages=0, max_seconds=2.5)
+    assert "Page 1 " in text and "Page 5 " not in text
+
+if __name__ == "__main__":
+    print("Testing resume loader")
+    print("=" * 40)
+    test_vector_layout_matches_samples()
+    test_vector_layout_matches_dense_pages()
+    test_docx_reading_order_from_bytes()
+    test_ocr_presets_and_binarization(pytest.MonkeyPatch())
+    print("Testing complete!")
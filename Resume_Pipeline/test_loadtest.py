@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Load-test harness checks: nearest-rank percentiles (the smallest value with at least pct% of the
+samples at or below it)
+"""
+
+import pytest
+
+from Resume_Pipeline.loadtest import percentile
+
+@pytest.mark.parametrize("values, pct, expected", [
+    (range(1, 101), 99, 99),
+    (range(1, 101), 50, 50),
+    (range(1, 101), 7, 7),
+    (range(1, 101), 100, 100),
+    (range(1, 11), 90, 9),
+    (range(1, 11), 95, 10),
+    ([1, 2], 50, 1),
+    ([2, 1], 51, 2),
+    ([5], 0, 5),
+])
+def test_nearest_rank_percentile(values, pct, expected):
+    assert percentile(list(values), pct) == expected
+
+def test_empty_samples():
+    assert percentile([], 99) == 0.0
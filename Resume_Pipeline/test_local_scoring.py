@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Local scorer checks: same structure as parse_evaluation, deterministic for a fixed date,
+and Experience date ranges parsed into merged month intervals
+"""
+
+import re
+from datetime import date
+
+from Resume_Pipeline.local_scoring import (LocalScorer, experience_intervals, gap_continuity, local_evaluate, terms,
+                                           total_score)
+from Resume_Pipeline.scoring import EVALUATION_CRITERIA
+
+TODAY = date(2026, 1, 15)
+JD = {
+    "Non-Negotiable Requirements": [
+        "3+ years of experience in Python development",
+        "Experience with PostgreSQL or MySQL",
+        "Hands-on Kubernetes and Docker",
+    ],
+    "Negotiable Requirements": ["Exposure to Kafka or RabbitMQ", "AWS certification"],
+}
+STRONG = {
+    "Personal Information": {"Name": "Jane Doe"},
+    "Experience": [
+        "Backend Engineer, Acme (March 2021 – Present)",
+        "Built Python services on Kubernetes with Docker and Postgres; streamed events through Kafka",
+        "Junior Developer, Initech",
+        "Jan 2019 – Feb 2021",
+    ],
+    "Skills": ["Python", "MySQL", "AWS"],
+}
+WEAK = {"Experience": ["Cashier, Shop (2010–2012)", "Handled customer payments"], "Skills": ["Excel"]}
+
+def _points(evaluation):
+    return {k: int(re.match(r"(\d+)/10$", v["score"]).group(1)) for k, v in evaluation.items()}
+
+def test_structure_matches_parse_evaluation():
+    """Three criteria keyed like parse_evaluation, each with an N/10 score and a two-line description"""
+    evaluation = local_evaluate(STRONG, JD, today=TODAY)
+    assert list(evaluation) == EVALUATION_CRITERIA
+    for item in evaluation.values():
+        assert re.fullmatch(r"\d+/10", item["score"])
+        assert len(item["description"].splitlines()) == 2
+
+def test_ranks_matching_candidate_higher():
+    strong, weak = _points(local_evaluate(STRONG, JD, today=TODAY)), _points(local_evaluate(WEAK, JD, today=TODAY))
+    assert all(strong[c] > weak[c] for c in EVALUATION_CRITERIA)
+    assert strong[EVALUATION_CRITERIA[0]] == 10
+    scorer = LocalScorer(JD, today=TODAY)
+    assert [name for name, _ in scorer.rank({"weak": WEAK, "strong": STRONG})] == ["strong", "weak"]
+    assert local_evaluate(STRONG, JD, today=TODAY) == local_evaluate(STRONG, JD, today=TODAY)
+    assert total_score(local_evaluate(STRONG, JD, today=TODAY)) == sum(_points(local_evaluate(STRONG, JD, today=TODAY)).values())
+
+def test_aliases_fold_whole_names_only():
+    """Multi-word names match their abbreviation; the single words they contain do not"""
+    assert {"ml", "ai", "gcp", "aws", ".net"} <= terms("Machine-learning and artificial intelligence on Google Cloud, "
+                                                      "Amazon Web Services and .NET Core")
+    assert not {"ml", "ai", "gcp", "aws", ".net"} & terms("Virtual machine images, Google Docs, Amazon warehouse, network")
+
+def test_experience_intervals():
+    """Month/year and year-only ranges, 'Present', overlaps merged, single dates only as a fallback"""
+    month = lambda y, m: y * 12 + m - 1
+    assert experience_intervals(["Jan 2019 – Feb 2021", "March 2021 - Present"], TODAY) == [(month(2019, 1), month(2026, 1))]
+    assert experience_intervals(["COMSATS (2005–2010)", "TechEdge (2008 to 2011)"], TODAY) == [(month(2005, 1), month(2011, 12))]
+    assert experience_intervals(["03/2019 - 06/2019", "Year: 2024"], TODAY) == [(month(2019, 3), month(2019, 6))]
+    assert experience_intervals(["Year: 2024"], TODAY) == [(month(2024, 1), month(2024, 12))]
+    assert experience_intervals(["Led a team of 12"], TODAY) == []
+
+def test_gap_continuity():
+    """Gaps up to 6 months are free, 36 months or more leave no continuity"""
+    assert gap_continuity([]) == (0, 1.0)
+    assert gap_continuity([(0, 11), (18, 30)]) == (6, 1.0)
+    assert gap_continuity([(0, 11), (33, 40)]) == (21, 0.5)
+    assert gap_continuity([(0, 11), (60, 70), (72, 80)]) == (48, 0.0)
+
+if __name__ == "__main__":
+    print("Testing local scorer")
+    print("=" * 40)
+    test_structure_matches_parse_evaluation()
+    test_ranks_matching_candidate_higher()
+    test_aliases_fold_whole_names_only()
+    test_experience_intervals()
+    test_gap_continuity()
+    print("Testing complete!")
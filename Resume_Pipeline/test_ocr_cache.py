@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+OCR checks: the text cache is keyed by PDF content and bounded in size (least recently used
+entries dropped), a repeated scanned resume is served from it, and a timed-out OCR process is
+killed together with its children - also when the extraction pool restarts the worker running it
+"""
+
+import os
+import sys
+import time
+import subprocess
+
+import pytest
+
+from Resume_Pipeline import config, loader_resume
+from Resume_Pipeline.ocr_cache import OcrCache, cache_key, pdf_digest
+
+def test_cache_is_bounded_and_lru(tmp_path):
+    cache = OcrCache(str(tmp_path / "ocr.sqlite3"), max_bytes=250)
+    for name in ("a", "b"):
+        cache.put(name, name * 100, seconds=1.0)
+    assert cache.get("a") == "a" * 100  # "a" is now the most recently used
+    cache.put("c", "c" * 100, seconds=1.0)
+    assert cache.get("b") is None and cache.get("a") and cache.get("c")
+    cache.put("huge", "x" * 1000, seconds=1.0)  # larger than the whole cache: not stored
+    assert cache.get("huge") is None and cache.stats()["entries"] == 2
+
+    pdf = tmp_path / "scan.pdf"
+    pdf.write_bytes(b"%PDF-1.4 scanned")
+    assert cache_key(pdf_digest(pdf), "eng", 20) != cache_key(pdf_digest(pdf), "deu", 20)
+
+def test_repeated_document_is_served_from_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OCR_CACHE_PATH", str(tmp_path / "ocr.sqlite3"))
+    monkeypatch.setattr(config, "OCR_CACHE", True)
+    monkeypatch.setattr("Resume_Pipeline.ocr_cache._cache", None)
+    calls = []
+    monkeypatch.setattr(loader_resume, "_has_ocrmypdf", lambda: True)
+    monkeypatch.setattr(loader_resume, "_ocr_with_ocrmypdf",
+                        lambda src, **kw: calls.append(src) or "recognized text " * 40)
+    pdf = tmp_path / "scan.pdf"
+    pdf.write_bytes(b"%PDF-1.4 scanned")
+
+    before = loader_resume.ocr_stats()
+    first = loader_resume._ocr_document(pdf, max_pages=20)
+    second = loader_resume._ocr_document(pdf, max_pages=20)
+    after = loader_resume.ocr_stats()
+    assert first == second and len(calls) == 1
+    assert after["documents"] - before["documents"] == 2 and after["cache_hits"] - before["cache_hits"] == 1
+
+def _dead(pid: int) -> bool:
+    """No such process, or a zombie waiting to be reaped by init."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] == "Z"
+    except OSError:
+        return False
+
+def _wait_dead(pid: int, timeout: float = 5.0) -> bool:
+    until = time.monotonic() + timeout
+    while not _dead(pid):
+        if time.monotonic() > until:
+            return False
+        time.sleep(0.05)
+    return True
+
+def _ocr_like_script(marker) -> str:
+    """A parent that starts a long-running child (like ocrmypdf's tesseract workers), records its
+    pid in ``marker`` and waits on it."""
+    return f"import subprocess, sys; p = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); " \
+           f"open({str(marker)!r}, 'w').write(str(p.pid)); p.wait()"
+
+def _run_ocr_like(marker: str):
+    # extraction pool task: an OCR run that never finishes on its own
+    loader_resume._run_killable([sys.executable, "-c", _ocr_like_script(marker)], timeout=None)
+
+def _read_pid(marker, timeout: float = 10.0) -> int:
+    until = time.monotonic() + timeout
+    while not (os.path.exists(marker) and open(marker).read()):
+        assert time.monotonic() < until, "OCR child did not start"
+        time.sleep(0.05)
+    return int(open(marker).read())
+
+@pytest.mark.skipif(not hasattr(os, "killpg"), reason="process groups are POSIX only")
+def test_timeout_kills_the_process_group(tmp_path):
+    marker = tmp_path / "child.pid"
+    start = time.monotonic()
+    with pytest.raises(subprocess.TimeoutExpired):
+        loader_resume._run_killable([sys.executable, "-c", _ocr_like_script(marker)], timeout=1.0)
+    assert time.monotonic() - start < 10
+    assert _wait_dead(int(marker.read_text()))
+    assert not loader_resume._ocr_groups
+
+@pytest.mark.skipif(not hasattr(os, "killpg"), reason="process groups are POSIX only")
+def test_pool_restart_kills_the_workers_ocr_groups(tmp_path):
+    from Resume_Pipeline.extraction_pool import ExtractionPool, ExtractionTimeout
+    marker = str(tmp_path / "child.pid")
+    pool = ExtractionPool(workers=1, timeout=3, max_tasks_per_child=10, memory_limit_mb=0)
+    pool.start()
+    try:
+        with pytest.raises(ExtractionTimeout):
+            pool.run_sync(_run_ocr_like, marker)
+        assert _wait_dead(_read_pid(marker))  # the worker took its OCR run down with it
+    finally:
+        pool.shutdown()
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    print("Testing OCR cache and timeouts")
+    print("=" * 40)
+    with tempfile.TemporaryDirectory() as td:
+        test_cache_is_bounded_and_lru(Path(td))
+    with tempfile.TemporaryDirectory() as td:
+        test_timeout_kills_the_process_group(Path(td))
+    print("Testing complete!")
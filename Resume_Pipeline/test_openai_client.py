@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Model call deadline checks against stub clients and a fake clock: each attempt's timeout is
+capped by the request deadline, retries stop with DeadlineExceeded once it passes (or without
+calling the model when it already has), and a slow request is hedged to another pool member
+whose reply wins while the slow one finishes in the background
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from Resume_Pipeline import config, openai_client
+from Resume_Pipeline.circuit_breaker import CircuitBreaker
+from Resume_Pipeline.deadline import DeadlineExceeded, deadline
+from Resume_Pipeline.endpoint_pool import EndpointPool, PoolMember
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def _reply(content="ok"):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+def _connection_error():
+    return openai.APIConnectionError(request=httpx.Request("POST", "http://stub/chat/completions"))
+
+def _pool(monkeypatch, **creates):
+    """Route calls to stub clients, one pool member per ``name=create`` function."""
+    members = [PoolMember(name, f"http://{name}", "stub-deployment", "key") for name in creates]
+    clients = {name: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+               for name, create in creates.items()}
+    pool = EndpointPool(members, cooldown=30, failure_threshold=100)
+    monkeypatch.setattr(openai_client, "_pool", pool)
+    monkeypatch.setattr(openai_client, "_clients", clients)
+    monkeypatch.setattr(openai_client, "_breaker", CircuitBreaker(failure_threshold=100))
+    monkeypatch.setattr(openai_client, "_latencies", {})
+    monkeypatch.setattr(config, "LEDGER", False)
+    return pool
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    monkeypatch.setattr(time, "sleep", clock.sleep)
+    monkeypatch.setattr(config, "HEDGE_PERCENTILE", 0)
+    return clock
+
+def test_attempt_timeout_is_capped_by_the_deadline(monkeypatch, clock):
+    timeouts = []
+    def create(model, messages, timeout, **kwargs):
+        timeouts.append(timeout)
+        return _reply()
+    _pool(monkeypatch, a=create)
+    with deadline(5):
+        openai_client.call_chat_completions([], timeout=60)
+    openai_client.call_chat_completions([], timeout=60)
+    assert timeouts == [5, 60]
+
+def test_retries_stop_with_deadline_exceeded(monkeypatch, clock):
+    calls = []
+    def create(model, messages, timeout, **kwargs):
+        calls.append(timeout)
+        clock.sleep(timeout)  # the attempt runs into its timeout
+        raise _connection_error()
+    _pool(monkeypatch, a=create)
+    monkeypatch.setattr(openai_client.random, "uniform", lambda lo, hi: 0.0)
+    with deadline(10), pytest.raises(DeadlineExceeded) as info:
+        openai_client.call_chat_completions([], max_retries=5, timeout=4)
+    assert calls == [4, 4, 2]  # the last attempt only gets what is left of the deadline
+    assert isinstance(info.value.__cause__, openai.APIConnectionError)
+
+def test_expired_deadline_does_not_call_the_model(monkeypatch, clock):
+    calls = []
+    _pool(monkeypatch, a=lambda **kwargs: calls.append(kwargs) or _reply())
+    with deadline(1):
+        clock.sleep(2)
+        with pytest.raises(DeadlineExceeded):
+            openai_client.call_chat_completions([])
+    assert calls == []
+
+def test_failure_before_the_deadline_keeps_its_error(monkeypatch, clock):
+    def create(model, messages, timeout, **kwargs):
+        raise _connection_error()
+    _pool(monkeypatch, a=create)
+    monkeypatch.setattr(openai_client.random, "uniform", lambda lo, hi: 0.0)
+    with deadline(60), pytest.raises(openai.APIConnectionError):
+        openai_client.call_chat_completions([], max_retries=2)
+
+def test_non_retryable_error_is_not_retried(monkeypatch, clock):
+    calls = []
+    def create(model, messages, timeout, **kwargs):
+        calls.append(model)
+        raise ValueError("bad request")
+    _pool(monkeypatch, a=create)
+    with pytest.raises(ValueError):
+        openai_client.call_chat_completions([], max_retries=3)
+    assert len(calls) == 1
+
+def test_slow_request_is_hedged_to_another_member(monkeypatch):
+    release = threading.Event()
+    slow_finished = threading.Event()
+    def slow(model, messages, timeout, **kwargs):
+        release.wait(5)
+        slow_finished.set()
+        return _reply("slow")
+    pool = _pool(monkeypatch, a=slow, b=lambda model, messages, timeout, **kwargs: _reply("fast"))
+    pool.members[1].outstanding = 1  # make the slow member the least loaded one for the primary request
+    monkeypatch.setattr(config, "HEDGE_PERCENTILE", 50)
+    monkeypatch.setattr(config, "HEDGE_MIN_SAMPLES", 1)
+    openai_client.record_latency(config.DEPLOYMENT_NAME, 0.05)
+
+    response = openai_client.call_chat_completions([], timeout=10)
+    assert response.choices[0].message.content == "fast"
+    assert pool.members[0].outstanding == 1  # the slow request is still in flight
+
+    release.set()  # it cannot be cancelled; it finishes in the background and releases its member
+    assert slow_finished.wait(5)
+    for _ in range(100):
+        if pool.members[0].outstanding == 0:
+            break
+        threading.Event().wait(0.01)
+    assert pool.members[0].outstanding == 0
+
+def test_hedge_failure_falls_back_to_the_primary(monkeypatch):
+    def slow(model, messages, timeout, **kwargs):
+        threading.Event().wait(0.3)
+        return _reply("slow")
+    def failing(model, messages, timeout, **kwargs):
+        raise ValueError("hedge failed")
+    pool = _pool(monkeypatch, a=slow, b=failing)
+    pool.members[1].outstanding = 1
+    monkeypatch.setattr(config, "HEDGE_PERCENTILE", 50)
+    monkeypatch.setattr(config, "HEDGE_MIN_SAMPLES", 1)
+    openai_client.record_latency(config.DEPLOYMENT_NAME, 0.05)
+    assert openai_client.call_chat_completions([], timeout=10).choices[0].message.content == "slow"
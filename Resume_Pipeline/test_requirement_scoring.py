@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Per-requirement scoring checks: ratings are cached by (resume, normalized requirement, model), a JD
+edit only rates the edited requirement, and the aggregate keeps parse_evaluation's structure
+"""
+
+import re
+from datetime import date
+
+from Resume_Pipeline import requirement_scoring
+from Resume_Pipeline.requirement_scoring import RequirementCache, RequirementScorer, normalize_requirement
+from Resume_Pipeline.scoring import EVALUATION_CRITERIA
+
+JD = {
+    "Non-Negotiable Requirements": ["3+ years of Python", "Experience with PostgreSQL"],
+    "Negotiable Requirements": ["Exposure to Kafka"],
+}
+RESUME = {"Experience": ["Backend Engineer, Acme (2021 - Present)", "Python and PostgreSQL services"], "Skills": ["Python"]}
+
+def _fake_rater(calls):
+    def rate(resume, requirements, model=None):
+        calls.append(list(requirements))
+        return [{"score": 8 if "kafka" not in r.lower() else 2, "evidence": "stub", "last_used": 2025} for r in requirements]
+    return rate
+
+def test_normalize_requirement():
+    assert normalize_requirement("- Experience with  PostgreSQL.") == normalize_requirement("2) experience with postgresql")
+
+def test_only_edited_requirements_are_rated(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(requirement_scoring, "rate_requirements", _fake_rater(calls))
+    cache = RequirementCache(str(tmp_path / "cache.sqlite3"))
+    today = date(2026, 1, 15)
+
+    evaluation = RequirementScorer(JD, cache=cache, model="m", today=today).evaluate(RESUME)
+    assert list(evaluation) == EVALUATION_CRITERIA
+    assert all(re.fullmatch(r"\d+/10", item["score"]) for item in evaluation.values())
+    assert evaluation[EVALUATION_CRITERIA[0]]["score"] == "8/10" and len(calls) == 1
+
+    edited = {"Non-Negotiable Requirements": ["Experience with postgresql", "5+ years of Python"],
+              "Negotiable Requirements": ["• Exposure to Kafka"]}
+    scorer = RequirementScorer(edited, cache=cache, model="m", today=today)
+    scorer.evaluate(RESUME)
+    assert calls[-1] == ["5+ years of Python"]
+    assert scorer.stats == {"hits": 2, "misses": 1, "calls": 1}
+
+    RequirementScorer(JD, cache=cache, model="other", today=today).evaluate(RESUME)
+    assert len(calls) == 3  # another model does not reuse the ratings
+    cache.close()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Result sink checks: the JSONL sink must give the same view as the per-file folders, see its own
+unflushed writes, keep the latest record per item, and recover from a torn last line
+"""
+
+from Resume_Pipeline.result_sink import FolderSink, JsonlSink
+
+EVALUATION = {"resume_filename": "resume1.json", "evaluation": {"Negotiable": {"score": "6/10", "description": "é\nok"}}}
+
+def _folder_sink(tmp_path):
+    return FolderSink({"resume_parsed": str(tmp_path / "parsed"), "evaluation": str(tmp_path / "evaluated")})
+
+def test_same_view_as_folders(tmp_path):
+    folders, jsonl = _folder_sink(tmp_path), JsonlSink(str(tmp_path / "results.jsonl"), flush_records=2)
+    for store in (folders, jsonl):
+        store.put("resume_parsed", "resume1", "Jane Doe\nPython")
+        store.put("evaluation", "resume1", EVALUATION)
+        store.put("evaluation", "jd2/resume1", {"evaluation": {}})
+    jsonl.close()
+    reopened = JsonlSink(jsonl.path)
+    for stage in ("resume_parsed", "evaluation"):
+        assert reopened.names(stage) == folders.names(stage)
+        for name in folders.names(stage):
+            assert reopened.get(stage, name) == folders.get(stage, name)
+    assert reopened.get("evaluation", "missing") is None and not reopened.exists("evaluation", "missing")
+    assert reopened.location("evaluation") == jsonl.path
+    assert folders.location("evaluation") == str(tmp_path / "evaluated")
+    reopened.close()
+
+def test_unflushed_reads_and_last_write_wins(tmp_path):
+    sink = JsonlSink(str(tmp_path / "results.jsonl"), flush_records=100)
+    sink.put("evaluation", "resume1", {"v": 1})
+    assert sink.get("evaluation", "resume1") == {"v": 1}  # still buffered
+    sink.flush()
+    sink.put("evaluation", "resume1", {"v": 2})
+    sink.close()
+    reopened = JsonlSink(sink.path)
+    assert reopened.get("evaluation", "resume1") == {"v": 2} and reopened.records == 2
+    reopened.close()
+
+def test_torn_last_line_is_truncated(tmp_path):
+    sink = JsonlSink(str(tmp_path / "results.jsonl"))
+    sink.put("evaluation", "resume1", EVALUATION)
+    sink.close()
+    with open(sink.path, "ab") as f:
+        f.write(b'{"stage":"evaluation","name":"resume2","val')
+    reopened = JsonlSink(sink.path)
+    assert reopened.names("evaluation") == ["resume1"]
+    reopened.put("evaluation", "resume2", {"v": 2})
+    reopened.close()
+    again = JsonlSink(sink.path)
+    assert again.names("evaluation") == ["resume1", "resume2"] and again.get("evaluation", "resume1") == EVALUATION
+    again.close()
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    print("Testing result sink")
+    print("=" * 40)
+    for test in (test_same_view_as_folders, test_unflushed_reads_and_last_write_wins, test_torn_last_line_is_truncated):
+        with tempfile.TemporaryDirectory() as td:
+            test(Path(td))
+    print("Testing complete!")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Local resume segmenter checks: heading detection (bare, numbered, inline "Skills: ..."), contact
+details gathered into Personal Information, a confident local result that skips the model, and
+unstructured text or a resume without a name or contact details that falls back to the model
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from Resume_Pipeline import openai_client, resume_segment
+from Resume_Pipeline.resume_local_segment import SECTIONS, match_heading, segment_resume_local
+
+STRUCTURED = """JANE DOE
+jane.doe@example.com | +1 (555) 123-4567
+Lahore, Pakistan
+
+SUMMARY
+Backend engineer with eight years of Python.
+
+WORK EXPERIENCE
+Senior Engineer, Example Corp (2019 - Present)
+- Built data pipelines on AWS
+
+Education:
+BS Computer Science, FAST (2012 - 2016)
+
+Skills: Python, SQL, Kubernetes
+
+3. Projects
+Resume parser
+"""
+
+UNSTRUCTURED = """I have worked on many things over the years and enjoy building software.
+At my last job I wrote services in Python and maintained some databases.
+Before that I studied computer science and did a few internships.
+I like hiking and reading and would be glad to talk about the role.
+"""
+
+ANONYMOUS = STRUCTURED.split("\n", 3)[3]  # the same sections without a name or contact details
+
+def _sections(text):
+    """Segmented text -> {section: body}"""
+    out, current = {}, None
+    for line in text.splitlines():
+        if line in SECTIONS:
+            current = line
+            out[current] = []
+        elif current:
+            out[current].append(line)
+    return {s: "\n".join(lines).strip() for s, lines in out.items()}
+
+def test_heading_detection():
+    assert match_heading("WORK EXPERIENCE") == ("Experience", "")
+    assert match_heading("2. Education:") == ("Education", "")
+    assert match_heading("• Technical Skills") == ("Skills/programming Languages", "")
+    assert match_heading("Skills: Python, SQL") == ("Skills/programming Languages", "Python, SQL")
+    assert match_heading("Experience with Python and SQL in production") is None
+    assert match_heading("Senior Engineer: Example Corp") is None
+    assert match_heading("   ") is None
+
+def test_structured_resume_is_segmented_locally(monkeypatch):
+    text, confidence = segment_resume_local(STRUCTURED)
+    assert confidence >= resume_segment.LOCAL_CONFIDENCE
+    sections = _sections(text)
+    assert list(sections) == SECTIONS
+    assert sections["Personal Information"].splitlines()[:3] == [
+        "Name: Jane Doe", "Email: jane.doe@example.com", "Phone: +1 (555) 123-4567"]
+    assert "Senior Engineer, Example Corp" in sections["Experience"]
+    assert sections["Education"] == "BS Computer Science, FAST (2012 - 2016)"
+    assert sections["Skills/programming Languages"] == "Python, SQL, Kubernetes"
+    assert sections["Projects"] == "Resume parser"
+    assert "eight years of Python" in sections["Other Information"]
+
+    def no_model(*args, **kwargs):
+        raise AssertionError("the model must not be called for a confident local segmentation")
+    monkeypatch.setattr(openai_client, "call_chat_completions", no_model)
+    assert resume_segment.segment_resume(STRUCTURED) == text
+
+def test_unstructured_resume_falls_back_to_model(monkeypatch):
+    _, confidence = segment_resume_local(UNSTRUCTURED)
+    assert confidence < resume_segment.LOCAL_CONFIDENCE
+    calls = []
+    def model(messages, model=None, **kwargs):
+        calls.append(messages)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Personal Information\nName: X"))])
+    monkeypatch.setattr(openai_client, "call_chat_completions", model)
+    assert resume_segment.segment_resume(UNSTRUCTURED) == "Personal Information\nName: X"
+    assert len(calls) == 1
+    assert resume_segment.segment_resume(UNSTRUCTURED, dry_run=True).startswith("Personal Information")
+    assert len(calls) == 1  # dry runs never call the model
+
+def test_resume_without_name_or_contact_goes_to_the_model(monkeypatch):
+    text, confidence = segment_resume_local(ANONYMOUS)
+    assert _sections(text)["Personal Information"] == ""
+    assert confidence < resume_segment.LOCAL_CONFIDENCE
+    calls = []
+    def model(messages, model=None, **kwargs):
+        calls.append(messages)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="Personal Information\nName: X"))])
+    monkeypatch.setattr(openai_client, "call_chat_completions", model)
+    resume_segment.segment_resume(ANONYMOUS)
+    assert len(calls) == 1
+
+def test_empty_text_has_no_confidence():
+    assert segment_resume_local("")[1] == 0.0
+
+if __name__ == "__main__":
+    print("Testing local resume segmentation")
+    print("=" * 40)
+    test_heading_detection()
+    for test in (test_structured_resume_is_segmented_locally, test_unstructured_resume_falls_back_to_model,
+                 test_resume_without_name_or_contact_goes_to_the_model):
+        with pytest.MonkeyPatch.context() as mp:
+            test(mp)
+    test_empty_text_has_no_confidence()
+    print("Testing complete!")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Scoring matrix checks with a stub scorer: every (JD, resume) pair reaches the result sink
+exactly once, only a bounded window of pairs is submitted at a time (their prompts are built
+in the workers), JD by JD, and a rerun skips the finished pairs
+"""
+
+import threading
+import concurrent.futures
+
+from Resume_Pipeline import scoring_matrix
+from Resume_Pipeline.result_sink import JsonlSink
+from Resume_Pipeline.scoring import EVALUATION_CRITERIA
+
+JDS = [f"jd{i}" for i in range(4)]
+RESUMES = [f"resume{i:02d}" for i in range(25)]
+
+class CountingSink(JsonlSink):
+    def __init__(self, path):
+        super().__init__(path)
+        self.puts = []
+
+    def put(self, stage, name, value):
+        if stage == "evaluation" and name != scoring_matrix.MATRIX_SUMMARY:
+            self.puts.append(name)
+        super().put(stage, name, value)
+
+class WindowExecutor(concurrent.futures.ThreadPoolExecutor):
+    """Records how many submitted tasks were unfinished at most."""
+    peak = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._open = 0
+        self._count_lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        with self._count_lock:
+            self._open += 1
+            WindowExecutor.peak = max(WindowExecutor.peak, self._open)
+        future = super().submit(fn, *args, **kwargs)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        with self._count_lock:
+            self._open -= 1
+
+def _sink(tmp_path):
+    sink = CountingSink(str(tmp_path / "results.jsonl"))
+    for jd in JDS:
+        sink.put("jd_json", jd, {"Non-Negotiable Requirements": [f"{jd} skill"]})
+    for resume in RESUMES:
+        sink.put("resume_json", resume, {"Skills": ["Python", resume]})
+    return sink
+
+def test_every_pair_is_saved_once_with_a_bounded_window(tmp_path, monkeypatch):
+    sink = _sink(tmp_path)
+    scored = []
+    def stub_evaluate(messages):
+        scored.append(messages[1]["content"])
+        return {title: {"score": "7/10", "description": "stub"} for title in EVALUATION_CRITERIA}
+    monkeypatch.setattr(scoring_matrix, "evaluate_messages", stub_evaluate)
+    monkeypatch.setattr(concurrent.futures, "ThreadPoolExecutor", WindowExecutor)
+    WindowExecutor.peak = 0
+
+    counts = scoring_matrix.run_matrix(JDS, RESUMES, workers=3, sink=sink, skip_existing=True)
+    expected = [scoring_matrix.pair_name(jd, resume) for jd in JDS for resume in RESUMES]
+    assert counts == {"pairs": 100, "scored": 100, "failed": 0, "skipped": 0}
+    assert sorted(sink.puts) == sorted(expected) and len(set(sink.puts)) == 100
+    assert 0 < WindowExecutor.peak <= 3 * scoring_matrix.SUBMIT_WINDOW_PER_WORKER
+    order = [name.split("/")[0] for name in sink.puts]  # JD-major: jd0's pairs first, jd3's last
+    assert order[0] == "jd0" and order[-1] == "jd3"
+    assert all(content.startswith("Job Description: ") for content in scored)  # shared JD prefix
+
+    counts = scoring_matrix.run_matrix(JDS, RESUMES, workers=3, sink=sink, skip_existing=True)
+    assert (counts["scored"], counts["skipped"], len(sink.puts)) == (0, 100, 100)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Request coalescing checks: concurrent calls with one key share a single computation (result or
+error), and an Idempotency-Key reattaches to a finished result but never to another request's
+"""
+
+import asyncio
+
+import pytest
+
+from Resume_Pipeline.single_flight import IdempotencyConflict, IdempotencyStore, SingleFlight
+
+def _counting(calls, result="done", fail=False):
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        if fail:
+            raise RuntimeError("boom")
+        return result
+    return compute
+
+def test_concurrent_calls_share_one_computation():
+    async def scenario():
+        flights, calls = SingleFlight(), []
+        results = await asyncio.gather(*(flights.run("k", _counting(calls)) for _ in range(10)))
+        assert results == ["done"] * 10 and len(calls) == 1
+        assert flights.stats == {"started": 1, "joined": 9} and flights.in_flight() == 0
+
+        failing = [flights.run("bad", _counting(calls, fail=True)) for _ in range(3)]
+        errors = await asyncio.gather(*failing, return_exceptions=True)
+        assert all(isinstance(e, RuntimeError) for e in errors) and len(calls) == 2
+        assert await flights.run("k", _counting(calls)) == "done" and len(calls) == 3  # finished keys run again
+    asyncio.run(scenario())
+
+def test_idempotency_key_reattaches():
+    async def scenario():
+        store, calls = IdempotencyStore(ttl=60, max_keys=10), []
+        assert await store.run("key-1", ("url", "jd"), _counting(calls)) == "done"
+        assert await store.run("key-1", ("url", "jd"), _counting(calls)) == "done" and len(calls) == 1
+        with pytest.raises(IdempotencyConflict):
+            await store.run("key-1", ("other", "jd"), _counting(calls))
+
+        with pytest.raises(RuntimeError):
+            await store.run("key-2", ("url", "jd"), _counting(calls, fail=True))
+        assert await store.run("key-2", ("url", "jd"), _counting(calls)) == "done"  # failures are retried
+        assert store.stats == {"started": 3, "reattached": 1}
+    asyncio.run(scenario())
+
+if __name__ == "__main__":
+    print("Testing request coalescing")
+    print("=" * 40)
+    test_concurrent_calls_share_one_computation()
+    test_idempotency_key_reattaches()
+    print("Testing complete!")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Startup checks for the AI Recruit API server: importing it must stay within a time budget
+and must not load the heavy optional backends (they are loaded by the warm-up hook instead)
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Seconds allowed for `import Resume_Pipeline.api_server` in a fresh interpreter
+IMPORT_BUDGET = float(os.environ.get("IMPORT_BUDGET", "1.0"))
+HEAVY_MODULES = ["fitz", "pymupdf", "pdfplumber", "pdf2image", "pytesseract", "docx", "openai", "requests", "uvicorn"]
+
+def _fresh_import(statement):
+    """Run `statement` in a new interpreter; return (seconds, loaded module names)"""
+    code = (
+        "import json, sys, time\n"
+        "t = time.perf_counter()\n"
+        f"{statement}\n"
+        "print(json.dumps({'seconds': time.perf_counter() - t, 'modules': sorted(sys.modules)}))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    return result["seconds"], set(result["modules"])
+
+def test_import_time_budget():
+    """Importing the API server stays within IMPORT_BUDGET (best of three to ignore cold disk caches)"""
+    seconds = min(_fresh_import("import Resume_Pipeline.api_server")[0] for _ in range(3))
+    print(f"api_server import: {seconds:.3f}s (budget {IMPORT_BUDGET:.1f}s)")
+    assert seconds < IMPORT_BUDGET
+
+def test_heavy_backends_load_lazily():
+    """PDF/DOCX/OCR backends and the OpenAI SDK are not imported until first use"""
+    _, modules = _fresh_import("import Resume_Pipeline.api_server")
+    loaded = [m for m in HEAVY_MODULES if m in modules]
+    print("Heavy modules loaded at import:", loaded or "none")
+    assert not loaded
+
+def test_warm_up_loads_pdf_engine():
+    """The warm-up hook initializes the PDF engine ahead of the first request"""
+    _, modules = _fresh_import("from Resume_Pipeline import loader_resume; loader_resume.warm_up()")
+    assert "fitz" in modules or "pdfplumber" in modules
+
+if __name__ == "__main__":
+    print("Testing API server startup")
+    print("=" * 40)
+    test_import_time_budget()
+    test_heavy_backends_load_lazily()
+    test_warm_up_loads_pdf_engine()
+    print("Testing complete!")